@@ -0,0 +1,340 @@
+"""
+Отложенная отправка ответов кандидатов на бэкенд (write-behind)
+
+Ответ сначала записывается в локальный журнал (append-only, fsync группой),
+после чего кандидат сразу получает следующий вопрос. Отправка на бэкенд идет
+в фоне пакетами, с повторами и задержкой; id записи передается как ключ
+идемпотентности, поэтому повтор после потерянного ответа не создает дубликат.
+Неотправленные ответы восстанавливаются из журнала при запуске, журнал сжимается
+при запуске и по мере накопления подтвержденных записей. Журнал другого процесса
+(воркер убран или не запущен) принимается через adopt().
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from backend_client import get_backend_client
+from config import ANSWERS_JOURNAL_PATH, ANSWER_BATCH_SIZE, ANSWER_BATCH_LINGER, ANSWER_RETRY_INITIAL_DELAY, \
+    ANSWER_RETRY_MAX_DELAY, ANSWER_DRAIN_TIMEOUT, ANSWER_JOURNAL_COMPACT_ACKS
+from util import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerQueue:
+    """Очередь ответов с журналом на диске"""
+
+    def __init__(self, journal_path: str = ANSWERS_JOURNAL_PATH):
+        self.journal_path = journal_path
+        self._queue: Optional[asyncio.Queue] = None
+        self._sender: Optional[asyncio.Task] = None
+        self._journal = None
+        # Групповая запись в журнал: накопленные записи и ожидающие их фьючерсы
+        self._journal_buffer: List[Dict[str, Any]] = []
+        self._journal_waiters: List[asyncio.Future] = []
+        self._journal_writer: Optional[asyncio.Task] = None
+        self._journal_wakeup: Optional[asyncio.Event] = None
+        # Запись и сжатие журнала выполняются строго по очереди
+        self._journal_lock: Optional[asyncio.Lock] = None
+        # Ответы, чья запись 'add' есть (или будет) в журнале без 'ack' - содержимое журнала после сжатия
+        self._unacked: Dict[str, Dict[str, Any]] = {}
+        # Подтвержденных ответов в журнале с последнего сжатия
+        self._journal_acked = 0
+        # Неподтвержденные ответы по кандидатам (для drain)
+        self._pending: Dict[int, int] = {}
+        self._drained: Dict[int, asyncio.Event] = {}
+        self._retry_tasks: set = set()
+        self.sent = 0
+        self.retries = 0
+        self.rejected = 0
+
+    # ==================== ЖИЗНЕННЫЙ ЦИКЛ ====================
+
+    async def start(self, journal_path: Optional[str] = None):
+        """Восстановление неотправленных ответов из журнала и запуск отправки"""
+        if journal_path:
+            self.journal_path = journal_path
+        self._queue = asyncio.Queue()
+        self._journal_wakeup = asyncio.Event()
+        self._journal_lock = asyncio.Lock()
+
+        pending = await asyncio.to_thread(self._replay_and_compact)
+        self._journal = await asyncio.to_thread(open, self.journal_path, 'a', encoding='utf-8')
+        for record in pending:
+            self._unacked[record['id']] = record
+            self._enqueue(record)
+        if pending:
+            logger.info(f"Replayed {len(pending)} unsent answers from {self.journal_path}")
+
+        self._journal_writer = asyncio.create_task(self._journal_loop())
+        self._sender = asyncio.create_task(self._send_loop())
+
+    async def stop(self, timeout: float = ANSWER_DRAIN_TIMEOUT):
+        """Остановка: попытка отправить очередь, остаток остается в журнале"""
+        if self._sender is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self._queue.qsize()} answers left in journal for replay")
+        for task in [self._sender, *self._retry_tasks]:
+            task.cancel()
+        await asyncio.gather(self._sender, *self._retry_tasks, return_exceptions=True)
+        self._sender = None
+
+        # Под блокировкой журнала: дожидается записи, которую в этот момент выполняет _journal_loop
+        await self._flush_journal()
+        self._journal_writer.cancel()
+        await asyncio.gather(self._journal_writer, return_exceptions=True)
+        await asyncio.to_thread(self._journal.close)
+        logger.info(f"Answer queue stopped: {self.get_stats()}")
+
+    # ==================== API ====================
+
+    async def submit(self, candidate_id: int, question_id: Any, answer: str, time_taken: int) -> str:
+        """
+        Принять ответ: дожидается только записи в журнал
+
+        Returns:
+            Идентификатор ответа в журнале
+        """
+        record = {
+            'op': 'add',
+            'id': uuid.uuid4().hex,
+            'candidate_id': candidate_id,
+            'question_id': question_id,
+            'answer': answer,
+            'time_taken': time_taken,
+            'ts': time.time(),
+        }
+        await self._write_journal(record)
+        self._enqueue(record)
+        return record['id']
+
+    async def adopt(self, journal_path: str) -> int:
+        """
+        Принять журнал другого процесса: его неотправленные ответы переносятся в свой журнал
+        и отправляются, после чего чужой журнал удаляется
+
+        Returns:
+            Число принятых ответов
+        """
+        if not os.path.exists(journal_path) or os.path.abspath(journal_path) == os.path.abspath(self.journal_path):
+            return 0
+        records = await asyncio.to_thread(read_pending, journal_path)
+        records = [record for record in records if record['id'] not in self._unacked]
+        # Сначала в свой журнал: после сбоя до удаления ответы будут в обоих журналах,
+        # а повторная отправка с тем же ключом идемпотентности не создаст дубликат
+        await asyncio.gather(*(self._write_journal(record) for record in records))
+        for record in records:
+            self._enqueue(record)
+        await asyncio.to_thread(os.remove, journal_path)
+        logger.info(f"Adopted {len(records)} unsent answers from {journal_path}")
+        return len(records)
+
+    async def drain(self, candidate_id: int, timeout: float = ANSWER_DRAIN_TIMEOUT) -> bool:
+        """
+        Дождаться отправки всех ответов кандидата
+
+        Returns:
+            False, если за timeout отправить не удалось
+        """
+        if not self._pending.get(candidate_id):
+            return True
+        event = self._drained.setdefault(candidate_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.error(f"Answers of candidate {candidate_id} are still pending after {timeout}s")
+            return False
+
+    def get_stats(self) -> Dict[str, int]:
+        """Размер очереди и счетчики отправки"""
+        return {
+            'queued': self._queue.qsize() if self._queue else 0,
+            'pending': sum(self._pending.values()),
+            'sent': self.sent,
+            'retries': self.retries,
+            'rejected': self.rejected,
+        }
+
+    # ==================== ОТПРАВКА ====================
+
+    def _enqueue(self, record: Dict[str, Any]):
+        candidate_id = record['candidate_id']
+        self._pending[candidate_id] = self._pending.get(candidate_id, 0) + 1
+        self._queue.put_nowait((record, 0))
+
+    def _done(self, record: Dict[str, Any]):
+        candidate_id = record['candidate_id']
+        left = self._pending.get(candidate_id, 1) - 1
+        if left > 0:
+            self._pending[candidate_id] = left
+            return
+        self._pending.pop(candidate_id, None)
+        event = self._drained.pop(candidate_id, None)
+        if event is not None:
+            event.set()
+
+    async def _send_loop(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + ANSWER_BATCH_LINGER
+            while len(batch) < ANSWER_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await asyncio.gather(*(self._deliver(record, attempt) for record, attempt in batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _deliver(self, record: Dict[str, Any], attempt: int):
+        result = await get_backend_client().post_answer_by_question_id(
+            record['candidate_id'], record['question_id'], record['answer'], record['time_taken'],
+            idempotency_key=record['id'],
+        )
+        status = result.status
+
+        if result.ok:
+            self.sent += 1
+        elif 400 <= status < 500:
+            # Бэкенд отклонил ответ - повтор не поможет
+            self.rejected += 1
+            logger.error(f"Answer {record['id']} rejected by backend with status {status}")
+        else:
+            self.retries += 1
+            delay = backoff_delay(attempt, ANSWER_RETRY_INITIAL_DELAY, ANSWER_RETRY_MAX_DELAY)
+            task = asyncio.create_task(self._retry_later(record, attempt + 1, delay))
+            self._retry_tasks.add(task)
+            task.add_done_callback(self._retry_tasks.discard)
+            return
+
+        self._unacked.pop(record['id'], None)
+        self._journal_buffer.append({'op': 'ack', 'id': record['id']})
+        self._journal_wakeup.set()
+        self._done(record)
+
+    async def _retry_later(self, record: Dict[str, Any], attempt: int, delay: float):
+        await asyncio.sleep(delay)
+        self._queue.put_nowait((record, attempt))
+
+    # ==================== ЖУРНАЛ ====================
+
+    async def _write_journal(self, record: Dict[str, Any]):
+        """Добавить запись и дождаться ее сброса на диск"""
+        future = asyncio.get_running_loop().create_future()
+        self._unacked[record['id']] = record
+        self._journal_buffer.append(record)
+        self._journal_waiters.append(future)
+        self._journal_wakeup.set()
+        try:
+            await future
+        except Exception:
+            self._unacked.pop(record['id'], None)
+            raise
+
+    async def _journal_loop(self):
+        while True:
+            await self._journal_wakeup.wait()
+            self._journal_wakeup.clear()
+            await self._flush_journal()
+
+    async def _flush_journal(self):
+        async with self._journal_lock:
+            if not self._journal_buffer:
+                return
+            records, self._journal_buffer = self._journal_buffer, []
+            waiters, self._journal_waiters = self._journal_waiters, []
+            self._journal_acked += sum(1 for record in records if record['op'] == 'ack')
+            # Снимок берется вместе с пачкой: в нем все добавленные и не подтвержденные к этому моменту ответы
+            keep = None
+            if self._journal_acked >= ANSWER_JOURNAL_COMPACT_ACKS:
+                keep = list(self._unacked.values())
+                self._journal_acked = 0
+            await self._write_batch(records, waiters, keep)
+
+    async def _write_batch(self, records: List[Dict[str, Any]], waiters: List[asyncio.Future],
+                           keep: Optional[List[Dict[str, Any]]]):
+        try:
+            await asyncio.to_thread(self._append, records)
+        except Exception as e:
+            logger.error(f"Failed to write answers journal: {e}")
+            for future in waiters:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future in waiters:
+            if not future.done():
+                future.set_result(None)
+
+        if keep is not None:
+            try:
+                await asyncio.to_thread(self._compact, keep)
+            except Exception as e:
+                logger.error(f"Failed to compact answers journal: {e}")
+
+    def _append(self, records: List[Dict[str, Any]]):
+        self._journal.write(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records))
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def _compact(self, keep: List[Dict[str, Any]]):
+        """Переписать журнал, оставив только неподтвержденные ответы"""
+        _write_records(self.journal_path, keep)
+        self._journal.close()
+        self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        logger.info(f"Answers journal compacted: {len(keep)} unsent answers kept")
+
+    def _replay_and_compact(self) -> List[Dict[str, Any]]:
+        """Прочитать журнал, оставить в нем только неподтвержденные ответы"""
+        directory = os.path.dirname(self.journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not os.path.exists(self.journal_path):
+            return []
+
+        pending = read_pending(self.journal_path)
+        _write_records(self.journal_path, pending)
+        return pending
+
+
+def read_pending(journal_path: str) -> List[Dict[str, Any]]:
+    """Ответы журнала без подтверждения"""
+    added: Dict[str, Dict[str, Any]] = {}
+    with open(journal_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Оборванная последняя строка после аварийного завершения
+                continue
+            if record.get('op') == 'add':
+                added[record['id']] = record
+            elif record.get('op') == 'ack':
+                added.pop(record['id'], None)
+    return list(added.values())
+
+
+def _write_records(journal_path: str, records: List[Dict[str, Any]]):
+    """Атомарная замена журнала: временный файл, fsync и переименование"""
+    tmp_path = f'{journal_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, journal_path)
+
+
+# Глобальный экземпляр очереди
+answer_queue = AnswerQueue()
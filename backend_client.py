@@ -2,16 +2,66 @@
 Клиент для взаимодействия с бэкенд API на Go
 """
 import asyncio
+import copy
 import logging
 import os
+import time
 import uuid
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, NamedTuple, Callable, List, Tuple
 
 import aiohttp
 
+from cache import TTLCache
+from config import BACKEND_POOL_LIMIT, BACKEND_POOL_LIMIT_PER_HOST, BACKEND_KEEPALIVE_TIMEOUT, \
+    BACKEND_DNS_CACHE_TTL, BACKEND_REQUEST_TIMEOUT, QUESTIONS_CACHE_TTL, QUESTIONS_CACHE_SIZE, \
+    CANDIDATE_CACHE_TTL, CANDIDATE_CACHE_NEGATIVE_TTL, CANDIDATE_CACHE_SIZE, BACKEND_RETRY_ATTEMPTS, \
+    BACKEND_RETRY_INITIAL_DELAY, BACKEND_RETRY_MAX_DELAY, BACKEND_GET_TIMEOUT, BACKEND_BREAKER_FAILURES, \
+    BACKEND_BREAKER_RESET_TIMEOUT
+from metrics import BACKEND_CALLS, BACKEND_CONNECTIONS, BACKEND_LATENCY, BACKEND_REQUESTS
+from resilience import CircuitBreaker, RetryPolicy
+
 logger = logging.getLogger(__name__)
 
 
+class ApiResponse(NamedTuple):
+    """
+    Результат запроса к бэкенду
+
+    status == 0 - ответа нет (сетевая ошибка, таймаут или разомкнутый выключатель), data при этом None.
+    Распаковывается как кортеж: data, status = await ...
+    """
+    data: Optional[Any]
+    status: int
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+
+# Без повторов: POST-запросы не идемпотентны
+DEFAULT_POLICY = RetryPolicy(attempts=1, timeout=BACKEND_REQUEST_TIMEOUT)
+# Идемпотентные GET: короткий таймаут попытки и повторы с задержкой
+GET_POLICY = RetryPolicy(
+    attempts=BACKEND_RETRY_ATTEMPTS,
+    initial_delay=BACKEND_RETRY_INITIAL_DELAY,
+    max_delay=BACKEND_RETRY_MAX_DELAY,
+    timeout=BACKEND_GET_TIMEOUT,
+)
+ENDPOINT_POLICIES: Dict[str, RetryPolicy] = {
+    'get_candidate': GET_POLICY,
+    'get_questions': GET_POLICY,
+    'get_screening_status': GET_POLICY,
+}
+
+# Заголовок с ключом идемпотентности для повторяемых POST
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+# Поля кандидата, которые хранятся в кэше
+CANDIDATE_CACHE_FIELDS = ('id', 'full_name', 'phone', 'city')
+# Отметка в кэше, что кандидат не найден (404)
+_CANDIDATE_NOT_FOUND = object()
+
+
 class BackendClient:
     """Клиент для работы с бэкенд API"""
 
@@ -23,57 +73,284 @@ class BackendClient:
             base_url: Базовый URL бэкенд API
         """
         self.base_url = base_url.rstrip('/')
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        # Кэш вопросов по vacancy_id и незавершенные предзагрузки
+        self._questions_cache = TTLCache(maxsize=QUESTIONS_CACHE_SIZE, ttl=QUESTIONS_CACHE_TTL)
+        self._questions_prefetch: Dict[str, asyncio.Task] = {}
+        # Счетчик сбросов кэша вопросов: ответ, запрошенный до сброса, в кэш не попадает
+        self._questions_epoch = 0
+        # Кэш профилей кандидатов по telegram_id (включая отрицательные ответы)
+        self._candidate_cache = TTLCache(maxsize=CANDIDATE_CACHE_SIZE, ttl=CANDIDATE_CACHE_TTL)
+        # Общий выключатель бэкенда и счетчики по эндпоинтам
+        self.breaker = CircuitBreaker('backend', BACKEND_BREAKER_FAILURES, BACKEND_BREAKER_RESET_TIMEOUT)
+        self._endpoint_stats: Dict[str, Dict[str, int]] = {}
+        # Идущие GET-запросы: одинаковые запросы ждут один ответ (single-flight)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Слушатели ответов (запись трафика для воспроизведения)
+        self._response_listeners: List[Callable[..., None]] = []
+        # Пул соединений: запросы, держащие соединение, и события пула из TraceConfig
+        self._pool_stats = {'in_use': 0, 'created': 0, 'reused': 0, 'queued': 0}
+
+    # ==================== СЕССИЯ ====================
+
+    async def start(self):
+        """Открытие общей HTTP-сессии с пулом соединений"""
+        if self._session is not None and not self._session.closed:
+            return
+
+        self._connector = aiohttp.TCPConnector(
+            limit=BACKEND_POOL_LIMIT,
+            limit_per_host=BACKEND_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=BACKEND_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=BACKEND_DNS_CACHE_TTL,
+            use_dns_cache=True,
+            ssl=False,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=self._connector,
+            timeout=aiohttp.ClientTimeout(total=BACKEND_REQUEST_TIMEOUT),
+            trace_configs=[self._pool_trace()],
+        )
+        logger.info(
+            f"Backend session opened (limit={BACKEND_POOL_LIMIT}, "
+            f"limit_per_host={BACKEND_POOL_LIMIT_PER_HOST}, keepalive={BACKEND_KEEPALIVE_TIMEOUT}s)"
+        )
+
+    async def close(self):
+        """Закрытие HTTP-сессии и всех соединений пула"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info("Backend session closed")
+        self._session = None
+        self._connector = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Получение общей сессии (открывается лениво, если start() не вызывался)"""
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session
+
+    def _pool_trace(self) -> aiohttp.TraceConfig:
+        """События пула соединений (новое, повторно использованное, ожидание свободного)"""
+        trace = aiohttp.TraceConfig()
+
+        def on_event(event: str):
+            async def handler(session, context, params):
+                self._pool_stats[event] += 1
+                BACKEND_CONNECTIONS.labels(event).inc()
+            return handler
+
+        trace.on_connection_create_end.append(on_event('created'))
+        trace.on_connection_reuseconn.append(on_event('reused'))
+        trace.on_connection_queued_start.append(on_event('queued'))
+        return trace
 
-    async def _make_request(self, method: str, endpoint: str, data: Dict = None) -> (Optional[Dict[str, Any]], int):
+    def get_pool_stats(self) -> Dict[str, int]:
+        """
+        Статистика пула соединений
+
+        Returns:
+            Лимиты пула, число запросов, держащих соединение (in_use), и счетчики
+            новых (created), повторно использованных (reused) соединений и ожиданий
+            свободного соединения (queued)
+        """
+        return {'limit': BACKEND_POOL_LIMIT, 'limit_per_host': BACKEND_POOL_LIMIT_PER_HOST, **self._pool_stats}
+
+    def get_resilience_stats(self) -> Dict[str, Any]:
+        """
+        Состояние выключателя и счетчики запросов по эндпоинтам
+
+        Returns:
+            {'breaker': {...}, 'endpoints': {name: {'requests', 'retries', 'failures', 'short_circuited',
+            'cache_hits', 'coalesced'}}}; cache_hits и coalesced - вызовы, обошедшиеся без своего запроса
+        """
+        return {
+            'breaker': self.breaker.get_stats(),
+            'endpoints': {name: dict(stats) for name, stats in self._endpoint_stats.items()},
+        }
+
+    def add_response_listener(self, listener: Callable[..., None]):
+        """
+        Подписка на ответы бэкенда
+
+        Args:
+            listener: Вызывается как listener(name, method, endpoint, data, status, latency)
+        """
+        self._response_listeners.append(listener)
+
+    def remove_response_listener(self, listener: Callable[..., None]):
+        if listener in self._response_listeners:
+            self._response_listeners.remove(listener)
+
+    async def _make_request(self, method: str, endpoint: str, data: Dict = None, name: str = None,
+                            affects: Tuple[str, ...] = (), coalesce: bool = True,
+                            headers: Optional[Dict[str, str]] = None) -> ApiResponse:
         """
         Базовый метод для выполнения HTTP запросов
 
+        Повторы выполняются по политике эндпоинта (ENDPOINT_POLICIES), пока выключатель бэкенда замкнут.
+        GET, совпадающий с уже идущим запросом, не отправляется повторно, а получает его ответ.
+        Запрос на изменение (не GET) выводит из объединения идущие GET эндпоинтов affects:
+        GET после записи не получит ответ, прочитанный до нее.
+
         Args:
             method: HTTP метод (GET, POST, PUT, DELETE)
             endpoint: Эндпоинт API
             data: Данные для отправки
+            name: Имя эндпоинта для политики повторов и статистики
+            affects: GET-эндпоинты, ответ которых меняет этот запрос на изменение
+            coalesce: False - GET всегда отправляется заново (чтение сразу после своей записи)
+            headers: Дополнительные заголовки (например, Idempotency-Key)
 
         Returns:
-            Ответ от API или None в случае ошибки
+            ApiResponse; при ошибке без ответа - ApiResponse(None, 0)
         """
+        name = name or f"{method} {endpoint}"
+        if method != 'GET':
+            # До и после записи: GET, начатый до ее завершения, не принимает новых участников
+            self._retire(affects)
+            try:
+                return await self._request(method, endpoint, data, name, headers)
+            finally:
+                self._retire(affects)
+
+        task = self._inflight.get(endpoint) if coalesce else None
+        if task is not None:
+            self._count(name, 'coalesced')
+        else:
+            task = asyncio.create_task(self._request(method, endpoint, data, name, headers))
+            self._inflight[endpoint] = task
+            task.add_done_callback(lambda done: self._finish_inflight(endpoint, done))
+        # shield: отмена одного из ожидающих не прерывает запрос для остальных
+        return await asyncio.shield(task)
+
+    def _retire(self, endpoints: Tuple[str, ...]):
+        """Идущие GET остаются у своих участников, но новые вызовы отправят свой запрос"""
+        for endpoint in endpoints:
+            self._inflight.pop(endpoint, None)
+
+    def _finish_inflight(self, endpoint: str, task: asyncio.Task):
+        if self._inflight.get(endpoint) is task:
+            del self._inflight[endpoint]
+
+    def _endpoint(self, name: str) -> Dict[str, int]:
+        return self._endpoint_stats.setdefault(
+            name, {'requests': 0, 'retries': 0, 'failures': 0, 'short_circuited': 0, 'cache_hits': 0, 'coalesced': 0}
+        )
+
+    def _count(self, name: str, source: str):
+        """Вызов эндпоинта без своего запроса: source - cache_hits или coalesced"""
+        self._endpoint(name)[source] += 1
+        BACKEND_CALLS.labels(name, 'cache' if source == 'cache_hits' else source).inc()
+
+    async def _request(self, method: str, endpoint: str, data: Optional[Dict], name: str,
+                       headers: Optional[Dict[str, str]] = None) -> ApiResponse:
+        """Запрос с повторами по политике эндпоинта"""
+        policy = ENDPOINT_POLICIES.get(name, DEFAULT_POLICY)
+        stats = self._endpoint(name)
+        stats['requests'] += 1
+        BACKEND_CALLS.labels(name, 'request').inc()
+        started = time.perf_counter()
+
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                stats['short_circuited'] += 1
+                logger.warning(f"Backend circuit is open, {name} rejected")
+                return self._observe(name, method, endpoint, started, ApiResponse(None, 0))
+
+            response = await self._attempt(method, endpoint, data, policy.timeout, headers)
+            if response.status == 0 or response.status >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+            if not policy.should_retry(attempt, response.status):
+                if response.status == 0 or response.status >= 500:
+                    stats['failures'] += 1
+                return self._observe(name, method, endpoint, started, response)
+
+            stats['retries'] += 1
+            await asyncio.sleep(policy.delay(attempt))
+            attempt += 1
+
+    def _observe(self, name: str, method: str, endpoint: str, started: float,
+                 response: ApiResponse) -> ApiResponse:
+        latency = time.perf_counter() - started
+        BACKEND_LATENCY.labels(name).observe(latency)
+        BACKEND_REQUESTS.labels(name, response.status).inc()
+        for listener in self._response_listeners:
+            try:
+                listener(name, method, endpoint, response.data, response.status, latency)
+            except Exception as e:
+                logger.error(f"Response listener failed: {e}")
+        return response
+
+    async def _attempt(self, method: str, endpoint: str, data: Optional[Dict], timeout: float,
+                       headers: Optional[Dict[str, str]] = None) -> ApiResponse:
+        """Одна попытка запроса"""
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
 
         try:
-            async with aiohttp.ClientSession() as session:
+            session = await self._get_session()
+            self._pool_stats['in_use'] += 1
+            try:
                 async with session.request(
                         method=method,
                         url=url,
                         json=data,
-                        timeout=aiohttp.ClientTimeout(total=10),
-                        ssl=False,
+                        headers=headers,
+                        timeout=aiohttp.ClientTimeout(total=timeout),
                 ) as response:
                     if response.status == 200 or response.status == 201:
-                        return await response.json(), response.status
+                        return ApiResponse(await response.json(), response.status)
                     elif response.status == 204:
-                        return {}, response.status  # No content
+                        return ApiResponse({}, response.status)  # No content
                     elif response.status == 404:
-                        return {}, response.status
+                        return ApiResponse({}, response.status)
                     else:
                         error_text = await response.text()
                         logger.error(f"API error {response.status}: {error_text}")
-                        return {}, response.status
+                        return ApiResponse({}, response.status)
+            finally:
+                self._pool_stats['in_use'] -= 1
 
         except aiohttp.ClientError as e:
             logger.error(f"HTTP client error: {e}")
-            return None
         except asyncio.TimeoutError:
             logger.error("API request timeout")
-            return None
         except Exception as e:
             logger.error(f"Unexpected error in API request: {e}")
-            return None
+        return ApiResponse(None, 0)
 
     # ==================== КАНДИДАТ ====================
 
-    async def get_candidate(self, telegram_id: int) -> (Optional[Dict[str, Any]], int):
-        return await self._make_request('GET', f'/api/v1/candidates/by-tg-id/{telegram_id}')
+    async def get_candidate(self, telegram_id: int) -> ApiResponse:
+        cached = self._candidate_cache.get(telegram_id)
+        if cached is not None:
+            self._count('get_candidate', 'cache_hits')
+        if cached is _CANDIDATE_NOT_FOUND:
+            return ApiResponse({}, 404)
+        if cached is not None:
+            return ApiResponse(dict(cached), 200)
+
+        result = await self._make_request('GET', f'/api/v1/candidates/by-tg-id/{telegram_id}', name='get_candidate')
+        if result.status == 200 and result.data:
+            self._cache_candidate(telegram_id, result.data)
+        elif result.status == 404:
+            self._candidate_cache.set(telegram_id, _CANDIDATE_NOT_FOUND, ttl=CANDIDATE_CACHE_NEGATIVE_TTL)
+        return result
+
+    def _cache_candidate(self, telegram_id: int, candidate: Dict[str, Any]):
+        record = {field: candidate.get(field) for field in CANDIDATE_CACHE_FIELDS}
+        self._candidate_cache.set(telegram_id, record)
 
-    async def create_candidate(self, candidate_data: Dict[str, Any]) -> (Optional[Dict[str, Any]], int):
+    def invalidate_candidate(self, telegram_id: int):
+        """Сброс закэшированного профиля кандидата"""
+        self._candidate_cache.invalidate(telegram_id)
+
+    async def create_candidate(self, candidate_data: Dict[str, Any]) -> ApiResponse:
         api_data = {
             'telegram_id': candidate_data.get('telegram_id'),
             'full_name': candidate_data.get('full_name'),
@@ -82,44 +359,128 @@ class BackendClient:
             'telegram_username': candidate_data.get('telegram_username').lstrip('@'),
         }
         api_data = {k: v for k, v in api_data.items() if v is not None}
-        return await self._make_request('POST', '/api/v1/candidate', api_data)
+        result = await self._make_request(
+            'POST', '/api/v1/candidate', api_data, name='create_candidate',
+            affects=(f"/api/v1/candidates/by-tg-id/{api_data['telegram_id']}",),
+        )
+
+        # Созданный кандидат сразу попадает в кэш, чтобы /start и /resume не ходили на бэкенд
+        created = result.data
+        if result.status in (200, 201) and created and created.get('id') is not None:
+            self._cache_candidate(api_data['telegram_id'], {**api_data, **created})
+        return result
 
     # ==================== СКРИНИНГ РЕЗЮМЕ ====================
 
-    async def process_screening(self, candidate_id: int, vacancy_id: uuid) -> (Optional[Dict[str, Any]], int):
+    async def process_screening(self, candidate_id: int, vacancy_id: uuid) -> ApiResponse:
         api_data = {
             'candidate_id': candidate_id,
             'vacancy_id': vacancy_id,
         }
         api_data = {k: v for k, v in api_data.items() if v is not None}
-        return await self._make_request('POST', f'/api/v1/screening/process', api_data)
+        return await self._make_request('POST', f'/api/v1/screening/process', api_data, name='process_screening',
+                                        affects=(_meta_endpoint(candidate_id, vacancy_id),))
 
     # ==================== ИНТЕРВЬЮ ====================
 
-    async def get_questions_by_vacancy_id(self, vacancy_id: uuid) -> (Optional[List[Dict[str, Any]]], int):
-        return await self._make_request('GET', f'/api/v1/questions/{vacancy_id}')
+    async def get_questions_by_vacancy_id(self, vacancy_id: uuid) -> ApiResponse:
+        """
+        Вопросы вакансии: из кэша, из идущей предзагрузки или с бэкенда
+
+        Каждый вызов получает свою копию списка: вопросы попадают в данные FSM
+        и не должны менять кэш, общий для всех кандидатов вакансии.
+        """
+        key = str(vacancy_id)
+        questions = self._questions_cache.get(key)
+        if questions is not None:
+            self._count('get_questions', 'cache_hits')
+            return ApiResponse(copy.deepcopy(questions), 200)
+
+        task = self._questions_prefetch.get(key)
+        if task is not None:
+            self._count('get_questions', 'coalesced')
+            result = await asyncio.shield(task)
+            return ApiResponse(copy.deepcopy(result.data), result.status)
 
-    async def post_answer_by_question_id(self, candidate_id: int, question_id: uuid, answer: str, time_taken: int) -> \
-            (Optional[Dict[str, Any]], int):
+        return await self._fetch_questions(key, self._questions_epoch)
+
+    async def _fetch_questions(self, vacancy_id: str, epoch: int) -> ApiResponse:
+        """Загрузка вопросов; epoch - счетчик сбросов на момент запроса"""
+        result = await self._make_request('GET', f'/api/v1/questions/{vacancy_id}', name='get_questions')
+        if result.status == 200 and result.data and epoch == self._questions_epoch:
+            self._questions_cache.set(vacancy_id, copy.deepcopy(result.data))
+        return result
+
+    def prefetch_questions(self, vacancy_id: uuid):
+        """Фоновая загрузка вопросов вакансии в кэш (если их там еще нет)"""
+        key = str(vacancy_id)
+        if key in self._questions_cache or key in self._questions_prefetch:
+            return
+
+        task = asyncio.create_task(self._fetch_questions(key, self._questions_epoch))
+        self._questions_prefetch[key] = task
+        task.add_done_callback(lambda done: self._finish_prefetch(key, done))
+
+    def _finish_prefetch(self, key: str, task: asyncio.Task):
+        if self._questions_prefetch.get(key) is task:
+            del self._questions_prefetch[key]
+
+    def invalidate_questions(self, vacancy_id: Optional[uuid] = None):
+        """
+        Сброс кэша вопросов одной вакансии или всех вакансий (вопросы изменились на бэкенде)
+
+        Идущая предзагрузка снимается: новые запросы к ней не присоединяются,
+        а ее ответ, полученный после сброса, не возвращается в кэш.
+        """
+        self._questions_epoch += 1
+        if vacancy_id is None:
+            self._questions_cache.clear()
+            self._questions_prefetch.clear()
+        else:
+            self._questions_cache.invalidate(str(vacancy_id))
+            self._questions_prefetch.pop(str(vacancy_id), None)
+
+    async def post_answer_by_question_id(self, candidate_id: int, question_id: uuid, answer: str,
+                                         time_taken: int, idempotency_key: Optional[str] = None) -> ApiResponse:
+        """
+        Ответ на вопрос
+
+        Args:
+            idempotency_key: Ключ повторной отправки: бэкенд не сохранит ответ дважды,
+                если первая попытка дошла, но ответ на нее потерялся
+        """
         api_data = {
             'candidate_id': candidate_id,
             'question_id': question_id,
             'content': answer,
             'time_taken': time_taken,
         }
-        return await self._make_request('POST', f'/api/v1/answer', api_data)
+        headers = {IDEMPOTENCY_HEADER: idempotency_key} if idempotency_key else None
+        return await self._make_request('POST', f'/api/v1/answer', api_data, name='post_answer', headers=headers)
 
-    async def post_update_status(self, candidate_id: int, vacancy_id: uuid) -> (Optional[Dict[str, Any]], int):
+    async def post_update_status(self, candidate_id: int, vacancy_id: uuid) -> ApiResponse:
         api_data = {
             'candidate_id': candidate_id,
             'vacancy_id': vacancy_id,
         }
-        return await self._make_request('POST', f'/api/v1/interview/process', api_data)
+        return await self._make_request('POST', f'/api/v1/interview/process', api_data, name='post_update_status',
+                                        affects=(_meta_endpoint(candidate_id, vacancy_id),))
 
     # ==================== СТАТУСЫ И УВЕДОМЛЕНИЯ ====================
 
-    async def get_screening_status(self, candidate_id: int, vacancy_id: uuid) -> (Optional[Dict[str, Any]], int):
-        return await self._make_request('GET', f'/api/v1/meta/{candidate_id}/{vacancy_id}')
+    async def get_screening_status(self, candidate_id: int, vacancy_id: uuid, fresh: bool = False) -> ApiResponse:
+        """
+        Статус кандидата по вакансии
+
+        Args:
+            fresh: Не присоединяться к уже идущему запросу (чтение сразу после своей записи)
+        """
+        return await self._make_request('GET', _meta_endpoint(candidate_id, vacancy_id),
+                                        name='get_screening_status', coalesce=not fresh)
+
+
+def _meta_endpoint(candidate_id: int, vacancy_id: uuid) -> str:
+    return f'/api/v1/meta/{candidate_id}/{vacancy_id}'
 
 
 # Синглтон экземпляр клиента
@@ -0,0 +1,117 @@
+"""
+Микробенчмарк подготовки ответа: f-строка и новая клавиатура против каталога сообщений
+
+Измеряется работа бота до отправки запроса: текст ответа, клавиатура и тело запроса
+sendMessage (AiohttpSession.build_form_data). Сеть не участвует.
+
+Запуск:
+    python -m bench.catalog --iterations 20000
+"""
+import argparse
+import asyncio
+import time
+
+import bench.common  # noqa: F401 (путь к модулям бота и окружение)
+
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.enums import ParseMode
+from aiogram.methods import SendMessage
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from keyboards import get_ready_for_interview_keyboard, get_quick_questions_keyboard
+from messages import CatalogSession, messages
+
+
+def legacy_quick_questions() -> InlineKeyboardMarkup:
+    """Клавиатура, как ее строили до каталога - заново на каждый ответ"""
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="📊 Какой мой статус?", callback_data="q_status")],
+            [InlineKeyboardButton(text="⏰ Когда ждать ответа?", callback_data="q_timing")],
+            [InlineKeyboardButton(text="📞 Как с вами связаться?", callback_data="q_contact")],
+            [InlineKeyboardButton(text="❌ Закрыть", callback_data="q_close")]
+        ]
+    )
+
+
+def legacy_ready_for_interview() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="Готов пройти интервью", callback_data="start_interview")],
+            [InlineKeyboardButton(text="Пока не готов", callback_data="not_ready")]
+        ]
+    )
+
+
+def legacy_question(number: int, total: int, content: str, time_limit: int) -> str:
+    return (
+        f"❓ <b>Вопрос {number} из {total}:</b>\n\n"
+        f"{content}\n\n"
+        f"⏱ Обратите внимание! У вас {time_limit} секунд на ответ."
+    )
+
+
+def legacy_invitation(questions: int) -> str:
+    return (
+        f"Приглашаем на интервью!\n"
+        f"Вопросов: {questions}\n"
+        f"Время на каждый вопрос будет ограничено."
+    )
+
+
+# Сценарии: (название, ответ по-старому, ответ через каталог); ответ - (текст, клавиатура)
+SCENARIOS = (
+    (
+        'question (text only)',
+        lambda i: (legacy_question(i % 5 + 1, 5, 'Расскажите о своем опыте', 60), None),
+        lambda i: (messages('interview.question', number=i % 5 + 1, total=5,
+                            content='Расскажите о своем опыте', time_limit=60), None),
+    ),
+    (
+        'invitation + keyboard',
+        lambda i: (legacy_invitation(5), legacy_ready_for_interview()),
+        lambda i: (messages('screening.invitation', questions=5), get_ready_for_interview_keyboard()),
+    ),
+    (
+        'faq menu + keyboard',
+        lambda i: ("❓ <b>Часто задаваемые вопросы</b>\n\n"
+                   "Выберите интересующий вас вопрос:", legacy_quick_questions()),
+        lambda i: (messages('faq.menu'), get_quick_questions_keyboard()),
+    ),
+)
+
+
+def measure(bot: Bot, session: AiohttpSession, build, iterations: int) -> float:
+    """Среднее время подготовки одного запроса, мкс"""
+    started = time.perf_counter()
+    for i in range(iterations):
+        text, markup = build(i)
+        session.build_form_data(bot, SendMessage(chat_id=i, text=text, reply_markup=markup))
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20000, help='Запросов на сценарий')
+    args = parser.parse_args()
+
+    legacy_session, catalog_session = AiohttpSession(), CatalogSession()
+    bot = Bot('123456:BENCH', default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+
+    for name, legacy, catalog in SCENARIOS:
+        # Прогрев: первая отправка сериализует клавиатуру каталога
+        measure(bot, legacy_session, legacy, 100)
+        measure(bot, catalog_session, catalog, 100)
+        before = measure(bot, legacy_session, legacy, args.iterations)
+        after = measure(bot, catalog_session, catalog, args.iterations)
+        print(f"{name:<24} legacy {before:>7.2f} us   catalog {after:>7.2f} us   x{before / after:.2f}")
+
+    await bot.session.close()
+    await legacy_session.close()
+    await catalog_session.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""
+Общие функции для бенчмарков
+"""
+import math
+import os
+import sys
+from typing import Dict, List, Tuple
+
+from aiohttp import web
+
+# Бенчмарки импортируют модули бота из корня репозитория
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+# Окружение по умолчанию, чтобы модули бота импортировались без .env
+os.environ.setdefault('BOT_TOKEN', '123456:BENCH-TOKEN')
+os.environ.setdefault('BACKEND_BASE_URL', 'http://127.0.0.1:1')
+
+
+async def start_app(app: web.Application, host: str = '127.0.0.1', port: int = 0) -> Tuple[web.AppRunner, str]:
+    """
+    Запуск aiohttp-приложения заглушки
+
+    Returns:
+        runner (для остановки) и базовый URL (порт выбирается свободный, если port=0)
+    """
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    actual_port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://{host}:{actual_port}'
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Перцентиль q (0..100) методом ближайшего ранга"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], duration: float) -> Dict[str, float]:
+    """Пропускная способность и перцентили задержки (мс)"""
+    return {
+        'count': len(latencies),
+        'throughput_per_s': len(latencies) / duration if duration > 0 else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': max(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+def format_row(name: str, stats: Dict[str, float]) -> str:
+    """Строка отчета"""
+    return (
+        f"{name:<24} n={stats['count']:<6} {stats['throughput_per_s']:>9.1f}/s  "
+        f"p50={stats['p50_ms']:>8.2f}ms  p95={stats['p95_ms']:>8.2f}ms  "
+        f"p99={stats['p99_ms']:>8.2f}ms  max={stats['max_ms']:>8.2f}ms"
+    )
+
+
+def make_pdf(pages: int = 1, padding: int = 0) -> bytes:
+    """
+    Минимальный корректный PDF (с таблицей xref) для тестов приема резюме
+
+    Args:
+        pages: Число страниц
+        padding: Размер дополнительного потока данных, байт (чтобы получить файл нужного размера)
+    """
+    page_ids = [4 + i for i in range(pages)]
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [' + b' '.join(b'%d 0 R' % i for i in page_ids) + b'] /Count %d >>' % pages,
+        b'<< /Length %d >>\nstream\n' % padding + b'0' * padding + b'\nendstream',
+    ]
+    objects += [b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] >>'] * pages
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
@@ -0,0 +1,136 @@
+"""
+Локальная заглушка Go-бэкенда для нагрузочных тестов
+
+Реализует все маршруты /api/v1, которые использует BackendClient, с настраиваемой задержкой.
+Скрининг считается завершенным через screening_time секунд после запуска.
+"""
+import asyncio
+import itertools
+import random
+import time
+from collections import defaultdict
+from typing import Any, Dict, Tuple
+
+from aiohttp import web
+
+from bench.common import start_app
+
+
+class FakeBackend:
+    """Заглушка бэкенда: кандидаты, скрининг, вопросы и ответы в памяти"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.5, screening_time: float = 0.5,
+                 questions: int = 3, time_limit: int = 60, pass_screening: bool = True):
+        """
+        Args:
+            latency: Средняя задержка ответа, сек
+            jitter: Разброс задержки (доля от latency, равномерно)
+            screening_time: Время скрининга резюме, сек
+            questions: Число вопросов интервью
+            time_limit: Время на вопрос, сек
+            pass_screening: Результат скрининга
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.screening_time = screening_time
+        self.time_limit = time_limit
+        self.pass_screening = pass_screening
+        self.questions = [
+            {'id': f'q{i + 1}', 'content': f'Вопрос {i + 1}: расскажите о своем опыте', 'time_limit': time_limit}
+            for i in range(questions)
+        ]
+        self.candidates: Dict[int, Dict[str, Any]] = {}
+        self.candidates_by_tg: Dict[int, Dict[str, Any]] = {}
+        self.answers: Dict[int, list] = defaultdict(list)
+        # Idempotency-Key принятых ответов: повтор не сохраняется второй раз
+        self.answer_keys: set = set()
+        # (candidate_id, vacancy_id) -> {'status': ..., 'started': ...}
+        self.meta: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        self.calls: Dict[str, int] = defaultdict(int)
+        self._ids = itertools.count(1)
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/api/v1/candidates/by-tg-id/{tg_id}', self._get_candidate)
+        app.router.add_post('/api/v1/candidate', self._create_candidate)
+        app.router.add_post('/api/v1/screening/process', self._process_screening)
+        app.router.add_get('/api/v1/meta/{candidate_id}/{vacancy_id}', self._get_meta)
+        app.router.add_get('/api/v1/questions/{vacancy_id}', self._get_questions)
+        app.router.add_post('/api/v1/answer', self._post_answer)
+        app.router.add_post('/api/v1/interview/process', self._process_interview)
+        return app
+
+    async def _delay(self, route: str):
+        self.calls[route] += 1
+        if self.latency:
+            spread = self.latency * self.jitter
+            await asyncio.sleep(max(0.0, self.latency + random.uniform(-spread, spread)))
+
+    # ==================== МАРШРУТЫ ====================
+
+    async def _get_candidate(self, request: web.Request) -> web.Response:
+        await self._delay('get_candidate')
+        candidate = self.candidates_by_tg.get(int(request.match_info['tg_id']))
+        if candidate is None:
+            return web.json_response({'error': 'not found'}, status=404)
+        return web.json_response(candidate)
+
+    async def _create_candidate(self, request: web.Request) -> web.Response:
+        await self._delay('create_candidate')
+        data = await request.json()
+        candidate = {**data, 'id': next(self._ids)}
+        self.candidates[candidate['id']] = candidate
+        self.candidates_by_tg[data['telegram_id']] = candidate
+        return web.json_response(candidate, status=201)
+
+    async def _process_screening(self, request: web.Request) -> web.Response:
+        await self._delay('process_screening')
+        data = await request.json()
+        self.meta[(data['candidate_id'], str(data['vacancy_id']))] = {
+            'status': 'screening_in_progress', 'started': time.monotonic(),
+        }
+        return web.json_response({})
+
+    async def _get_meta(self, request: web.Request) -> web.Response:
+        await self._delay('get_meta')
+        key = (int(request.match_info['candidate_id']), request.match_info['vacancy_id'])
+        meta = self.meta.get(key)
+        if meta is None:
+            return web.json_response({'error': 'not found'}, status=404)
+        if meta['status'] == 'screening_in_progress' and time.monotonic() - meta['started'] >= self.screening_time:
+            meta['status'] = 'screening_ok' if self.pass_screening else 'screening_failed'
+        return web.json_response({'status': meta['status']})
+
+    async def _get_questions(self, request: web.Request) -> web.Response:
+        await self._delay('get_questions')
+        return web.json_response(self.questions)
+
+    async def _post_answer(self, request: web.Request) -> web.Response:
+        await self._delay('post_answer')
+        data = await request.json()
+        key = request.headers.get('Idempotency-Key')
+        if key is not None and key in self.answer_keys:
+            return web.json_response({}, status=200)
+        if key is not None:
+            self.answer_keys.add(key)
+        self.answers[data['candidate_id']].append(data)
+        return web.json_response({}, status=201)
+
+    async def _process_interview(self, request: web.Request) -> web.Response:
+        await self._delay('process_interview')
+        data = await request.json()
+        meta = self.meta.setdefault((data['candidate_id'], str(data['vacancy_id'])), {'started': time.monotonic()})
+        meta['status'] = 'interview_ok'
+        return web.json_response({})
+
+
+async def start_fake_backend(host: str = '127.0.0.1', port: int = 0, **kwargs) -> (FakeBackend, web.AppRunner, str):
+    """
+    Запуск заглушки на свободном порту
+
+    Returns:
+        Заглушка, runner (для остановки) и базовый URL для BACKEND_BASE_URL
+    """
+    fake = FakeBackend(**kwargs)
+    runner, url = await start_app(fake.create_app(), host, port)
+    return fake, runner, url
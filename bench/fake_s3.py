@@ -0,0 +1,201 @@
+"""
+Локальная заглушка S3 для нагрузочных тестов (path-style адресация)
+
+Поддерживает операции, которые использует бот: HeadBucket, ListObjectsV2, PutObject, CopyObject,
+GetObject, HeadObject, DeleteObject и DeleteObjects. Объекты хранятся в памяти.
+"""
+import asyncio
+import hashlib
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+from urllib.parse import unquote
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+from aiohttp import web
+
+from bench.common import start_app
+
+_XMLNS = 'http://s3.amazonaws.com/doc/2006-03-01/'
+
+
+def _xml(body: str, status: int = 200) -> web.Response:
+    return web.Response(
+        status=status, content_type='application/xml',
+        text=f'<?xml version="1.0" encoding="UTF-8"?>\n{body}',
+    )
+
+
+def _error(code: str, message: str, status: int) -> web.Response:
+    return _xml(f'<Error><Code>{code}</Code><Message>{escape(message)}</Message></Error>', status)
+
+
+def _decode_aws_chunked(body: bytes) -> bytes:
+    """Тело в кодировке aws-chunked (используется botocore для контрольных сумм в трейлере)"""
+    data = bytearray()
+    position = 0
+    while True:
+        line_end = body.index(b'\r\n', position)
+        size = int(body[position:line_end].split(b';')[0], 16)
+        position = line_end + 2
+        if size == 0:
+            return bytes(data)
+        data += body[position:position + size]
+        position += size + 2
+
+
+class FakeS3:
+    """Заглушка объектного хранилища"""
+
+    def __init__(self, latency: float = 0.0):
+        """
+        Args:
+            latency: Искусственная задержка каждого запроса, сек
+        """
+        self.latency = latency
+        # False - хранилище недоступно, все запросы получают 503 (проверка очереди резюме на диске)
+        self.available = True
+        self.buckets: Dict[str, Dict[str, dict]] = defaultdict(dict)
+        self.calls: Dict[str, int] = defaultdict(int)
+
+    def create_app(self) -> web.Application:
+        app = web.Application(client_max_size=100 * 1024 * 1024, middlewares=[self._availability])
+        app.router.add_route('*', '/{bucket}', self._handle_bucket)
+        app.router.add_route('*', '/{bucket}/{key:.+}', self._handle_object)
+        return app
+
+    @web.middleware
+    async def _availability(self, request: web.Request, handler):
+        if not self.available:
+            self.calls['Unavailable'] += 1
+            return _error('ServiceUnavailable', 'Storage is unavailable', 503)
+        return await handler(request)
+
+    def put(self, bucket: str, key: str, body: bytes, metadata: Optional[Dict[str, str]] = None):
+        """Положить объект напрямую (для подготовки данных теста)"""
+        self.buckets[bucket][key] = {
+            'body': body, 'etag': hashlib.md5(body).hexdigest(),
+            'modified': time.time(), 'metadata': metadata or {},
+        }
+
+    async def _body(self, request: web.Request) -> bytes:
+        body = await request.read()
+        if 'aws-chunked' in request.headers.get('Content-Encoding', '') or \
+                request.headers.get('x-amz-content-sha256', '').startswith('STREAMING-'):
+            body = _decode_aws_chunked(body)
+        return body
+
+    async def _delay(self, operation: str):
+        self.calls[operation] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    # ==================== БАКЕТ ====================
+
+    async def _handle_bucket(self, request: web.Request) -> web.Response:
+        bucket = request.match_info['bucket']
+        if request.method == 'HEAD':
+            await self._delay('HeadBucket')
+            return web.Response()
+        if request.method == 'GET':
+            await self._delay('ListObjectsV2')
+            return self._list(bucket, request.query)
+        if request.method == 'POST' and 'delete' in request.query:
+            await self._delay('DeleteObjects')
+            return self._delete_objects(bucket, await self._body(request))
+        return _error('NotImplemented', f'{request.method} on bucket', 501)
+
+    def _list(self, bucket: str, query) -> web.Response:
+        prefix = query.get('prefix', '')
+        max_keys = int(query.get('max-keys', 1000))
+        start_after = query.get('continuation-token') or query.get('start-after') or ''
+        keys = sorted(key for key in self.buckets[bucket] if key.startswith(prefix) and key > start_after)
+        page, truncated = keys[:max_keys], len(keys) > max_keys
+
+        contents = ''.join(
+            f'<Contents><Key>{escape(key)}</Key>'
+            f'<LastModified>{time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(obj["modified"]))}</LastModified>'
+            f'<ETag>"{obj["etag"]}"</ETag><Size>{len(obj["body"])}</Size>'
+            f'<StorageClass>STANDARD</StorageClass></Contents>'
+            for key, obj in ((key, self.buckets[bucket][key]) for key in page)
+        )
+        token = f'<NextContinuationToken>{escape(page[-1])}</NextContinuationToken>' if truncated else ''
+        return _xml(
+            f'<ListBucketResult xmlns="{_XMLNS}"><Name>{escape(bucket)}</Name><Prefix>{escape(prefix)}</Prefix>'
+            f'<KeyCount>{len(page)}</KeyCount><MaxKeys>{max_keys}</MaxKeys>'
+            f'<IsTruncated>{"true" if truncated else "false"}</IsTruncated>{token}{contents}</ListBucketResult>'
+        )
+
+    def _delete_objects(self, bucket: str, body: bytes) -> web.Response:
+        root = ElementTree.fromstring(body)
+        keys = [element.text or '' for element in root.iter() if element.tag.rsplit('}', 1)[-1] == 'Key']
+        if len(keys) > 1000:
+            return _error('MalformedXML', 'Too many keys', 400)
+        quiet = any(element.tag.rsplit('}', 1)[-1] == 'Quiet' and element.text == 'true' for element in root.iter())
+        deleted = ''
+        for key in keys:
+            self.buckets[bucket].pop(key, None)
+            if not quiet:
+                deleted += f'<Deleted><Key>{escape(key)}</Key></Deleted>'
+        return _xml(f'<DeleteResult xmlns="{_XMLNS}">{deleted}</DeleteResult>')
+
+    # ==================== ОБЪЕКТЫ ====================
+
+    async def _handle_object(self, request: web.Request) -> web.Response:
+        bucket, key = request.match_info['bucket'], request.match_info['key']
+        objects = self.buckets[bucket]
+
+        if request.method == 'PUT' and 'x-amz-copy-source' in request.headers:
+            await self._delay('CopyObject')
+            source_bucket, _, source_key = unquote(request.headers['x-amz-copy-source']).lstrip('/').partition('/')
+            source = self.buckets[source_bucket].get(source_key.split('?versionId=')[0])
+            if source is None:
+                return _error('NoSuchKey', 'Copy source not found', 404)
+            self.put(bucket, key, source['body'], dict(source['metadata']))
+            return _xml(
+                f'<CopyObjectResult><LastModified>'
+                f'{time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(objects[key]["modified"]))}</LastModified>'
+                f'<ETag>"{objects[key]["etag"]}"</ETag></CopyObjectResult>'
+            )
+
+        if request.method == 'PUT':
+            await self._delay('PutObject')
+            metadata = {name[len('x-amz-meta-'):]: value for name, value in request.headers.items()
+                        if name.lower().startswith('x-amz-meta-')}
+            self.put(bucket, key, await self._body(request), metadata)
+            return web.Response(headers={'ETag': f'"{objects[key]["etag"]}"'})
+
+        obj = objects.get(key)
+        if request.method in ('GET', 'HEAD'):
+            await self._delay('GetObject' if request.method == 'GET' else 'HeadObject')
+            if obj is None:
+                return _error('NoSuchKey', 'Key not found', 404) if request.method == 'GET' \
+                    else web.Response(status=404)
+            headers = {
+                'ETag': f'"{obj["etag"]}"',
+                'Last-Modified': time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(obj['modified'])),
+                **{f'x-amz-meta-{name}': value for name, value in obj['metadata'].items()},
+            }
+            if request.method == 'HEAD':
+                return web.Response(headers={**headers, 'Content-Length': str(len(obj['body']))})
+            return web.Response(body=obj['body'], headers=headers)
+
+        if request.method == 'DELETE':
+            await self._delay('DeleteObject')
+            objects.pop(key, None)
+            return web.Response(status=204)
+
+        return _error('NotImplemented', f'{request.method} on object', 501)
+
+
+async def start_fake_s3(host: str = '127.0.0.1', port: int = 0, **kwargs) -> (FakeS3, web.AppRunner, str):
+    """
+    Запуск заглушки на свободном порту
+
+    Returns:
+        Заглушка, runner (для остановки) и URL для YC_ENDPOINT_URL
+    """
+    fake = FakeS3(**kwargs)
+    runner, url = await start_app(fake.create_app(), host, port)
+    return fake, runner, url
@@ -0,0 +1,198 @@
+"""
+Локальная заглушка Telegram Bot API для нагрузочных тестов
+
+Поддерживает методы, которые использует бот: getUpdates (long polling),
+отправку и редактирование сообщений, getFile и скачивание файлов.
+"""
+import asyncio
+import itertools
+import json
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+from aiohttp import web
+
+from bench.common import start_app
+
+BOT_USER = {'id': 1000000001, 'is_bot': True, 'first_name': 'HR Bot', 'username': 'hr_test_bot'}
+
+
+class FakeTelegram:
+    """Заглушка Bot API: очередь входящих обновлений и журнал исходящих сообщений"""
+
+    def __init__(self, send_latency: float = 0.0):
+        """
+        Args:
+            send_latency: Искусственная задержка ответа на методы отправки, сек
+        """
+        self.send_latency = send_latency
+        self.updates: asyncio.Queue = asyncio.Queue()
+        self.files: Dict[str, bytes] = {}
+        self.sent: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        self.method_calls: Dict[str, int] = defaultdict(int)
+        self.webhook_url: Optional[str] = None
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._waiters: Dict[int, List[asyncio.Future]] = defaultdict(list)
+
+    # ==================== ВХОДЯЩИЕ ОБНОВЛЕНИЯ ====================
+
+    def push_update(self, update: Dict[str, Any]) -> Dict[str, Any]:
+        """Поставить обновление в очередь getUpdates"""
+        update.setdefault('update_id', next(self._update_ids))
+        self.updates.put_nowait(update)
+        return update
+
+    def make_update(self, **payload) -> Dict[str, Any]:
+        """Обновление с новым update_id"""
+        return {'update_id': next(self._update_ids), **payload}
+
+    def message_update(self, user_id: int, text: str) -> Dict[str, Any]:
+        return self.make_update(message=self._message(user_id, text=text))
+
+    def document_update(self, user_id: int, file_id: str, file_name: str, file_size: int) -> Dict[str, Any]:
+        document = {'file_id': file_id, 'file_unique_id': file_id, 'file_name': file_name, 'file_size': file_size}
+        return self.make_update(message=self._message(user_id, document=document))
+
+    def callback_update(self, user_id: int, data: str, message_id: int = 1) -> Dict[str, Any]:
+        message = {
+            'message_id': message_id, 'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'}, 'from': BOT_USER, 'text': '...',
+        }
+        return self.make_update(callback_query={
+            'id': str(next(self._update_ids)), 'from': self._user(user_id),
+            'chat_instance': str(user_id), 'data': data, 'message': message,
+        })
+
+    def add_file(self, file_id: str, content: bytes):
+        """Файл, доступный через getFile и скачивание"""
+        self.files[file_id] = content
+
+    @staticmethod
+    def _user(user_id: int) -> Dict[str, Any]:
+        return {'id': user_id, 'is_bot': False, 'first_name': f'User{user_id}', 'username': f'user{user_id}'}
+
+    def _message(self, user_id: int, **content) -> Dict[str, Any]:
+        return {
+            'message_id': next(self._message_ids), 'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'}, 'from': self._user(user_id), **content,
+        }
+
+    # ==================== ИСХОДЯЩИЕ СООБЩЕНИЯ ====================
+
+    async def wait_for_message(self, chat_id: int, predicate: Callable[[Dict], bool] = lambda m: True,
+                               timeout: float = 30, start: int = 0) -> Dict[str, Any]:
+        """Дождаться сообщения бота в чат, начиная с позиции start в журнале чата"""
+        deadline = time.monotonic() + timeout
+        position = start
+        while True:
+            messages = self.sent[chat_id]
+            for message in messages[position:]:
+                if predicate(message):
+                    return message
+            position = len(messages)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError(f"No matching message for chat {chat_id}")
+            future = asyncio.get_running_loop().create_future()
+            self._waiters[chat_id].append(future)
+            try:
+                await asyncio.wait_for(future, remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    def _record(self, chat_id: int, message: Dict[str, Any]):
+        message['received_at'] = time.perf_counter()
+        self.sent[chat_id].append(message)
+        for future in self._waiters.pop(chat_id, []):
+            if not future.done():
+                future.set_result(None)
+
+    # ==================== HTTP ====================
+
+    def create_app(self) -> web.Application:
+        app = web.Application(client_max_size=50 * 1024 * 1024)
+        app.router.add_post('/bot{token}/{method}', self._handle_method)
+        app.router.add_get('/file/bot{token}/{path:.*}', self._handle_file)
+        return app
+
+    async def _handle_method(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        self.method_calls[method] += 1
+        params = dict(await request.post())
+        handler = getattr(self, f'_m_{method.lower()}', None)
+        if handler is None:
+            return web.json_response({'ok': True, 'result': True})
+        result = await handler(params)
+        return web.json_response({'ok': True, 'result': result})
+
+    async def _handle_file(self, request: web.Request) -> web.Response:
+        content = self.files.get(request.match_info['path'])
+        if content is None:
+            return web.Response(status=404)
+        return web.Response(body=content)
+
+    async def _m_getme(self, params):
+        return BOT_USER
+
+    async def _m_getupdates(self, params):
+        timeout = float(params.get('timeout') or 0)
+        updates = []
+        try:
+            updates.append(await asyncio.wait_for(self.updates.get(), timeout) if timeout else
+                           self.updates.get_nowait())
+        except (asyncio.TimeoutError, asyncio.QueueEmpty):
+            return []
+        while not self.updates.empty() and len(updates) < 100:
+            updates.append(self.updates.get_nowait())
+        return updates
+
+    async def _m_setwebhook(self, params):
+        self.webhook_url = params.get('url')
+        return True
+
+    async def _m_deletewebhook(self, params):
+        self.webhook_url = None
+        return True
+
+    async def _m_sendmessage(self, params):
+        if self.send_latency:
+            await asyncio.sleep(self.send_latency)
+        chat_id = int(params['chat_id'])
+        message = {
+            'message_id': next(self._message_ids), 'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'}, 'from': BOT_USER, 'text': params.get('text', ''),
+        }
+        if params.get('reply_markup'):
+            message['reply_markup'] = json.loads(params['reply_markup'])
+        self._record(chat_id, dict(message))
+        return message
+
+    async def _m_editmessagetext(self, params):
+        chat_id = int(params['chat_id'])
+        message = {
+            'message_id': int(params.get('message_id') or 0), 'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'}, 'from': BOT_USER, 'text': params.get('text', ''),
+        }
+        self._record(chat_id, dict(message, edited=True))
+        return message
+
+    async def _m_getfile(self, params):
+        file_id = params['file_id']
+        return {
+            'file_id': file_id, 'file_unique_id': file_id,
+            'file_size': len(self.files.get(file_id, b'')), 'file_path': file_id,
+        }
+
+
+async def start_fake_telegram(host: str = '127.0.0.1', port: int = 0, **kwargs) -> (FakeTelegram, web.AppRunner, str):
+    """
+    Запуск заглушки на свободном порту
+
+    Returns:
+        Заглушка, runner (для остановки) и базовый URL для TelegramAPIServer.from_base
+    """
+    fake = FakeTelegram(**kwargs)
+    runner, url = await start_app(fake.create_app(), host, port)
+    return fake, runner, url
@@ -0,0 +1,175 @@
+"""
+Сквозной нагрузочный тест: N кандидатов проходят воронку /start → регистрация → резюме → интервью
+
+Бот запускается в этом процессе в режиме long polling. Заглушки Telegram Bot API, бэкенда и S3
+работают в отдельном потоке со своим event loop, чтобы не отнимать время у бота.
+Задержка этапа - время от действия кандидата до ответа бота, которого кандидат ждет.
+
+Запуск:
+    python -m bench.load_test --candidates 200 --concurrency 100 --backend-latency 0.02
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from collections import defaultdict
+from functools import partial
+from typing import Dict, List
+
+from bench.common import format_row, make_pdf, summarize
+from bench.fake_backend import FakeBackend
+from bench.fake_s3 import FakeS3
+from bench.fake_telegram import FakeTelegram
+from bench.stand_ins import StandIns, configure_environment
+
+VACANCY_ID = '3f1c2a9e-0000-4000-8000-000000000001'
+# Этапы воронки в порядке прохождения
+STAGES = ('start', 'name', 'phone', 'registration', 'resume_upload', 'screening',
+          'interview_start', 'answer', 'interview_result', 'funnel_total')
+
+
+class Candidate:
+    """Сценарий одного кандидата (выполняется в потоке заглушек)"""
+
+    def __init__(self, stand_ins: StandIns, user_id: int, args, latencies: Dict[str, List[float]]):
+        self.fake = stand_ins.telegram
+        self.user_id = user_id
+        self.args = args
+        self.latencies = latencies
+
+    async def _step(self, stage: str, update: dict, expected: str) -> dict:
+        """Отправить обновление и дождаться сообщения бота, содержащего expected"""
+        position = len(self.fake.sent[self.user_id])
+        started = time.perf_counter()
+        self.fake.push_update(update)
+        message = await self._wait(expected, position)
+        self.latencies[stage].append(time.perf_counter() - started)
+        return message
+
+    async def _wait(self, expected: str, position: int) -> dict:
+        return await self.fake.wait_for_message(
+            self.user_id, lambda m: expected in m.get('text', ''), timeout=self.args.timeout, start=position,
+        )
+
+    async def _think(self):
+        if self.args.think_time:
+            await asyncio.sleep(random.uniform(0, 2 * self.args.think_time))
+
+    async def run(self):
+        fake, uid = self.fake, self.user_id
+        funnel_started = time.perf_counter()
+
+        await self._step('start', fake.message_update(uid, f'/start {VACANCY_ID}'), 'ФИО')
+        await self._think()
+        await self._step('name', fake.message_update(uid, f'Кандидат {uid}'), 'номер телефона')
+        await self._think()
+        await self._step('phone', fake.message_update(uid, '+79991234567'), 'город')
+        await self._think()
+        await self._step('registration', fake.message_update(uid, 'Москва'), 'резюме')
+        await self._think()
+
+        file_id = f'resume-{uid}'
+        fake.add_file(file_id, make_pdf(pages=2, padding=self.args.resume_size))
+        position = len(fake.sent[uid])
+        await self._step('resume_upload', fake.document_update(uid, file_id, 'resume.pdf',
+                                                               len(fake.files[file_id])), 'Проверяем')
+        started = time.perf_counter()
+        await self._wait('Приглашаем на интервью', position)
+        self.latencies['screening'].append(time.perf_counter() - started)
+        await self._think()
+
+        await self._step('interview_start', fake.callback_update(uid, 'start_interview'), 'Вопрос 1 ')
+        for number in range(2, self.args.questions + 1):
+            await self._think()
+            await self._step('answer', fake.message_update(uid, f'Ответ кандидата {uid}'), f'Вопрос {number} ')
+        await self._think()
+        position = len(fake.sent[uid])
+        await self._step('answer', fake.message_update(uid, 'Последний ответ'), 'Интервью завершено')
+        started = time.perf_counter()
+        await self._wait('Поздравляем', position)
+        self.latencies['interview_result'].append(time.perf_counter() - started)
+
+        self.latencies['funnel_total'].append(time.perf_counter() - funnel_started)
+
+
+async def drive(stand_ins: StandIns, args) -> (Dict[str, List[float]], int, float):
+    """Прогнать кандидатов, не больше concurrency одновременно (выполняется в потоке заглушек)"""
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    failed = 0
+
+    async def one(index: int):
+        nonlocal failed
+        async with semaphore:
+            try:
+                await Candidate(stand_ins, 100000 + index, args, latencies).run()
+            except asyncio.TimeoutError as e:
+                failed += 1
+                print(f"candidate {index}: {e}")
+
+    started = time.perf_counter()
+    tasks = []
+    for index in range(args.candidates):
+        tasks.append(asyncio.create_task(one(index)))
+        if args.arrival_rate:
+            await asyncio.sleep(1 / args.arrival_rate)
+    await asyncio.gather(*tasks)
+    return latencies, failed, time.perf_counter() - started
+
+
+async def run(args):
+    stand_ins = StandIns(
+        telegram=partial(FakeTelegram, send_latency=args.telegram_latency),
+        backend=partial(FakeBackend, latency=args.backend_latency, screening_time=args.screening_time,
+                        questions=args.questions, time_limit=args.time_limit),
+        s3=partial(FakeS3, latency=args.s3_latency),
+    )
+    stand_ins.start()
+    data_dir = tempfile.mkdtemp(prefix='hr-bot-load-')
+    configure_environment(stand_ins, data_dir)
+
+    # Модули бота читают окружение при импорте
+    from main import bot_services, create_bot, create_dispatcher
+
+    bot = create_bot()
+    dp = create_dispatcher()
+    async with bot_services(bot, dp):
+        polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False, polling_timeout=10))
+        try:
+            latencies, failed, duration = await asyncio.wrap_future(stand_ins.run(drive(stand_ins, args)))
+        finally:
+            await dp.stop_polling()
+            await polling
+
+    stand_ins.stop()
+
+    print(f"\ncandidates={args.candidates} concurrency={args.concurrency} failed={failed} "
+          f"duration={duration:.1f}s funnel throughput={(args.candidates - failed) / duration:.2f} candidates/s")
+    for stage in STAGES:
+        if latencies.get(stage):
+            print(format_row(stage, summarize(latencies[stage], duration)))
+    print(f"backend calls: {dict(stand_ins.backend.calls)}")
+    print(f"s3 calls: {dict(stand_ins.s3.calls)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--candidates', type=int, default=100, help='Число кандидатов')
+    parser.add_argument('--concurrency', type=int, default=50, help='Одновременно проходящих воронку')
+    parser.add_argument('--arrival-rate', type=float, default=0, help='Новых кандидатов в секунду (0 - сразу все)')
+    parser.add_argument('--think-time', type=float, default=0, help='Средняя пауза кандидата между шагами, сек')
+    parser.add_argument('--questions', type=int, default=3, help='Вопросов в интервью')
+    parser.add_argument('--time-limit', type=int, default=60, help='Время на вопрос, сек')
+    parser.add_argument('--backend-latency', type=float, default=0.01, help='Задержка бэкенда, сек')
+    parser.add_argument('--telegram-latency', type=float, default=0.0, help='Задержка отправки в Telegram, сек')
+    parser.add_argument('--s3-latency', type=float, default=0.0, help='Задержка S3, сек')
+    parser.add_argument('--screening-time', type=float, default=0.5, help='Длительность скрининга, сек')
+    parser.add_argument('--resume-size', type=int, default=200 * 1024, help='Размер резюме, байт')
+    parser.add_argument('--timeout', type=float, default=60, help='Ожидание ответа бота, сек')
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+"""
+Воспроизведение записанного трафика (RECORD_UPDATES_PATH) через Dispatcher с ускорением 1x-100x
+
+Обновления подаются в dp.feed_update с исходными интервалами, деленными на --speed.
+Бэкенд отвечает записанными ответами с записанной задержкой (маршруты без записи обслуживает
+обычная заглушка), время на вопрос интервью сокращается в --speed раз, чтобы таймауты
+срабатывали там же, где в записи; лимиты отправки в Telegram ускоряются так же.
+Telegram и S3 - локальные заглушки.
+Результат - p50/p95/p99 времени обработчиков: сравнение двух версий бота на одной записи
+показывает регрессии на реальной форме трафика.
+
+Запуск:
+    python -m bench.replay data/updates-20261018-120000.log.gz --speed 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from collections import defaultdict, deque
+from functools import partial
+from typing import Any, Deque, Dict, List, Tuple
+
+from aiohttp import web
+
+from bench.common import format_row, make_pdf, summarize
+from bench.fake_backend import FakeBackend
+from bench.fake_s3 import FakeS3
+from bench.fake_telegram import FakeTelegram
+from bench.stand_ins import StandIns, configure_environment
+
+# Поля тела запроса, по которым POST-ответ сопоставляется с записанным
+_MATCH_FIELDS = ('telegram_id', 'candidate_id')
+
+
+class ReplayBackend(FakeBackend):
+    """Заглушка бэкенда, отвечающая записанными ответами"""
+
+    def __init__(self, speed: float = 1.0, **kwargs):
+        """
+        Args:
+            speed: Ускорение воспроизведения (для времени на вопрос)
+        """
+        super().__init__(**kwargs)
+        self.speed = speed
+        self.recorded: Dict[Tuple[str, str], Deque[Dict[str, Any]]] = defaultdict(deque)
+        self.replayed = 0
+        self.fallback = 0
+        # (perf_counter начала воспроизведения, время первого обновления в записи)
+        self._clock: Tuple[float, float] = None
+
+    def start_clock(self, origin: float):
+        """Начало воспроизведения: origin - время первого обновления в записи"""
+        self._clock = (time.perf_counter(), origin)
+
+    def _recorded_now(self) -> float:
+        started, origin = self._clock
+        return origin + (time.perf_counter() - started) * self.speed
+
+    def load(self, records: List[Dict[str, Any]]):
+        """Записи ответов бэкенда из журнала (до начала воспроизведения)"""
+        for record in records:
+            self.recorded[(record['m'], record['p'])].append(record)
+
+    def create_app(self) -> web.Application:
+        app = super().create_app()
+        app.middlewares.append(self._replay)
+        return app
+
+    @web.middleware
+    async def _replay(self, request: web.Request, handler):
+        queue = self.recorded.get((request.method, request.path))
+        if not queue:
+            self.fallback += 1
+            return await handler(request)
+
+        if request.method == 'GET':
+            # GET отвечает тем, что бэкенд вернул бы в этот момент записи: число опросов статуса
+            # при ускорении другое, а переход статуса должен случиться в то же время
+            if self._clock is not None:
+                now = self._recorded_now()
+                while len(queue) > 1 and queue[1]['t'] <= now:
+                    queue.popleft()
+            record = queue.popleft() if len(queue) > 1 and self._clock is None else queue[0]
+        else:
+            record = self._match(queue, await request.json()) if len(queue) > 1 else queue[0]
+            queue.remove(record)
+
+        self.replayed += 1
+        self.calls[record['b']] += 1
+        if record['l']:
+            await asyncio.sleep(record['l'])
+        if record['s'] == 0:
+            # В записи запрос не дошел до бэкенда - имитируем недоступность
+            return web.json_response({'error': 'recorded failure'}, status=503)
+        data = self._scale_time_limits(record['d'])
+        if record['s'] == 204:
+            return web.Response(status=204)
+        return web.json_response(data if data is not None else {}, status=record['s'])
+
+    @staticmethod
+    def _match(queue: Deque[Dict[str, Any]], body: Any) -> Dict[str, Any]:
+        """Первый записанный ответ с теми же идентификаторами, что в теле запроса"""
+        if isinstance(body, dict):
+            keys = {field: body[field] for field in _MATCH_FIELDS if field in body}
+            for record in queue:
+                data = record['d']
+                if isinstance(data, dict) and keys and all(data.get(k) == v for k, v in keys.items()):
+                    return record
+        return queue[0]
+
+    def _scale_time_limits(self, data: Any) -> Any:
+        if isinstance(data, list) and self.speed != 1:
+            return [
+                {**item, 'time_limit': round(item['time_limit'] / self.speed, 2)}
+                if isinstance(item, dict) and 'time_limit' in item else item
+                for item in data
+            ]
+        return data
+
+
+class HandlerTimer:
+    """Inner middleware: длительность каждого вызова обработчика по имени обработчика"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def __call__(self, handler, event, data):
+        name = data['handler'].callback.__name__
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            self.errors[name] += 1
+            raise
+        finally:
+            self.latencies[name].append(time.perf_counter() - started)
+
+
+def accelerate(speed: float):
+    """
+    Лимиты Telegram заданы в реальном времени: при ускоренном воспроизведении они ускоряются
+    вместе с трафиком, иначе замер покажет очередь к лимиту, а не время обработчиков
+    """
+    from outbound import outbound
+
+    outbound.per_chat_rate *= speed
+    outbound.per_chat_burst *= speed
+    outbound._global.rate *= speed
+    outbound._global.burst *= speed
+
+
+def _sequential(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Старые журналы с несколькими запусками в одном файле: t каждого запуска начинается с 0.
+    Запуски ставятся друг за другом, а не накладываются
+    """
+    offset = previous = end = 0.0
+    sessions = 1
+    for record in records:
+        if record['t'] < previous:
+            offset = end
+            sessions += 1
+        previous = record['t']
+        record['t'] += offset
+        end = record['t']
+    if sessions > 1:
+        print(f"Recording holds {sessions} runs, replaying them one after another")
+    return records
+
+
+def load(path: str) -> (List[Dict[str, Any]], List[Dict[str, Any]]):
+    """Обновления и ответы бэкенда из журнала записи"""
+    from recorder import read_recording
+
+    records = _sequential(read_recording(path))
+    updates = [record for record in records if 'u' in record]
+    responses = [record for record in records if 'b' in record]
+    return updates, responses
+
+
+def _document(update: Dict[str, Any]) -> Dict[str, Any]:
+    return (update.get('message') or {}).get('document') or {}
+
+
+def _user_id(update: Dict[str, Any]) -> int:
+    event = update.get('message') or update.get('callback_query') or {}
+    return (event.get('from') or {}).get('id', 0)
+
+
+async def feed(bot, dp, updates: List[Dict[str, Any]], speed: float, stand_ins: StandIns) -> (List[float], float):
+    """
+    Подать обновления с исходными интервалами / speed; возвращает время обработки и опоздание подачи
+
+    Обновления одного пользователя подаются по очереди: кандидат пишет следующее сообщение,
+    увидев ответ на предыдущее, и при ускорении порядок внутри диалога не должен нарушаться.
+    """
+    from aiogram.types import Update
+
+    totals: List[float] = []
+    max_lag = 0.0
+    previous: Dict[int, asyncio.Task] = {}
+
+    async def one(raw: Dict[str, Any], before: asyncio.Task = None):
+        if before is not None:
+            await asyncio.wait([before])
+        started = time.perf_counter()
+        try:
+            await dp.feed_update(bot, Update.model_validate(raw, context={'bot': bot}))
+        except Exception as e:
+            print(f"update {raw.get('update_id')}: {e!r}")
+        totals.append(time.perf_counter() - started)
+
+    tasks = []
+    origin = updates[0]['t'] if updates else 0
+    stand_ins.backend.start_clock(origin)
+    started = time.perf_counter()
+    for record in updates:
+        document = _document(record['u'])
+        if document:
+            stand_ins.telegram.files[document['file_id']] = make_pdf(padding=document.get('file_size', 0))
+        delay = started + (record['t'] - origin) / speed - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            max_lag = max(max_lag, -delay)
+        user_id = _user_id(record['u'])
+        task = asyncio.create_task(one(record['u'], previous.get(user_id)))
+        previous[user_id] = task
+        tasks.append(task)
+    await asyncio.gather(*tasks)
+    return totals, max_lag
+
+
+async def run(args):
+    stand_ins = StandIns(
+        telegram=partial(FakeTelegram, send_latency=args.telegram_latency),
+        backend=partial(ReplayBackend, speed=args.speed, latency=args.backend_latency),
+        s3=partial(FakeS3, latency=args.s3_latency),
+    )
+    stand_ins.start()
+    configure_environment(stand_ins, tempfile.mkdtemp(prefix='hr-bot-replay-'))
+    # Опрос статуса скрининга ускоряется вместе с записанными переходами статуса
+    os.environ['SCREENING_POLL_INITIAL_DELAY'] = str(float(os.environ['SCREENING_POLL_INITIAL_DELAY']) / args.speed)
+
+    # Модули бота (и recorder) читают окружение при импорте
+    from main import bot_services, create_bot, create_dispatcher
+
+    updates, responses = load(args.recording)
+    if not updates:
+        print(f"No updates in {args.recording}")
+        stand_ins.stop()
+        return
+    print(f"Loaded {len(updates)} updates and {len(responses)} backend responses")
+    stand_ins.backend.load(responses)
+    accelerate(args.speed)
+
+    bot = create_bot()
+    dp = create_dispatcher()
+    timer = HandlerTimer()
+    dp.message.middleware(timer)
+    dp.callback_query.middleware(timer)
+
+    async with bot_services(bot, dp, metrics_port=0, record_path=''):
+        started = time.perf_counter()
+        totals, max_lag = await feed(bot, dp, updates, args.speed, stand_ins)
+        duration = time.perf_counter() - started
+        # Фоновые задачи (скрининг, таймеры вопросов) успевают отработать
+        await asyncio.sleep(args.settle)
+
+    stand_ins.stop()
+
+    recorded = (updates[-1]['t'] - updates[0]['t']) or 1e-9
+    print(f"\nrecorded {recorded:.1f}s replayed in {duration:.1f}s (x{recorded / duration:.1f}, "
+          f"target x{args.speed:g}), max feed lag {max_lag * 1000:.1f}ms")
+    print(format_row('update_total', summarize(totals, duration)))
+    for name in sorted(timer.latencies):
+        errors = f" errors={timer.errors[name]}" if timer.errors.get(name) else ''
+        print(format_row(name, summarize(timer.latencies[name], duration)) + errors)
+    backend = stand_ins.backend
+    print(f"backend: replayed={backend.replayed} fallback={backend.fallback} calls={json.dumps(backend.calls)}")
+    print(f"telegram: {dict(stand_ins.telegram.method_calls)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('recording', help='Файл записи одного запуска (RECORD_UPDATES_PATH с датой и временем)')
+    parser.add_argument('--speed', type=float, default=1.0, help='Ускорение воспроизведения, 1-100')
+    parser.add_argument('--settle', type=float, default=2.0, help='Ожидание фоновых задач после подачи, сек')
+    parser.add_argument('--backend-latency', type=float, default=0.0,
+                        help='Задержка бэкенда для маршрутов без записи, сек')
+    parser.add_argument('--telegram-latency', type=float, default=0.0, help='Задержка отправки в Telegram, сек')
+    parser.add_argument('--s3-latency', type=float, default=0.0, help='Задержка S3, сек')
+    args = parser.parse_args()
+    if not 1 <= args.speed <= 100:
+        parser.error('--speed must be between 1 and 100')
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Заглушки Telegram Bot API, бэкенда и S3 в отдельном потоке со своим event loop
+
+Общая обвязка для bench.load_test и bench.replay: заглушки не отнимают время у бота,
+окружение бота направляется на них до импорта его модулей.
+"""
+import asyncio
+import os
+import threading
+from typing import Callable
+
+from bench.common import start_app
+from bench.fake_backend import FakeBackend
+from bench.fake_s3 import FakeS3
+from bench.fake_telegram import FakeTelegram
+
+BUCKET = 'bench-resumes'
+
+
+class StandIns:
+    """Заглушки Telegram, бэкенда и S3 в отдельном потоке"""
+
+    def __init__(self, telegram: Callable[[], FakeTelegram] = FakeTelegram,
+                 backend: Callable[[], FakeBackend] = FakeBackend, s3: Callable[[], FakeS3] = FakeS3):
+        """
+        Args:
+            telegram, backend, s3: Фабрики заглушек (вызываются в потоке заглушек)
+        """
+        self._factories = {'telegram': telegram, 'backend': backend, 's3': s3}
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name='stand-ins', daemon=True)
+        self._runners = []
+
+    def start(self):
+        self._thread.start()
+        self.run(self._start()).result()
+
+    def run(self, coro):
+        """Выполнить корутину в потоке заглушек (возвращает concurrent.futures.Future)"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def _start(self):
+        for name, factory in self._factories.items():
+            fake = factory()
+            runner, url = await start_app(fake.create_app())
+            self._runners.append(runner)
+            setattr(self, name, fake)
+            setattr(self, f'{name}_url', url)
+
+    def stop(self):
+        async def cleanup():
+            for runner in self._runners:
+                await runner.cleanup()
+
+        self.run(cleanup()).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+
+def configure_environment(stand_ins: StandIns, data_dir: str):
+    """Окружение бота: все внешние сервисы - заглушки, состояние - во временной директории"""
+    os.environ.update({
+        'BOT_TOKEN': '123456:LOAD-TEST',
+        'TELEGRAM_API_URL': stand_ins.telegram_url,
+        'BACKEND_BASE_URL': stand_ins.backend_url,
+        'YC_ENDPOINT_URL': stand_ins.s3_url,
+        'YC_ADDRESSING_STYLE': 'path',
+        'YC_ACCESS_KEY_ID': 'bench',
+        'YC_SECRET_ACCESS_KEY': 'bench',
+        'YC_BUCKET_NAME': BUCKET,
+        'AWS_REQUEST_CHECKSUM_CALCULATION': 'when_required',
+        'FSM_SQLITE_PATH': os.path.join(data_dir, 'fsm.sqlite3'),
+        'TIMERS_DB_PATH': os.path.join(data_dir, 'timers.sqlite3'),
+        'ANSWERS_JOURNAL_PATH': os.path.join(data_dir, 'answers.journal'),
+        'RESUMES_DIR': os.path.join(data_dir, 'resumes'),
+        'RESUME_INDEX_PATH': os.path.join(data_dir, 'resume_index.sqlite3'),
+        'SCREENING_POLL_INITIAL_DELAY': '0.2',
+        'METRICS_PORT': '0',
+        'RECORD_UPDATES_PATH': '',
+    })
+    os.environ.setdefault('FSM_STORAGE', 'memory')
@@ -0,0 +1,120 @@
+"""
+Сравнение задержки приема обновлений: long polling против webhook
+
+Задержка - время от появления обновления (в очереди getUpdates или в POST на webhook)
+до вызова обработчика в Dispatcher.
+
+Запуск:
+    python -m bench.webhook_vs_polling --updates 2000 --rate 500
+"""
+import argparse
+import asyncio
+import time
+
+from bench.common import format_row, summarize
+from bench.fake_telegram import start_fake_telegram
+
+import aiohttp
+from aiogram import Bot, Dispatcher, Router
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Message
+from aiohttp import web
+
+from webhook import SECRET_HEADER, UpdateProcessor, create_webhook_app
+
+SECRET = 'bench-secret'
+
+
+def build_dispatcher(received: dict, done: asyncio.Event, total: int) -> Dispatcher:
+    router = Router()
+
+    @router.message()
+    async def on_message(message: Message):
+        sent_at = float(message.text)
+        received[message.message_id] = time.perf_counter() - sent_at
+        if len(received) >= total:
+            done.set()
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    return dp
+
+
+async def run_polling(args) -> dict:
+    fake, runner, base_url = await start_fake_telegram()
+    bot = Bot('123456:BENCH', session=AiohttpSession(api=TelegramAPIServer.from_base(base_url)))
+    received, done = {}, asyncio.Event()
+    dp = build_dispatcher(received, done, args.updates)
+
+    polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False, polling_timeout=30))
+    started = time.perf_counter()
+    for i in range(args.updates):
+        fake.push_update(fake.message_update(1 + i % args.users, str(time.perf_counter())))
+        await asyncio.sleep(1 / args.rate)
+    await asyncio.wait_for(done.wait(), 60)
+    duration = time.perf_counter() - started
+
+    await dp.stop_polling()
+    await polling
+    await runner.cleanup()
+    return summarize(list(received.values()), duration)
+
+
+async def run_webhook(args) -> (dict, dict):
+    fake, runner, base_url = await start_fake_telegram()
+    bot = Bot('123456:BENCH', session=AiohttpSession(api=TelegramAPIServer.from_base(base_url)))
+    received, done = {}, asyncio.Event()
+    dp = build_dispatcher(received, done, args.updates)
+
+    processor = UpdateProcessor(dp, bot)
+    processor.start()
+    app_runner = web.AppRunner(create_webhook_app(processor.submit, secret=SECRET, path='/webhook'))
+    await app_runner.setup()
+    site = web.TCPSite(app_runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    url = f'http://127.0.0.1:{port}/webhook'
+
+    acks = []
+    async with aiohttp.ClientSession() as session:
+        async def post(update):
+            sent = time.perf_counter()
+            update['message']['text'] = str(sent)
+            async with session.post(url, json=update, headers={SECRET_HEADER: SECRET}) as response:
+                assert response.status == 200, response.status
+            acks.append(time.perf_counter() - sent)
+
+        started = time.perf_counter()
+        posts = []
+        for i in range(args.updates):
+            posts.append(asyncio.create_task(post(fake.message_update(1 + i % args.users, ''))))
+            await asyncio.sleep(1 / args.rate)
+        await asyncio.gather(*posts)
+        await asyncio.wait_for(done.wait(), 60)
+        duration = time.perf_counter() - started
+
+    await processor.stop()
+    await app_runner.cleanup()
+    await bot.session.close()
+    await runner.cleanup()
+    return summarize(list(received.values()), duration), summarize(acks, duration)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--updates', type=int, default=2000, help='Число обновлений')
+    parser.add_argument('--rate', type=float, default=500, help='Обновлений в секунду')
+    parser.add_argument('--users', type=int, default=200, help='Число разных пользователей')
+    args = parser.parse_args()
+
+    polling = await run_polling(args)
+    webhook, acks = await run_webhook(args)
+
+    print(format_row('polling: to handler', polling))
+    print(format_row('webhook: to handler', webhook))
+    print(format_row('webhook: 200 ack', acks))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
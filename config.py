@@ -9,14 +9,35 @@ load_dotenv()
 # Токен бота от BotFather
 BOT_TOKEN = os.getenv('BOT_TOKEN')
 
+# Адрес Bot API сервера (опционально, для локального telegram-bot-api или тестовой заглушки)
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL')
+
 # ID администратора (опционально)
 ADMIN_ID = os.getenv('ADMIN_ID')
 
+# Режим получения обновлений: polling или webhook
+BOT_MODE = os.getenv('BOT_MODE', 'polling')
+WEBHOOK_BASE_URL = os.getenv('WEBHOOK_BASE_URL')  # Публичный адрес бота, например https://bot.example.com
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')  # Проверяется в заголовке X-Telegram-Bot-Api-Secret-Token (пусто - случайный)
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8080'))
+UPDATE_QUEUE_SIZE = int(os.getenv('UPDATE_QUEUE_SIZE', '10000'))  # Принятых, но не обработанных обновлений
+UPDATE_WORKERS = int(os.getenv('UPDATE_WORKERS', '64'))  # Одновременно обрабатываемых обновлений
+
+# Несколько процессов-воркеров (1 - все в одном процессе)
+WORKERS = int(os.getenv('WORKERS', '1'))
+WORKER_QUEUE_SIZE = int(os.getenv('WORKER_QUEUE_SIZE', '10000'))  # Обновлений в очереди одного воркера
+SHARD_VIRTUAL_NODES = int(os.getenv('SHARD_VIRTUAL_NODES', '128'))  # Точек воркера на кольце хешей
+
+# Язык сообщений бота (каталог messages.py)
+MESSAGES_LOCALE = os.getenv('MESSAGES_LOCALE', 'ru')
+
 # Параметры интервью
 INTERVIEW_QUESTIONS_COUNT = 5  # количество вопросов
 
 # Директория для временного сохранения резюме
-RESUMES_DIR = 'resumes'
+RESUMES_DIR = os.getenv('RESUMES_DIR', 'resumes')
 
 # Ограничения на файлы
 MAX_RESUME_SIZE_MB = 5  # Максимальный размер резюме в МБ
@@ -27,9 +48,115 @@ YC_ACCESS_KEY_ID = os.getenv('YC_ACCESS_KEY_ID')
 YC_SECRET_ACCESS_KEY = os.getenv('YC_SECRET_ACCESS_KEY')
 YC_BUCKET_NAME = os.getenv('YC_BUCKET_NAME')
 YC_ENDPOINT_URL = os.getenv('YC_ENDPOINT_URL')
+YC_ADDRESSING_STYLE = os.getenv('YC_ADDRESSING_STYLE', 'virtual')  # virtual | path
+
+# Асинхронная загрузка в хранилище
+S3_UPLOAD_WORKERS = int(os.getenv('S3_UPLOAD_WORKERS', '8'))  # Потоков в пуле загрузки
+S3_UPLOAD_CONCURRENCY = int(os.getenv('S3_UPLOAD_CONCURRENCY', '16'))  # Одновременных загрузок (с очередью)
+
+# Кэш временных ссылок на резюме
+PRESIGNED_URL_CACHE_SIZE = int(os.getenv('PRESIGNED_URL_CACHE_SIZE', '10000'))  # ссылок
+# Ссылка выдается повторно, пока действует не меньше этой доли срока
+PRESIGNED_URL_MIN_REMAINING = float(os.getenv('PRESIGNED_URL_MIN_REMAINING', '0.5'))
+
+# Потоковая загрузка резюме из Telegram
+RESUME_DOWNLOAD_CHUNK_SIZE = 64 * 1024  # Размер чанка при скачивании, байт
+RESUME_DOWNLOAD_TIMEOUT = 30  # Таймаут скачивания файла, сек
+
+# Проверка PDF до загрузки и скрининга
+PDF_VALIDATION_WORKERS = int(os.getenv('PDF_VALIDATION_WORKERS', '2'))  # Процессов в пуле проверки
+PDF_VALIDATION_TIMEOUT = float(os.getenv('PDF_VALIDATION_TIMEOUT', '10'))  # После таймаута файл принимается без проверки
+RESUME_MAX_PAGES = int(os.getenv('RESUME_MAX_PAGES', '50'))
+
+# Индекс загруженных резюме по SHA-256 (повторная отправка того же файла не загружается заново)
+RESUME_INDEX_PATH = os.getenv('RESUME_INDEX_PATH', 'data/resume_index.sqlite3')
+
+# Очередь резюме, не загруженных в S3 сразу (у воркеров при WORKERS > 1 - с суффиксом .<номер>)
+RESUME_SPOOL_DIR = os.getenv('RESUME_SPOOL_DIR', os.path.join(RESUMES_DIR, 'spool'))
+RESUME_SPOOL_CONCURRENCY = int(os.getenv('RESUME_SPOOL_CONCURRENCY', '4'))  # Одновременных загрузок из очереди
+RESUME_SPOOL_RETRY_INITIAL_DELAY = float(os.getenv('RESUME_SPOOL_RETRY_INITIAL_DELAY', '1'))  # сек
+RESUME_SPOOL_RETRY_MAX_DELAY = float(os.getenv('RESUME_SPOOL_RETRY_MAX_DELAY', '60'))  # сек
+
+# Очистка хранилища резюме (retention.py)
+RETENTION_INTERVAL = float(os.getenv('RETENTION_INTERVAL', '0'))  # Период запуска в боте, часов; 0 - только вручную
+RETENTION_REJECTED_DAYS = int(os.getenv('RETENTION_REJECTED_DAYS', '30'))  # Резюме отказанных кандидатов, дней
+RETENTION_MAX_AGE_DAYS = int(os.getenv('RETENTION_MAX_AGE_DAYS', '365'))  # Любые резюме, дней
+RETENTION_ORPHAN_GRACE_HOURS = int(os.getenv('RETENTION_ORPHAN_GRACE_HOURS', '24'))  # Файл без кандидата на бэкенде
+RETENTION_CONCURRENCY = int(os.getenv('RETENTION_CONCURRENCY', '8'))  # Одновременных запросов статуса к бэкенду
+RETENTION_DELETE_CONCURRENCY = int(os.getenv('RETENTION_DELETE_CONCURRENCY', '2'))  # Одновременных DeleteObjects
+RESUMES_DIR_MAX_AGE = int(os.getenv('RESUMES_DIR_MAX_AGE', '3600'))  # Временные файлы в RESUMES_DIR, сек
 
-# Создаем директорию для временных файлов, если не существует
-os.makedirs(RESUMES_DIR, exist_ok=True)
+# Хранилище состояний FSM: memory, sqlite или redis
+FSM_STORAGE = os.getenv('FSM_STORAGE', 'sqlite')
+FSM_SQLITE_PATH = os.getenv('FSM_SQLITE_PATH', 'data/fsm.sqlite3')
+FSM_REDIS_URL = os.getenv('FSM_REDIS_URL', 'redis://localhost:6379/0')
+FSM_FLUSH_INTERVAL = float(os.getenv('FSM_FLUSH_INTERVAL', '0.05'))  # Окно объединения записей, сек
+FSM_FLUSH_BATCH = int(os.getenv('FSM_FLUSH_BATCH', '500'))  # Сброс раньше окна при таком числе ключей
+
+# Таймеры вопросов интервью
+TIMERS_DB_PATH = os.getenv('TIMERS_DB_PATH', 'data/timers.sqlite3')  # у воркеров при WORKERS > 1 - с суффиксом .<номер>
+TIMERS_FLUSH_INTERVAL = float(os.getenv('TIMERS_FLUSH_INTERVAL', '0.2'))  # Период записи на диск, сек
 
 # Настройки бэкенд API
 BACKEND_BASE_URL = os.getenv('BACKEND_BASE_URL', 'http://localhost:8080')
+
+# Пул HTTP-соединений к бэкенду
+BACKEND_POOL_LIMIT = int(os.getenv('BACKEND_POOL_LIMIT', '100'))  # Всего соединений
+BACKEND_POOL_LIMIT_PER_HOST = int(os.getenv('BACKEND_POOL_LIMIT_PER_HOST', '50'))  # Соединений на один хост
+BACKEND_KEEPALIVE_TIMEOUT = int(os.getenv('BACKEND_KEEPALIVE_TIMEOUT', '30'))  # Время жизни idle-соединения, сек
+BACKEND_DNS_CACHE_TTL = int(os.getenv('BACKEND_DNS_CACHE_TTL', '300'))  # Кэш DNS, сек
+BACKEND_REQUEST_TIMEOUT = int(os.getenv('BACKEND_REQUEST_TIMEOUT', '10'))  # Таймаут запроса, сек
+
+# Кэш вопросов по вакансиям
+QUESTIONS_CACHE_TTL = int(os.getenv('QUESTIONS_CACHE_TTL', '300'))  # сек
+QUESTIONS_CACHE_SIZE = int(os.getenv('QUESTIONS_CACHE_SIZE', '256'))  # вакансий
+
+# Фоновый скрининг резюме
+SCREENING_WORKERS = int(os.getenv('SCREENING_WORKERS', '16'))  # Одновременно обрабатываемых скринингов
+SCREENING_QUEUE_SIZE = int(os.getenv('SCREENING_QUEUE_SIZE', '500'))  # Ожидающих в очереди
+SCREENING_POLL_INITIAL_DELAY = float(os.getenv('SCREENING_POLL_INITIAL_DELAY', '1'))  # сек
+SCREENING_POLL_MAX_DELAY = float(os.getenv('SCREENING_POLL_MAX_DELAY', '30'))  # сек
+SCREENING_TIMEOUT = int(os.getenv('SCREENING_TIMEOUT', '600'))  # Сколько ждать результат, сек
+
+# Кэш профилей кандидатов по Telegram ID
+CANDIDATE_CACHE_TTL = int(os.getenv('CANDIDATE_CACHE_TTL', '600'))  # сек
+CANDIDATE_CACHE_NEGATIVE_TTL = int(os.getenv('CANDIDATE_CACHE_NEGATIVE_TTL', '30'))  # для 404, сек
+CANDIDATE_CACHE_SIZE = int(os.getenv('CANDIDATE_CACHE_SIZE', '10000'))  # кандидатов
+
+# Кэш статусов кандидатов для FAQ (status_service.py)
+STATUS_CACHE_SIZE = int(os.getenv('STATUS_CACHE_SIZE', '10000'))  # пар кандидат/вакансия
+STATUS_CACHE_TTL = float(os.getenv('STATUS_CACHE_TTL', '15'))  # Промежуточные статусы, сек
+STATUS_CACHE_FINAL_TTL = float(os.getenv('STATUS_CACHE_FINAL_TTL', '3600'))  # Итоговые статусы, сек
+STATUS_CACHE_NEGATIVE_TTL = float(os.getenv('STATUS_CACHE_NEGATIVE_TTL', '30'))  # Процесс не найден (404), сек
+
+# Отложенная отправка ответов интервью
+ANSWERS_JOURNAL_PATH = os.getenv('ANSWERS_JOURNAL_PATH', 'data/answers.journal')
+ANSWER_BATCH_SIZE = int(os.getenv('ANSWER_BATCH_SIZE', '50'))  # Ответов в одной пачке
+ANSWER_BATCH_LINGER = float(os.getenv('ANSWER_BATCH_LINGER', '0.02'))  # Ожидание заполнения пачки, сек
+ANSWER_RETRY_INITIAL_DELAY = float(os.getenv('ANSWER_RETRY_INITIAL_DELAY', '1'))  # сек
+ANSWER_RETRY_MAX_DELAY = float(os.getenv('ANSWER_RETRY_MAX_DELAY', '60'))  # сек
+ANSWER_DRAIN_TIMEOUT = float(os.getenv('ANSWER_DRAIN_TIMEOUT', '30'))  # Ожидание отправки перед итогом, сек
+ANSWER_JOURNAL_COMPACT_ACKS = int(os.getenv('ANSWER_JOURNAL_COMPACT_ACKS', '10000'))  # Подтверждений до сжатия журнала
+
+# Повторы запросов к бэкенду (только идемпотентные GET) и автоматический выключатель
+BACKEND_RETRY_ATTEMPTS = int(os.getenv('BACKEND_RETRY_ATTEMPTS', '3'))  # Всего попыток GET
+BACKEND_RETRY_INITIAL_DELAY = float(os.getenv('BACKEND_RETRY_INITIAL_DELAY', '0.2'))  # сек
+BACKEND_RETRY_MAX_DELAY = float(os.getenv('BACKEND_RETRY_MAX_DELAY', '2'))  # сек
+BACKEND_GET_TIMEOUT = float(os.getenv('BACKEND_GET_TIMEOUT', '3'))  # Таймаут одной попытки GET, сек
+BACKEND_BREAKER_FAILURES = int(os.getenv('BACKEND_BREAKER_FAILURES', '5'))  # Ошибок подряд до размыкания
+BACKEND_BREAKER_RESET_TIMEOUT = float(os.getenv('BACKEND_BREAKER_RESET_TIMEOUT', '15'))  # До пробного запроса, сек
+
+# Исходящие сообщения в Telegram
+OUTBOUND_RATE = float(os.getenv('OUTBOUND_RATE', '30'))  # Сообщений в секунду на бота (при WORKERS > 1 делится между воркерами)
+OUTBOUND_BURST = float(os.getenv('OUTBOUND_BURST', '30'))
+OUTBOUND_PER_CHAT_RATE = float(os.getenv('OUTBOUND_PER_CHAT_RATE', '1'))  # Сообщений в секунду в один чат
+OUTBOUND_PER_CHAT_BURST = float(os.getenv('OUTBOUND_PER_CHAT_BURST', '3'))
+OUTBOUND_MAX_RETRIES = int(os.getenv('OUTBOUND_MAX_RETRIES', '3'))  # Повторов после 429
+
+# HTTP-сервер метрик Prometheus (/metrics); 0 - не запускать
+METRICS_HOST = os.getenv('METRICS_HOST', '0.0.0.0')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))  # 0 - не запускать; у воркеров при WORKERS > 1 - METRICS_PORT + 1 + номер
+
+# Запись обновлений и ответов бэкенда для bench/replay.py (пусто - не записывать)
+RECORD_UPDATES_PATH = os.getenv('RECORD_UPDATES_PATH', '')  # у воркеров при WORKERS > 1 - с суффиксом .<номер>
+RECORD_FLUSH_INTERVAL = float(os.getenv('RECORD_FLUSH_INTERVAL', '1'))  # Сброс буфера на диск, сек
@@ -0,0 +1,496 @@
+"""
+Персистентные хранилища FSM: SQLite и Redis-совместимое (протокол RESP)
+
+Оба хранилища объединяют запись (несколько изменений одного ключа за короткий
+интервал превращаются в одну запись, все изменения сбрасываются одним пакетом)
+и пакетируют чтение (одновременные чтения выполняются одним запросом).
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from config import FSM_STORAGE, FSM_SQLITE_PATH, FSM_REDIS_URL, FSM_FLUSH_INTERVAL, FSM_FLUSH_BATCH
+from metrics import FSM_LATENCY, FSM_FLUSH_LATENCY, FSM_FLUSH_KEYS
+
+logger = logging.getLogger(__name__)
+
+# Строка хранилища: (state, data в виде JSON)
+Row = Tuple[Optional[str], Optional[str]]
+
+_EMPTY_DATA = '{}'
+
+
+class CoalescingStorage(BaseStorage):
+    """
+    Базовое хранилище с объединением записи и пакетным чтением.
+
+    Наследник реализует _read_batch и _write_batch.
+    Чтение видит собственные еще не сброшенные записи (read-your-writes).
+    """
+
+    def __init__(
+            self,
+            key_builder: Optional[KeyBuilder] = None,
+            flush_interval: float = FSM_FLUSH_INTERVAL,
+            flush_batch: int = FSM_FLUSH_BATCH,
+    ):
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        # Несброшенные изменения: key -> {'state': ..., 'data': ...}
+        self._pending: Dict[str, Dict[str, Optional[str]]] = {}
+        # Изменения, которые сейчас записываются
+        self._flushing: Dict[str, Dict[str, Optional[str]]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: set = set()
+        # Ожидающие чтения, которые будут выполнены одним пакетом
+        self._read_waiters: Dict[str, asyncio.Future] = {}
+        self._read_scheduled = False
+        self.writes_staged = 0
+        self.writes_flushed = 0
+        self.read_batches = 0
+
+    # ==================== ИНТЕРФЕЙС BaseStorage ====================
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        value = state.state if isinstance(state, State) else state
+        self._stage(self.key_builder.build(key), 'state', value)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return await self._get_field(self.key_builder.build(key), 'state')
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        self._stage(self.key_builder.build(key), 'data', json.dumps(data, ensure_ascii=False))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        value = await self._get_field(self.key_builder.build(key), 'data')
+        return json.loads(value) if value else {}
+
+    async def close(self) -> None:
+        await self.flush()
+
+    # ==================== ЗАПИСЬ ====================
+
+    def _stage(self, key: str, field: str, value: Optional[str]):
+        self._pending.setdefault(key, {})[field] = value
+        self.writes_staged += 1
+
+        if len(self._pending) >= self.flush_batch:
+            self._schedule_flush(0)
+        elif self._flush_handle is None:
+            self._schedule_flush(self.flush_interval)
+
+    def _schedule_flush(self, delay: float):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        loop = asyncio.get_running_loop()
+        self._flush_handle = loop.call_later(delay, self._start_flush)
+
+    def _start_flush(self):
+        self._flush_handle = None
+        task = asyncio.create_task(self.flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def flush(self):
+        """Записать все накопленные изменения одним пакетом"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            self._flushing, self._pending = self._pending, {}
+            started = time.perf_counter()
+            try:
+                await self._write_batch(self._flushing)
+                self.writes_flushed += len(self._flushing)
+                FSM_FLUSH_LATENCY.observe(time.perf_counter() - started)
+                FSM_FLUSH_KEYS.inc(len(self._flushing))
+            except Exception as e:
+                logger.error(f"FSM storage flush failed ({len(self._flushing)} keys): {e}")
+                # Возвращаем изменения в очередь, не затирая более свежие
+                for key, fields in self._flushing.items():
+                    self._pending[key] = {**fields, **self._pending.get(key, {})}
+                self._schedule_flush(max(self.flush_interval, 1.0))
+            finally:
+                self._flushing = {}
+
+    # ==================== ЧТЕНИЕ ====================
+
+    async def _get_field(self, key: str, field: str) -> Optional[str]:
+        for source in (self._pending, self._flushing):
+            fields = source.get(key)
+            if fields is not None and field in fields:
+                return fields[field]
+
+        state, data = await self._read(key)
+        return state if field == 'state' else data
+
+    async def _read(self, key: str) -> Row:
+        future = self._read_waiters.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._read_waiters[key] = future
+            if not self._read_scheduled:
+                self._read_scheduled = True
+                asyncio.get_running_loop().call_soon(lambda: asyncio.create_task(self._run_reads()))
+        return await asyncio.shield(future)
+
+    async def _run_reads(self):
+        waiters, self._read_waiters = self._read_waiters, {}
+        self._read_scheduled = False
+        self.read_batches += 1
+        try:
+            rows = await self._read_batch(list(waiters))
+        except Exception as e:
+            for future in waiters.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, future in waiters.items():
+            if not future.done():
+                future.set_result(rows.get(key, (None, None)))
+
+    # ==================== РЕАЛИЗАЦИЯ ====================
+
+    async def _read_batch(self, keys: List[str]) -> Dict[str, Row]:
+        raise NotImplementedError
+
+    async def _write_batch(self, changes: Dict[str, Dict[str, Optional[str]]]):
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict[str, int]:
+        """Статистика объединения записи и пакетного чтения"""
+        return {
+            'pending': len(self._pending),
+            'writes_staged': self.writes_staged,
+            'writes_flushed': self.writes_flushed,
+            'read_batches': self.read_batches,
+        }
+
+
+class SQLiteStorage(CoalescingStorage):
+    """
+    Хранилище FSM в SQLite (WAL), файл может использоваться несколькими процессами.
+    Все обращения к базе выполняются в одном выделенном потоке.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='fsm-sqlite')
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS fsm ('
+                'key TEXT PRIMARY KEY, state TEXT, data TEXT NOT NULL DEFAULT \'{}\')'
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def _read_batch(self, keys: List[str]) -> Dict[str, Row]:
+        return await self._run(self._select, keys)
+
+    def _select(self, keys: List[str]) -> Dict[str, Row]:
+        conn = self._connect()
+        rows = {}
+        # Ограничение SQLite на число параметров в запросе
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for key, state, data in conn.execute(
+                    f'SELECT key, state, data FROM fsm WHERE key IN ({placeholders})', chunk
+            ):
+                rows[key] = (state, data)
+        return rows
+
+    async def _write_batch(self, changes: Dict[str, Dict[str, Optional[str]]]):
+        await self._run(self._upsert, changes)
+
+    def _upsert(self, changes: Dict[str, Dict[str, Optional[str]]]):
+        conn = self._connect()
+        with conn:
+            for key, fields in changes.items():
+                if 'state' in fields and 'data' in fields:
+                    conn.execute(
+                        'INSERT INTO fsm (key, state, data) VALUES (?, ?, ?) '
+                        'ON CONFLICT(key) DO UPDATE SET state = excluded.state, data = excluded.data',
+                        (key, fields['state'], fields['data']),
+                    )
+                elif 'state' in fields:
+                    conn.execute(
+                        'INSERT INTO fsm (key, state) VALUES (?, ?) '
+                        'ON CONFLICT(key) DO UPDATE SET state = excluded.state',
+                        (key, fields['state']),
+                    )
+                else:
+                    conn.execute(
+                        'INSERT INTO fsm (key, data) VALUES (?, ?) '
+                        'ON CONFLICT(key) DO UPDATE SET data = excluded.data',
+                        (key, fields['data']),
+                    )
+            # Пустые записи удаляются только среди ключей пачки: поиск по первичному ключу, без обхода таблицы
+            conn.executemany(
+                'DELETE FROM fsm WHERE key = ? AND state IS NULL AND data = ?',
+                [(key, _EMPTY_DATA) for key in changes],
+            )
+
+    async def close(self) -> None:
+        await super().close()
+        if self._conn is not None:
+            await self._run(self._conn.close)
+            self._conn = None
+        self._executor.shutdown(wait=True)
+
+
+class RespError(Exception):
+    """Ошибка, которую вернул Redis-совместимый сервер"""
+
+
+class RespClient:
+    """
+    Минимальный асинхронный клиент протокола RESP (Redis).
+
+    Команды от всех корутин пишутся в одно соединение без ожидания ответа,
+    ответы разбираются по порядку, поэтому одновременные запросы конвейеризуются.
+    """
+
+    def __init__(self, host: str, port: int, db: int = 0, password: Optional[str] = None):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._waiters: deque = deque()
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+
+    @classmethod
+    def from_url(cls, url: str) -> "RespClient":
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip('/') or 0)
+        return cls(parsed.hostname or 'localhost', parsed.port or 6379, db=db, password=parsed.password)
+
+    async def _ensure_connected(self):
+        if self._writer is not None and not self._writer.is_closing():
+            return
+        async with self._connect_lock:
+            if self._writer is not None and not self._writer.is_closing():
+                return
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+            self._reader_task = asyncio.create_task(self._read_loop())
+            if self.password:
+                await self._send([('AUTH', self.password)])
+            if self.db:
+                await self._send([('SELECT', self.db)])
+
+    async def execute(self, *args) -> Any:
+        """Выполнить одну команду"""
+        result = (await self.execute_many([args]))[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def execute_many(self, commands: List[tuple]) -> List[Any]:
+        """
+        Отправить несколько команд одной записью и дождаться ответов.
+        Ошибки отдельных команд возвращаются в списке как исключения.
+        """
+        await self._ensure_connected()
+        return await self._send(commands)
+
+    async def _send(self, commands: List[tuple]) -> List[Any]:
+        loop = asyncio.get_running_loop()
+        futures = []
+        payload = bytearray()
+        for command in commands:
+            payload += self._encode(command)
+            future = loop.create_future()
+            self._waiters.append(future)
+            futures.append(future)
+        self._writer.write(bytes(payload))
+        await self._writer.drain()
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        for result in results:
+            if isinstance(result, ConnectionError):
+                raise result
+        return results
+
+    @staticmethod
+    def _encode(command: tuple) -> bytes:
+        parts = [b'*%d\r\n' % len(command)]
+        for arg in command:
+            if isinstance(arg, bytes):
+                value = arg
+            else:
+                value = str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(value), value))
+        return b''.join(parts)
+
+    async def _read_loop(self):
+        try:
+            while True:
+                reply = await self._read_reply()
+                future = self._waiters.popleft()
+                if not future.done():
+                    if isinstance(reply, RespError):
+                        future.set_exception(reply)
+                    else:
+                        future.set_result(reply)
+        except (asyncio.IncompleteReadError, ConnectionError, OSError) as e:
+            error = ConnectionError(f"RESP connection lost: {e}")
+        except asyncio.CancelledError:
+            error = ConnectionError("RESP connection closed")
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_exception(error)
+        if self._writer is not None:
+            self._writer.close()
+
+    async def _read_reply(self) -> Any:
+        line = await self._reader.readuntil(b'\r\n')
+        prefix, body = line[:1], line[1:-2]
+        if prefix == b'+':
+            return body.decode()
+        if prefix == b'-':
+            return RespError(body.decode())
+        if prefix == b':':
+            return int(body)
+        if prefix == b'$':
+            length = int(body)
+            if length == -1:
+                return None
+            value = await self._reader.readexactly(length + 2)
+            return value[:-2].decode()
+        if prefix == b'*':
+            length = int(body)
+            if length == -1:
+                return None
+            return [await self._read_reply() for _ in range(length)]
+        raise ConnectionError(f"Unexpected RESP reply: {line!r}")
+
+    async def close(self):
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+            self._reader_task = None
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except Exception:
+                pass
+            self._writer = None
+
+
+class RedisStorage(CoalescingStorage):
+    """
+    Хранилище FSM в Redis-совместимом сервере.
+    Пакет чтения - одна команда MGET, пакет записи - один конвейер SET/DEL.
+    """
+
+    def __init__(self, client: RespClient, **kwargs):
+        super().__init__(**kwargs)
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisStorage":
+        return cls(RespClient.from_url(url), **kwargs)
+
+    async def _read_batch(self, keys: List[str]) -> Dict[str, Row]:
+        args = []
+        for key in keys:
+            args.append(f'{key}:state')
+            args.append(f'{key}:data')
+        values = await self.client.execute('MGET', *args)
+        return {key: (values[2 * i], values[2 * i + 1]) for i, key in enumerate(keys)}
+
+    async def _write_batch(self, changes: Dict[str, Dict[str, Optional[str]]]):
+        commands = []
+        for key, fields in changes.items():
+            if 'state' in fields:
+                if fields['state'] is None:
+                    commands.append(('DEL', f'{key}:state'))
+                else:
+                    commands.append(('SET', f'{key}:state', fields['state']))
+            if 'data' in fields:
+                if fields['data'] == _EMPTY_DATA:
+                    commands.append(('DEL', f'{key}:data'))
+                else:
+                    commands.append(('SET', f'{key}:data', fields['data']))
+        results = await self.client.execute_many(commands)
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors:
+            raise errors[0]
+
+    async def close(self) -> None:
+        await super().close()
+        await self.client.close()
+
+
+class InstrumentedStorage(BaseStorage):
+    """Обертка над хранилищем FSM, измеряющая время чтения и записи"""
+
+    def __init__(self, storage: BaseStorage):
+        self.storage = storage
+        self._get_state = FSM_LATENCY.labels('get_state')
+        self._set_state = FSM_LATENCY.labels('set_state')
+        self._get_data = FSM_LATENCY.labels('get_data')
+        self._set_data = FSM_LATENCY.labels('set_data')
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        with self._set_state.time():
+            await self.storage.set_state(key, state)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        with self._get_state.time():
+            return await self.storage.get_state(key)
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        with self._set_data.time():
+            await self.storage.set_data(key, data)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        with self._get_data.time():
+            return await self.storage.get_data(key)
+
+    async def close(self) -> None:
+        await self.storage.close()
+
+
+def build_fsm_storage() -> BaseStorage:
+    """Создание хранилища FSM по настройке FSM_STORAGE (memory, sqlite, redis)"""
+    if FSM_STORAGE == 'sqlite':
+        logger.info(f"FSM storage: SQLite ({FSM_SQLITE_PATH})")
+        storage = SQLiteStorage(FSM_SQLITE_PATH)
+    elif FSM_STORAGE == 'redis':
+        logger.info(f"FSM storage: Redis ({FSM_REDIS_URL})")
+        storage = RedisStorage.from_url(FSM_REDIS_URL)
+    else:
+        logger.info("FSM storage: memory")
+        storage = MemoryStorage()
+    return InstrumentedStorage(storage)
@@ -4,21 +4,30 @@
 """
 import asyncio
 import logging
-import os
 import sys
+import time
+from typing import Optional
 
-from aiogram import Router, F
+from aiogram import Bot, Router, F
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
 from aiogram.types import Message, CallbackQuery
 
+from answer_queue import answer_queue
 from backend_client import get_backend_client
-from config import INTERVIEW_QUESTIONS_COUNT, MAX_RESUME_SIZE_BYTES, \
-    MAX_RESUME_SIZE_MB, RESUMES_DIR
+from config import INTERVIEW_QUESTIONS_COUNT, MAX_RESUME_SIZE_BYTES
 from keyboards import get_ready_for_interview_keyboard, get_quick_questions_keyboard
+from messages import messages
 from mock_data import mock_db
-from s3_service import storage_service
+from outbound import outbound, Priority
+from resume_index import resume_index
+from resume_ingest import ingest_resume
+from resume_spool import SpoolEntry, resume_spool
+from screening import ScreeningJob, screening_manager, FINAL_SCREENING_STATUSES
 from states import RegistrationStates, InterviewStates
+from status_service import status_service
+from timers import deadline_scheduler
 from util import is_valid_phone
 
 logging.basicConfig(
@@ -59,32 +68,21 @@ async def cmd_start(message: Message, state: FSMContext):
 
         await state.update_data(vacancy_id=start_param)
 
-        answer_text = (
-            "👋 Добро пожаловать!\n\n"
-            "Я помогу вам пройти процесс отбора.\n\n"
-            "📝 Приступим к сбору ваших данных.\n\n"
-            "Пожалуйста, введите ваше <b>ФИО</b>:"
-        )
-
         await state.set_state(RegistrationStates.waiting_for_name)
-        await message.answer(answer_text, parse_mode="HTML")
+        await outbound.answer(message, messages('start.welcome'), parse_mode="HTML")
     else:
-        error_text = (
-            "❌ <b>Ошибка</b>\n\n"
-            "Для начала работы перейдите по ссылке от рекрутера.\n\n"
-            "Обратитесь к HR-специалисту для получения корректной ссылки."
-        )
-        await message.answer(error_text, parse_mode="HTML")
+        await outbound.answer(message, messages('start.no_link'), parse_mode="HTML")
 
 
 @router.message(Command("questions"))
 async def cmd_questions(message: Message):
     """Часто задаваемые вопросы"""
-    await message.answer(
-        "❓ <b>Часто задаваемые вопросы</b>\n\n"
-        "Выберите интересующий вас вопрос:",
+    await outbound.answer(
+        message,
+        messages('faq.menu'),
         parse_mode="HTML",
-        reply_markup=get_quick_questions_keyboard()
+        reply_markup=get_quick_questions_keyboard(),
+        priority=Priority.LOW
     )
 
 
@@ -113,26 +111,26 @@ async def cmd_resume(message: Message, state: FSMContext):
 
         # Если все еще нет candidate_id или vacancy_id, значит нет активного интервью
         if not candidate_id or not vacancy_id:
-            await message.answer(
-                "У вас нет активных интервью.\n\n"
-                "Используйте ссылку от рекрутера, чтобы начать новое интервью.",
+            await outbound.answer(
+                message,
+                messages('resume.no_active'),
             )
             return
 
         # Проверяем статус скрининга
         meta, code = await backend_client.get_screening_status(candidate_id, vacancy_id)
         if code == 404:
-            await message.answer(
-                f"📎 Теперь отправьте ваше <b>резюме</b> в формате PDF\n"
-                f"(максимальный размер: {MAX_RESUME_SIZE_MB} МБ):",
+            await outbound.answer(
+                message,
+                messages('resume.upload_prompt'),
                 parse_mode="HTML"
             )
             await state.set_state(RegistrationStates.waiting_for_resume)
             return
         if not meta:
-            await message.answer(
-                "❌ Не удалось получить информацию о вашем интервью.\n\n"
-                "Пожалуйста, используйте ссылку от рекрутера для начала нового интервью.",
+            await outbound.answer(
+                message,
+                messages('resume.info_failed'),
             )
             return
 
@@ -141,10 +139,10 @@ async def cmd_resume(message: Message, state: FSMContext):
         # Обрабатываем все возможные статусы
         if status == "screening_ok":
             # Скрининг пройден, можно начинать интервью
-            await message.answer(
-                f"👋 С возвращением!\n\n"
-                f"Вы прошли скрининг резюме.\n"
-                f"Готовы начать интервью?",
+            backend_client.prefetch_questions(vacancy_id)
+            await outbound.answer(
+                message,
+                messages('resume.welcome_back'),
                 parse_mode="HTML",
                 reply_markup=get_ready_for_interview_keyboard()
             )
@@ -152,37 +150,50 @@ async def cmd_resume(message: Message, state: FSMContext):
 
         elif status == "screening_failed":
             # Скрининг не пройден
-            await message.answer(
-                "😔 К сожалению, вы не прошли этап скрининга резюме.\n\n"
-                "Для участия в других вакансиях используйте новую ссылку от рекрутера.",
+            await outbound.answer(
+                message,
+                messages('resume.screening_failed'),
             )
+            if await state.get_state() == RegistrationStates.waiting_for_screening:
+                await state.set_state(InterviewStates.rejected)
         elif status == "interview_ok":
             # Интервью пройдено успешно
-            await message.answer(
-                f"🎉 Поздравляем! Вы успешно прошли интервью!\n\n"
-                f"📧 С вами свяжется наш HR-менеджер для обсуждения следующих шагов.",
+            await outbound.answer(
+                message,
+                messages('resume.interview_ok'),
                 parse_mode="HTML"
             )
         elif status == "interview_failed":
             # Интервью не пройдено
-            await message.answer(
-                f"😔 К сожалению, вы не прошли интервью.\n\n"
-                f"Мы ценим ваше время и интерес к нашей компании.\n"
-                f"Желаем успехов в поиске работы!",
+            await outbound.answer(
+                message,
+                messages('resume.interview_failed'),
                 parse_mode="HTML"
             )
 
+        elif await state.get_state() == RegistrationStates.waiting_for_screening:
+            # Скрининг еще идет: опрос мог завершиться по таймауту (screening.slow) - опрашиваем снова.
+            # Резюме из очереди на диске запустит скрининг само после загрузки
+            pending = (screening_manager.is_pending(candidate_id, vacancy_id)
+                       or resume_spool.is_pending(candidate_id, vacancy_id))
+            if pending:
+                await outbound.answer(message, messages('screening.in_progress'))
+            else:
+                record = await resume_index.get(candidate_id, vacancy_id)
+                await start_screening(message.bot, state, candidate_id, vacancy_id,
+                                      record.sha256 if record else None, trigger=False)
+
         else:
             # Неизвестный статус или процесс еще не начат
-            await message.answer(
-                "У вас нет активных интервью.\n\n"
-                "Используйте ссылку от HR-менеджера, чтобы начать новый процесс отбора.",
+            await outbound.answer(
+                message,
+                messages('resume.no_process'),
             )
     except Exception as e:
         logger.error(f"Error in /resume command: {e}")
-        await message.answer(
-            "❌ Произошла ошибка при проверке статуса интервью.\n\n"
-            "Пожалуйста, попробуйте позже или используйте ссылку от рекрутера для нового интервью.",
+        await outbound.answer(
+            message,
+            messages('resume.error'),
         )
 
 
@@ -194,9 +205,9 @@ async def process_name(message: Message, state: FSMContext):
     name = None if message.text == "-" else message.text
     await state.update_data(name=name)
     await state.set_state(RegistrationStates.waiting_for_phone)
-    await message.answer(
-        "✅ Принято!\n\n"
-        "Введите ваш <b>номер телефона</b> (например: +79991234567):",
+    await outbound.answer(
+        message,
+        messages('registration.ask_phone'),
         parse_mode="HTML"
     )
 
@@ -207,11 +218,9 @@ async def process_phone(message: Message, state: FSMContext):
     phone = message.text.strip()
 
     if not is_valid_phone(phone):
-        await message.answer(
-            "❌ <b>Неверный формат номера телефона!</b>\n\n"
-            "Пожалуйста, введите номер в одном из форматов:\n"
-            "• +79991234567\n"
-            "Номер должен содержать 11 цифр после кода страны.",
+        await outbound.answer(
+            message,
+            messages('registration.invalid_phone'),
             parse_mode="HTML"
         )
         return
@@ -223,16 +232,16 @@ async def process_phone(message: Message, state: FSMContext):
     if telegram_username:
         await state.update_data(telegram_username=f"@{telegram_username}")
         await state.set_state(RegistrationStates.waiting_for_city)
-        await message.answer(
-            "✅ Принято!\n\n"
-            "Введите ваш <b>город проживания</b>:",
+        await outbound.answer(
+            message,
+            messages('registration.ask_city'),
             parse_mode="HTML"
         )
     else:
         await state.set_state(RegistrationStates.waiting_for_telegram_username)
-        await message.answer(
-            "✅ Принято!\n\n"
-            "Пожалуйста, введите ваш <b>Telegram username</b> (например: @username):",
+        await outbound.answer(
+            message,
+            messages('registration.ask_username'),
             parse_mode="HTML"
         )
 
@@ -248,9 +257,9 @@ async def process_telegram_username(message: Message, state: FSMContext):
 
     await state.update_data(telegram_username=username)
     await state.set_state(RegistrationStates.waiting_for_city)
-    await message.answer(
-        "✅ Принято!\n\n"
-        "Введите ваш <b>город проживания</b>:",
+    await outbound.answer(
+        message,
+        messages('registration.ask_city'),
         parse_mode="HTML"
     )
 
@@ -274,10 +283,9 @@ async def process_city(message: Message, state: FSMContext):
         result, _ = await backend_client.create_candidate(candidate_data)
 
         if result:
-            await message.answer(
-                "✅ Данные сохранены!\n\n"
-                f"📎 Теперь отправьте ваше <b>резюме</b> в формате PDF\n"
-                f"(максимальный размер: {MAX_RESUME_SIZE_MB} МБ):",
+            await outbound.answer(
+                message,
+                messages('registration.saved'),
                 parse_mode="HTML"
             )
             await state.update_data(candidate_id=result['id'])
@@ -286,11 +294,11 @@ async def process_city(message: Message, state: FSMContext):
             error_msg = result.get('error', 'Unknown error') if result else 'No response'
             status_code = result.get('status_code', 'No status') if result else 'No status'
             logger.error(f"Failed to create candidate. Status: {status_code}, Error: {error_msg}")
-            await message.answer("❌ Проблемы с подключением, повторите попытку позже")
+            await outbound.answer(message, messages('error.connection'))
 
     except Exception as e:
         logger.error(f"Exception in create_candidate: {e}")
-        await message.answer("❌ Проблемы с подключением, повторите попытку позже")
+        await outbound.answer(message, messages('error.connection'))
 
 
 @router.message(RegistrationStates.waiting_for_resume, F.document)
@@ -300,18 +308,17 @@ async def process_resume(message: Message, state: FSMContext):
 
     # Проверяем формат файла
     if not (document.file_name.endswith('.pdf')):
-        await message.answer(
-            "❌ Пожалуйста, отправьте файл в формате PDF"
+        await outbound.answer(
+            message,
+            messages('upload.not_pdf_name')
         )
         return
 
     # Проверяем размер файла (до 5 МБ)
     if document.file_size > MAX_RESUME_SIZE_BYTES:
-        await message.answer(
-            f"❌ Файл слишком большой!\n\n"
-            f"Максимальный размер резюме: {MAX_RESUME_SIZE_MB} МБ\n"
-            f"Размер вашего файла: {document.file_size / (1024 * 1024):.2f} МБ\n\n"
-            f"Пожалуйста, уменьшите размер файла и отправьте снова."
+        await outbound.answer(
+            message,
+            messages('upload.too_large', size_mb=document.file_size / (1024 * 1024))
         )
         return
 
@@ -319,90 +326,157 @@ async def process_resume(message: Message, state: FSMContext):
     vacancy_id = user_data["vacancy_id"]
     candidate_id = user_data["candidate_id"]
 
-    # Сохраняем файл локально (временное хранение)
-    file_path = os.path.join(RESUMES_DIR, f"{candidate_id}_{vacancy_id}")
-    await message.bot.download(document, destination=file_path)
-
-    # Загружаем файл в S3
-    s3_key = None
-    if storage_service.is_available():
-        s3_key = storage_service.upload_file(file_path, candidate_id, vacancy_id)
-        try:
-            os.remove(file_path)
-        except Exception as e:
-            logger.error(f"Can't delete temp file: {e}")
-    else:
-        logger.error("S3 unavailable")
+    # Проверяем PDF и загружаем его в S3: поврежденный файл не доходит ни до S3, ни до скрининга.
+    # Если S3 недоступен, файл ждет в очереди на диске, а подтверждение кандидат получит позже
+    ingested = await ingest_resume(message.bot, document, candidate_id, vacancy_id, owner=state.key)
+    if not ingested.check.ok:
+        # Ответы на резюме, не прошедшее проверку PDF (pdf_validator)
+        reason = ingested.check.reason if f'upload.rejected.{ingested.check.reason}' in messages else 'corrupt'
+        await outbound.answer(message, messages(f'upload.rejected.{reason}'))
+        return
+    if not ingested.s3_key and not ingested.spooled:
+        await outbound.answer(message, messages('error.connection'))
         return
 
     # Подтверждение получения данных
     try:
-        confirmation = (
-            f"✅ Данные приняты!\n\n"
-            f"👤 {user_data['name']}\n"
-            f"📱 {user_data['phone']}\n"
-            f"💬 {user_data.get('telegram_username', 'не указан')}\n"
-            f"🏙 {user_data['city']}\n"
-            f"📄 {document.file_name}"
+        confirmation = messages(
+            'upload.accepted',
+            name=user_data['name'],
+            phone=user_data['phone'],
+            username=user_data.get('telegram_username', messages('upload.username_missing')),
+            city=user_data['city'],
+            file_name=document.file_name,
         )
-        if s3_key:
-            confirmation += f"\n\n☁️ Резюме сохранено в облачном хранилище"
-        else:
-            confirmation += f"\n\n⚠️ Резюме сохранено локально (S3 недоступен)"
+        confirmation += messages('upload.stored_note' if ingested.s3_key else 'upload.deferred_note')
 
-        await message.answer(confirmation)
+        await outbound.answer(message, confirmation)
     except Exception as e:
         logger.error(f"Error in s3: {e}")
-        await message.answer("❌ Проблемы с подключением, повторите попытку позже")
+        await outbound.answer(message, messages('error.connection'))
         return
 
-    # Запуск скрининга
-    await backend_client.process_screening(candidate_id, vacancy_id)
+    if ingested.spooled:
+        await state.set_state(RegistrationStates.waiting_for_screening)
+        return
+
+    # Тот же файл, уже прошедший скрининг, повторно не отправляется - берется готовый результат
+    await start_screening(message.bot, state, candidate_id, vacancy_id, ingested.sha256,
+                          trigger=not (ingested.duplicate and ingested.screened))
+
+
+async def start_screening(bot: Bot, state: FSMContext, candidate_id: int, vacancy_id, sha256: Optional[str],
+                          trigger: bool = True) -> bool:
+    """Запуск скрининга в фоне: результат придет отдельным сообщением"""
+    chat_id = state.key.chat_id
+    job = ScreeningJob(
+        candidate_id=candidate_id,
+        vacancy_id=vacancy_id,
+        on_result=on_screening_result,
+        context={'bot': bot, 'chat_id': chat_id, 'state': state, 'sha256': sha256},
+        trigger=trigger,
+    )
+    status_service.invalidate(candidate_id, vacancy_id)
+    # Состояние ставится до постановки задачи: быстрый результат скрининга не должен быть перезаписан
+    await state.set_state(RegistrationStates.waiting_for_screening)
+    if not screening_manager.submit(job):
+        await state.set_state(RegistrationStates.waiting_for_resume)
+        await outbound.send_message(bot, chat_id, messages('error.connection'))
+        return False
+
+    await outbound.send_message(bot, chat_id, messages('screening.started'))
+    return True
+
+
+async def on_spooled_resume_stored(bot: Bot, storage: BaseStorage, entry: SpoolEntry, s3_key: str):
+    """Резюме из очереди на диске загружено в S3 (вызывается загрузчиком resume_spool)"""
+    state = FSMContext(
+        storage=storage,
+        key=StorageKey(bot_id=entry.bot_id, chat_id=entry.chat_id, user_id=entry.user_id),
+    )
+    if await state.get_state() != RegistrationStates.waiting_for_screening:
+        # Кандидат тем временем начал регистрацию заново - файл сохранен, но скрининг не запускается
+        logger.info(f"Spooled resume {s3_key} stored, candidate {entry.candidate_id} moved on")
+        return
+
+    await outbound.send_message(bot, entry.chat_id, messages('upload.stored_later'))
+    await start_screening(bot, state, entry.candidate_id, entry.vacancy_id, entry.sha256)
+
+
+async def on_screening_result(job: ScreeningJob, screening_result: Optional[dict], code: int):
+    """Уведомление кандидата о результате скрининга"""
+    bot: Bot = job.context['bot']
+    chat_id: int = job.context['chat_id']
+    state: FSMContext = job.context['state']
+    vacancy_id = job.vacancy_id
 
-    # Получаем результат скрининга
-    screening_result, code = await backend_client.get_screening_status(candidate_id, vacancy_id)
     if code == 404:
-        await message.answer(
-            f"❌ Вы пытаетесь подать резюме на несуществующую вакансию.\n",
-            f"Свяжитесь с HR-менеджером для уточнения деталей."
+        await state.set_state(RegistrationStates.waiting_for_resume)
+        await outbound.send_message(
+            bot, chat_id,
+            messages('screening.unknown_vacancy')
         )
-    if screening_result:
-        if screening_result['status'] == "screening_ok":
-            # Резюме прошло проверку - предлагаем интервью
-            try:
-                await message.answer("🎉 Хорошие новости!")
-            except:
-                pass
-
-            try:
-                questions, _ = await backend_client.get_questions_by_vacancy_id(vacancy_id)
-                await message.answer(
-                    f"Приглашаем на интервью!\n"
-                    f"Вопросов: {len(questions)}\n"
-                    f"Время на каждый вопрос будет ограничено.",
-                    reply_markup=get_ready_for_interview_keyboard()
-                )
-                await state.set_state(InterviewStates.waiting_for_start)
-            except Exception as e:
-                logger.error(f"error in send invitation to an interview: {e}")
-        else:
-            # Резюме не прошло проверку
-            try:
-                await message.answer("😔 К сожалению вы не подходите для данной вакансии.")
-                await state.set_state(InterviewStates.rejected)
-            except:
-                pass
-    else:
+        return
+    if not screening_result:
         logger.error(f"Empty in get screening result")
-        await message.answer("❌ Проблемы с подключением, повторите попытку позже")
+        await state.set_state(RegistrationStates.waiting_for_resume)
+        await outbound.send_message(bot, chat_id, messages('error.connection'))
+        return
+
+    status = screening_result.get('status')
+    if status not in FINAL_SCREENING_STATUSES:
+        await outbound.send_message(
+            bot, chat_id,
+            messages('screening.slow')
+        )
+        return
+
+    status_service.remember(job.candidate_id, vacancy_id, screening_result)
+    if job.context.get('sha256'):
+        await resume_index.mark_screened(job.candidate_id, vacancy_id, job.context['sha256'])
+
+    if status == "screening_ok":
+        # Резюме прошло проверку - предлагаем интервью, вопросы загружаем заранее
+        backend_client.prefetch_questions(vacancy_id)
+        try:
+            await outbound.send_message(bot, chat_id, messages('screening.good_news'))
+        except Exception as e:
+            logger.warning(f"Failed to send message: {e}")
+
+        try:
+            questions, _ = await backend_client.get_questions_by_vacancy_id(vacancy_id)
+            await outbound.send_message(
+                bot, chat_id,
+                messages('screening.invitation', questions=len(questions)),
+                reply_markup=get_ready_for_interview_keyboard()
+            )
+            await state.set_state(InterviewStates.waiting_for_start)
+        except Exception as e:
+            logger.error(f"error in send invitation to an interview: {e}")
+    else:
+        # Резюме не прошло проверку
+        try:
+            await outbound.send_message(bot, chat_id, messages('screening.rejected'))
+            await state.set_state(InterviewStates.rejected)
+        except Exception as e:
+            logger.warning(f"Failed to send message: {e}")
+
+
+@router.message(RegistrationStates.waiting_for_screening)
+async def screening_in_progress(message: Message):
+    """Сообщения во время проверки резюме"""
+    await outbound.answer(
+        message,
+        messages('screening.in_progress')
+    )
 
 
 @router.message(RegistrationStates.waiting_for_resume)
 async def wrong_resume_format(message: Message):
     """Обработка неправильного формата резюме"""
-    await message.answer(
-        "❌ Пожалуйста, отправьте файл резюме (PDF), а не текст.\n\n"
-        "Прикрепите файл через скрепку 📎"
+    await outbound.answer(
+        message,
+        messages('upload.wrong_content')
     )
 
 
@@ -430,16 +504,16 @@ async def start_interview_process(message: Message, state: FSMContext):
     )
 
     try:
-        await message.answer("🎯 Начинаем интервью!")
-    except:
-        pass
+        await outbound.answer(message, messages('interview.start'))
+    except Exception as e:
+        logger.warning(f"Failed to send message: {e}")
     try:
-        await message.answer("Отвечайте текстовыми сообщениями.")
-    except:
-        pass
+        await outbound.answer(message, messages('interview.answer_hint'))
+    except Exception as e:
+        logger.warning(f"Failed to send message: {e}")
 
     await asyncio.sleep(1)
-    await ask_question(message, state)
+    await ask_question(message.bot, state)
 
 
 @router.callback_query(F.data == "not_ready", InterviewStates.waiting_for_start)
@@ -454,24 +528,30 @@ async def not_ready_for_interview(callback: CallbackQuery, state: FSMContext):
         # Сохраняем информацию о том, что кандидат ожидает прохождения интервью
         mock_db.save_pending_interview(callback.from_user.id, candidate)
 
-    await callback.message.edit_text(
-        "👌 Хорошо, вы можете пройти интервью позже.\n\n"
-        "Когда будете готовы, используйте команду /resume чтобы продолжить."
+    await outbound.edit_text(
+        callback.message,
+        messages('interview.postponed')
     )
 
 
-async def ask_question(message: Message, state: FSMContext):
+def question_timer_key(key: StorageKey) -> str:
+    """Ключ таймера вопроса для кандидата"""
+    return f"question:{key.bot_id}:{key.chat_id}:{key.user_id}"
+
+
+async def ask_question(bot: Bot, state: FSMContext):
     """Задать вопрос"""
     data = await state.get_data()
     questions = data['questions']
     question_num = data['question_num']
 
     if question_num >= len(questions):
-        await finish_interview(message, state)
+        await finish_interview(bot, state)
         return
 
     time_limit = questions[question_num]['time_limit']
-    question_start_time = asyncio.get_event_loop().time()
+    # Время по часам системы, чтобы оно оставалось верным после перезапуска
+    question_start_time = time.time()
 
     await state.update_data(
         question=questions[question_num],
@@ -481,21 +561,43 @@ async def ask_question(message: Message, state: FSMContext):
     )
     await state.set_state(InterviewStates.answering_question)
 
-    question_msg = await message.answer(
-        f"❓ <b>Вопрос {question_num + 1} из {len(questions)}:</b>\n\n"
-        f"{questions[question_num]['content']}\n\n"
-        f"⏱ Обратите внимание! У вас {time_limit} секунд на ответ.",
-        parse_mode="HTML"
+    question_msg = await outbound.send_message(
+        bot,
+        state.key.chat_id,
+        messages(
+            'interview.question',
+            number=question_num + 1,
+            total=len(questions),
+            content=questions[question_num]['content'],
+            time_limit=time_limit,
+        ),
+        parse_mode="HTML",
+        priority=Priority.CRITICAL
     )
 
     await state.update_data(question_message_id=question_msg.message_id)
 
-    asyncio.create_task(question_timer(message, state, time_limit, question_num))
+    deadline_scheduler.schedule(
+        question_timer_key(state.key),
+        time_limit,
+        {
+            'bot_id': state.key.bot_id,
+            'chat_id': state.key.chat_id,
+            'user_id': state.key.user_id,
+            'question_num': question_num,
+            'time_limit': time_limit,
+        },
+    )
 
 
-async def question_timer(message: Message, state: FSMContext, time_limit: int, question_num: int):
-    """Таймер для вопроса"""
-    await asyncio.sleep(time_limit)
+async def on_question_timeout(bot: Bot, storage: BaseStorage, payload: dict):
+    """Время на вопрос вышло (вызывается планировщиком дедлайнов)"""
+    state = FSMContext(
+        storage=storage,
+        key=StorageKey(bot_id=payload['bot_id'], chat_id=payload['chat_id'], user_id=payload['user_id']),
+    )
+    question_num = payload['question_num']
+    time_limit = payload['time_limit']
 
     current_state = await state.get_state()
     if current_state == InterviewStates.answering_question:
@@ -509,7 +611,7 @@ async def question_timer(message: Message, state: FSMContext, time_limit: int, q
             if len(answers) <= question_num:
                 answers.append("skipped")
 
-                await backend_client.post_answer_by_question_id(
+                await answer_queue.submit(
                     data['candidate_id'],
                     data['question']['id'],
                     "skipped",
@@ -522,14 +624,16 @@ async def question_timer(message: Message, state: FSMContext, time_limit: int, q
                     timer_active=False
                 )
 
-                await message.answer(
-                    "⏰ <b>Время вышло!</b>\n\n"
-                    "Вопрос пропущен. Переходим к следующему...",
-                    parse_mode="HTML"
+                await outbound.send_message(
+                    bot,
+                    state.key.chat_id,
+                    messages('interview.timeout'),
+                    parse_mode="HTML",
+                    priority=Priority.CRITICAL
                 )
 
                 await asyncio.sleep(2)
-                await ask_question(message, state)
+                await ask_question(bot, state)
 
 
 @router.message(InterviewStates.answering_question)
@@ -539,20 +643,21 @@ async def process_answer(message: Message, state: FSMContext):
 
     question_start_time = data.get('question_start_time')
     if not question_start_time:
-        await message.answer("❌ Ошибка: время начала вопроса не установлено")
+        await outbound.answer(message, messages('interview.no_start_time'))
         return
 
-    elapsed = asyncio.get_event_loop().time() - question_start_time
+    elapsed = time.time() - question_start_time
     time_limit = data.get('current_time_limit', 0)
 
     if elapsed > time_limit:
-        await message.answer(
-            "⏰ К сожалению, время на ответ истекло.\n"
-            "Этот ответ не будет учтен."
+        await outbound.answer(
+            message,
+            messages('interview.late_answer')
         )
         return
 
     await state.update_data(timer_active=False)
+    deadline_scheduler.cancel(question_timer_key(state.key))
 
     answers = data.get('answers', [])
     current_q = data['question_num']
@@ -562,7 +667,8 @@ async def process_answer(message: Message, state: FSMContext):
     else:
         answers[current_q] = message.text
 
-    await backend_client.post_answer_by_question_id(
+    # Ответ записан в журнал, на бэкенд он уйдет в фоне
+    await answer_queue.submit(
         data['candidate_id'],
         data['question']['id'],
         message.text,
@@ -574,16 +680,17 @@ async def process_answer(message: Message, state: FSMContext):
         question_num=current_q + 1
     )
 
-    await message.answer(
-        "✅ Ответ принят!",
+    await outbound.answer(
+        message,
+        messages('interview.answer_accepted'),
         parse_mode="HTML"
     )
 
     await asyncio.sleep(1)
-    await ask_question(message, state)
+    await ask_question(message.bot, state)
 
 
-async def finish_interview(message: Message, state: FSMContext):
+async def finish_interview(bot: Bot, state: FSMContext):
     """Завершение интервью"""
     # Проверяем, не завершено ли уже интервью (защита от дублирования)
     current_state = await state.get_state()
@@ -601,39 +708,50 @@ async def finish_interview(message: Message, state: FSMContext):
 
     answered = sum(1 for a in answers if a != "skipped")
 
-    await message.answer(
-        f"🎊 <b>Интервью завершено!</b>\n\n"
-        f"📊 Статистика:\n"
-        f"• Всего вопросов: {len(questions)}\n"
-        f"• Отвечено: {answered}\n"
-        f"• Пропущено: {len(answers) - answered}\n\n"
-        f"✅ Все ваши ответы сохранены и отправлены на анализ.\n\n"
-        f"⏳ Пожалуйста, подождите результаты проверки...",
+    await outbound.send_message(
+        bot,
+        state.key.chat_id,
+        messages('interview.finished', total=len(questions), answered=answered, skipped=len(answers) - answered),
         parse_mode="HTML"
     )
 
     candidate_id = data['candidate_id']
     vacancy_id = data['vacancy_id']
 
+    # Статус обновляем только после того, как все ответы дошли до бэкенда
+    await answer_queue.drain(candidate_id)
+
     # Получаем результат интервью
     await backend_client.post_update_status(candidate_id, vacancy_id)
-    interview_result, _ = await backend_client.get_screening_status(candidate_id, vacancy_id)
-    if interview_result['status'] == "interview_ok":
+    status_service.invalidate(candidate_id, vacancy_id)
+    # fresh: ответ уже идущего запроса статуса мог быть прочитан до post_update_status
+    interview_result, _ = await backend_client.get_screening_status(candidate_id, vacancy_id, fresh=True)
+    if interview_result is None:
+        # Бэкенд недоступен: результат кандидат узнает позже через /resume
+        logger.error(f"Failed to get interview result for candidate {candidate_id}")
+        await outbound.send_message(
+            bot,
+            state.key.chat_id,
+            messages('interview.result_pending')
+        )
+        return
+    status_service.remember(candidate_id, vacancy_id, interview_result)
+    if interview_result.get('status') == "interview_ok":
         # Прошел интервью
         await state.set_state(InterviewStates.passed)
-        await message.answer(
-            f"🎉 <b>Поздравляем!</b>\n\n"
-            f"📧 С вами свяжется наш HR-менеджер для обсуждения следующих шагов.\n\n"
-            f"Спасибо за участие!",
+        await outbound.send_message(
+            bot,
+            state.key.chat_id,
+            messages('interview.passed'),
             parse_mode="HTML"
         )
     else:
         # Не прошел интервью
         await state.set_state(InterviewStates.rejected)
-        await message.answer(
-            f"😔 <b>К сожалению вы не подходите для данной вакансии.</b>\n\n"
-            f"Мы ценим ваше время и интерес к нашей компании.\n"
-            f"Желаем успехов в карьере!",
+        await outbound.send_message(
+            bot,
+            state.key.chat_id,
+            messages('interview.rejected'),
             parse_mode="HTML"
         )
 
@@ -641,19 +759,43 @@ async def finish_interview(message: Message, state: FSMContext):
 # ==================== БЫСТРЫЕ ВОПРОСЫ ====================
 
 @router.callback_query(F.data == "q_status")
-async def answer_status(callback: CallbackQuery):
+async def answer_status(callback: CallbackQuery, state: FSMContext):
     """Ответ на вопрос о статусе"""
     await callback.answer()
 
-    # Получаем статус из "базы данных" (заглушка)
-    status_data = mock_db.get_candidate_status(callback.from_user.id)
+    data = await state.get_data()
+    candidate_id = data.get("candidate_id")
+    vacancy_id = data.get("vacancy_id")
+    if not candidate_id:
+        res, _ = await backend_client.get_candidate(callback.from_user.id)
+        if res:
+            candidate_id = res['id']
 
-    await callback.message.answer(
-        f"📊 <b>Ваш текущий статус:</b>\n\n"
-        f"🔹 {status_data['text']}\n\n"
-        f"{status_data['description']}\n\n"
-        f"Мы уведомим вас о любых изменениях!",
-        parse_mode="HTML"
+    if not candidate_id or not vacancy_id:
+        await outbound.answer(callback.message, messages('resume.no_active'), priority=Priority.LOW)
+        return
+
+    # Статус с бэкенда через кэш: кнопку нажимают часто, итоговые статусы кэшируются надолго
+    meta, code = await status_service.get_status(candidate_id, vacancy_id)
+    if code == 404:
+        await outbound.answer(callback.message, messages('resume.no_process'), priority=Priority.LOW)
+        return
+    if not meta:
+        await outbound.answer(callback.message, messages('faq.status_unavailable'), priority=Priority.LOW)
+        return
+
+    status = meta.get('status')
+    if f'status.{status}.text' not in messages:
+        status = 'unknown'
+    await outbound.answer(
+        callback.message,
+        messages(
+            'faq.status',
+            text=messages(f'status.{status}.text'),
+            description=messages(f'status.{status}.description'),
+        ),
+        parse_mode="HTML",
+        priority=Priority.LOW
     )
 
 
@@ -665,9 +807,11 @@ async def answer_timing(callback: CallbackQuery):
     # Получаем информацию о сроках (заглушка)
     timing_info = mock_db.get_timing_info()
 
-    await callback.message.answer(
+    await outbound.answer(
+        callback.message,
         timing_info,
-        parse_mode="HTML"
+        parse_mode="HTML",
+        priority=Priority.LOW
     )
 
 
@@ -679,20 +823,23 @@ async def answer_contact(callback: CallbackQuery):
     # Получаем контактную информацию (заглушка)
     contact_info = mock_db.get_contact_info()
 
-    await callback.message.answer(
+    await outbound.answer(
+        callback.message,
         contact_info,
-        parse_mode="HTML"
+        parse_mode="HTML",
+        priority=Priority.LOW
     )
 
 
 @router.callback_query(F.data == "q_close")
 async def close_questions(callback: CallbackQuery):
     """Закрыть меню вопросов"""
-    await callback.answer("Закрыто")
+    await callback.answer(messages('faq.closed'))
     try:
-        await callback.message.delete()
-    except:
-        await callback.message.edit_text(
-            "Меню закрыто.\n\n"
-            "Используйте /questions чтобы открыть снова."
+        await outbound.delete(callback.message, priority=Priority.LOW)
+    except Exception:
+        await outbound.edit_text(
+            callback.message,
+            messages('faq.menu_closed'),
+            priority=Priority.LOW
         )
@@ -1,50 +1,59 @@
 """
 Клавиатуры для бота
+
+Клавиатуры не зависят от кандидата, поэтому создаются один раз при импорте: объекты aiogram
+неизменяемы, а зарегистрированные через freeze() сериализуются при первой отправке
+(см. messages.CatalogSession).
 """
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 
+from messages import freeze
+
+START_KEYBOARD = freeze(ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text="Продолжить")]
+    ],
+    resize_keyboard=True
+))
+
+READY_FOR_INTERVIEW_KEYBOARD = freeze(InlineKeyboardMarkup(
+    inline_keyboard=[
+        [InlineKeyboardButton(text="Готов пройти интервью", callback_data="start_interview")],
+        [InlineKeyboardButton(text="Пока не готов", callback_data="not_ready")]
+    ]
+))
+
+ANSWER_KEYBOARD = freeze(InlineKeyboardMarkup(
+    inline_keyboard=[
+        [InlineKeyboardButton(text="Ответить", callback_data="answer_question")]
+    ]
+))
+
+QUICK_QUESTIONS_KEYBOARD = freeze(InlineKeyboardMarkup(
+    inline_keyboard=[
+        [InlineKeyboardButton(text="📊 Какой мой статус?", callback_data="q_status")],
+        [InlineKeyboardButton(text="⏰ Когда ждать ответа?", callback_data="q_timing")],
+        [InlineKeyboardButton(text="📞 Как с вами связаться?", callback_data="q_contact")],
+        [InlineKeyboardButton(text="❌ Закрыть", callback_data="q_close")]
+    ]
+))
+
 
 def get_start_keyboard() -> ReplyKeyboardMarkup:
     """Клавиатура для начала работы"""
-    keyboard = ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="Продолжить")]
-        ],
-        resize_keyboard=True
-    )
-    return keyboard
+    return START_KEYBOARD
 
 
 def get_ready_for_interview_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура для подтверждения готовности к интервью"""
-    keyboard = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text="Готов пройти интервью", callback_data="start_interview")],
-            [InlineKeyboardButton(text="Пока не готов", callback_data="not_ready")]
-        ]
-    )
-    return keyboard
+    return READY_FOR_INTERVIEW_KEYBOARD
 
 
 def get_answer_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура для ответа на вопрос"""
-    keyboard = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text="Ответить", callback_data="answer_question")]
-        ]
-    )
-    return keyboard
+    return ANSWER_KEYBOARD
 
 
 def get_quick_questions_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура с быстрыми вопросами"""
-    keyboard = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text="📊 Какой мой статус?", callback_data="q_status")],
-            [InlineKeyboardButton(text="⏰ Когда ждать ответа?", callback_data="q_timing")],
-            [InlineKeyboardButton(text="📞 Как с вами связаться?", callback_data="q_contact")],
-            [InlineKeyboardButton(text="❌ Закрыть", callback_data="q_close")]
-        ]
-    )
-    return keyboard
-
+    return QUICK_QUESTIONS_KEYBOARD
@@ -1,17 +1,44 @@
 """
 Главный файл бота
 """
+import time
+
+# Отсчет времени запуска: импорт модулей бота входит в метрики bot_startup_seconds
+PROCESS_STARTED = time.perf_counter()
+
 import asyncio
 import logging
 import sys
+from contextlib import asynccontextmanager
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
 from aiogram.types import BotCommand
 
-from config import BOT_TOKEN
-from handlers import router
+from answer_queue import answer_queue
+from backend_client import get_backend_client
+from config import BOT_TOKEN, BOT_MODE, WORKERS, TELEGRAM_API_URL, METRICS_PORT, RECORD_UPDATES_PATH, \
+    RETENTION_INTERVAL, ANSWERS_JOURNAL_PATH, TIMERS_DB_PATH, RESUME_SPOOL_DIR
+from fsm_storage import build_fsm_storage
+from handlers import router, on_question_timeout, on_spooled_resume_stored
+from metrics import ACTIVE_INTERVIEWS, BACKEND_CONNECTIONS_IN_USE, PENDING_TIMERS, QUEUE_SIZE, STARTUP_SECONDS, \
+    start_metrics_server
+from messages import CatalogSession
+from middlewares import HandlerMetricsMiddleware, FirstUpdateMiddleware
+from outbound import outbound
+from pdf_validator import pdf_validator
+from recorder import UpdateRecorder
+from resume_index import resume_index
+from resume_spool import resume_spool
+from retention import run_periodically
+from s3_service import storage_service
+from screening import screening_manager
+from status_service import status_service
+from timers import deadline_scheduler, take_deadlines
+from util import indexed_paths
+from webhook import run_webhook
 
 # Настройка логирования
 logging.basicConfig(
@@ -21,6 +48,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+STARTUP_SECONDS.labels('imports').set(time.perf_counter() - PROCESS_STARTED)
+
 
 async def set_bot_commands(bot: Bot):
     """Установка команд бота для меню"""
@@ -28,36 +57,181 @@ async def set_bot_commands(bot: Bot):
         BotCommand(command="resume", description="▶️ Продолжить"),
         BotCommand(command="questions", description="❓ Часто задаваемые вопросы"),
     ]
-    await bot.set_my_commands(commands)
-
+    try:
+        await bot.set_my_commands(commands)
+    except Exception as e:
+        logger.error(f"Failed to set bot commands: {e}")
 
-async def main():
-    """Запуск бота"""
-    if not BOT_TOKEN:
-        logger.error("Не указан BOT_TOKEN! Создайте файл .env и добавьте туда токен бота.")
-        return
 
-    # Инициализация бота и диспетчера
-    bot = Bot(
+def create_bot() -> Bot:
+    """Создание экземпляра бота"""
+    # Сессия с кэшем сериализованных клавиатур из каталога сообщений
+    session = CatalogSession()
+    if TELEGRAM_API_URL:
+        session.api = TelegramAPIServer.from_base(TELEGRAM_API_URL)
+    return Bot(
         token=BOT_TOKEN,
+        session=session,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
-    dp = Dispatcher()
 
-    # Регистрация роутера
+
+def create_dispatcher() -> Dispatcher:
+    """Создание диспетчера с хранилищем FSM и роутером"""
+    dp = Dispatcher(storage=build_fsm_storage())
+    dp.update.outer_middleware(FirstUpdateMiddleware(PROCESS_STARTED))
+    # Inner middleware диспетчера применяется ко всем обработчикам вложенных роутеров
+    handler_metrics = HandlerMetricsMiddleware()
+    dp.message.middleware(handler_metrics)
+    dp.callback_query.middleware(handler_metrics)
     dp.include_router(router)
+    return dp
+
+
+def register_service_gauges():
+    """Gauge, значения которых берутся из сервисов при запросе /metrics"""
+    ACTIVE_INTERVIEWS.set_function(lambda: deadline_scheduler.count('question'))
+    PENDING_TIMERS.set_function(lambda: len(deadline_scheduler))
+    QUEUE_SIZE.labels('screening').set_function(lambda: screening_manager.get_stats()['queued'])
+    QUEUE_SIZE.labels('answers').set_function(lambda: answer_queue.get_stats()['pending'])
+    QUEUE_SIZE.labels('outbound').set_function(lambda: outbound.get_stats()['queued'])
+    QUEUE_SIZE.labels('resume_spool').set_function(lambda: resume_spool.get_stats()['pending'])
+    BACKEND_CONNECTIONS_IN_USE.set_function(lambda: get_backend_client().get_pool_stats()['in_use'])
+
+
+async def warm_up_services(backend_client):
+    """Прогрев внешних зависимостей в фоне, пока бот уже принимает обновления"""
+    started = time.perf_counter()
+    results = await asyncio.gather(backend_client.start(), storage_service.warm_up(), pdf_validator.warm_up(),
+                                   return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error(f"Warm-up failed: {result!r}")
+    elapsed = time.perf_counter() - started
+    STARTUP_SECONDS.labels('warm_up').set(elapsed)
+    logger.info(f"Services warmed up in {elapsed:.2f}s")
+
+
+@asynccontextmanager
+async def bot_services(bot: Bot, dp: Dispatcher, timers_db: str = None, answers_journal: str = None,
+                       metrics_port: int = METRICS_PORT, record_path: str = RECORD_UPDATES_PATH,
+                       retention_interval: float = RETENTION_INTERVAL, resume_spool_dir: str = None):
+    """
+    Фоновые сервисы бота: сессия бэкенда, воркеры скрининга, таймеры вопросов, очередь ответов
+
+    Args:
+        timers_db: Отдельный файл таймеров (для воркеров с шардированием)
+        answers_journal: Отдельный журнал ответов (для воркеров с шардированием)
+        metrics_port: Порт HTTP-сервера /metrics (0 - не запускать)
+        record_path: Журнал записи обновлений и ответов бэкенда (пусто - не записывать)
+        retention_interval: Период очистки хранилища резюме, часов (0 - не запускать)
+        resume_spool_dir: Отдельная очередь незагруженных резюме (для воркеров с шардированием)
+    """
+    started = time.perf_counter()
+    # aiogram закрывает хранилище FSM в dp.shutdown, то есть до остановки таймеров и очереди резюме,
+    # обработчики которых в него пишут: хранилище закрывается в конце остановки сервисов
+    dp.shutdown.handlers[:] = [handler for handler in dp.shutdown.handlers if handler.callback != dp.fsm.close]
+    # Общая HTTP-сессия к бэкенду живет столько же, сколько бот; открывается при прогреве или первом запросе
+    backend_client = get_backend_client()
+    screening_manager.start()
+    # Неотправленные ответы из журнала уходят на бэкенд сразу после запуска
+    await answer_queue.start(answers_journal)
+
+    # Таймеры вопросов: один планировщик, дедлайны восстанавливаются после перезапуска
+    async def on_deadline(key, payload):
+        await on_question_timeout(bot, dp.storage, payload)
 
-    # Установка команд для меню
-    await set_bot_commands(bot)
+    await deadline_scheduler.start(on_deadline, path=timers_db)
+
+    # Резюме, не загруженные в S3 сразу: загрузка в фоне и подтверждение кандидату
+    async def on_resume_stored(entry, s3_key):
+        await on_spooled_resume_stored(bot, dp.storage, entry, s3_key)
+
+    await resume_spool.start(on_resume_stored, resume_spool_dir)
+
+    register_service_gauges()
+    metrics_runner = await start_metrics_server(metrics_port)
+
+    # Запись трафика для воспроизведения (bench/replay.py)
+    recorder = None
+    if record_path:
+        recorder = UpdateRecorder(record_path)
+        await recorder.start()
+        dp.update.outer_middleware(recorder)
+        backend_client.add_response_listener(recorder.record_backend)
+
+    # Клиент хранилища и сессия бэкенда создаются параллельно с запуском приема обновлений
+    warm_up = asyncio.create_task(warm_up_services(backend_client))
+    retention = asyncio.create_task(run_periodically(retention_interval)) if retention_interval > 0 else None
+    STARTUP_SECONDS.labels('services').set(time.perf_counter() - started)
 
     try:
-        # Удаляем старые обновления и запускаем polling
-        await bot.delete_webhook(drop_pending_updates=True)
-        await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
+        yield
     finally:
+        for task in (warm_up, retention):
+            if task is not None and not task.done():
+                task.cancel()
+        await asyncio.gather(*(t for t in (warm_up, retention) if t is not None), return_exceptions=True)
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        if recorder is not None:
+            backend_client.remove_response_listener(recorder.record_backend)
+            await recorder.stop()
+        await deadline_scheduler.stop()
+        await resume_spool.stop()
+        await screening_manager.stop()
+        await dp.fsm.close()
+        await resume_index.close()
+        await answer_queue.stop()
+        await outbound.stop()
+        logger.info(f"Backend pool stats: {backend_client.get_pool_stats()}")
+        logger.info(f"Backend resilience stats: {backend_client.get_resilience_stats()}")
+        logger.info(f"Status cache stats: {status_service.get_stats()}")
+        await backend_client.close()
+        logger.info(f"Presigned URL cache stats: {storage_service.get_url_cache_stats()}")
+        storage_service.shutdown()
+        logger.info(f"PDF validation stats: {pdf_validator.get_stats()}")
+        pdf_validator.shutdown()
         await bot.session.close()
 
 
+async def main():
+    """Запуск бота"""
+    if not BOT_TOKEN:
+        logger.error("Не указан BOT_TOKEN! Создайте файл .env и добавьте туда токен бота.")
+        return
+
+    if WORKERS > 1:
+        # Несколько процессов-воркеров, обновления распределяются по user_id
+        from sharding import Supervisor
+        await Supervisor(WORKERS).run()
+        return
+
+    # Инициализация бота и диспетчера
+    bot = create_bot()
+    dp = create_dispatcher()
+
+    async with bot_services(bot, dp):
+        # Неотправленные ответы, незагруженные резюме и таймеры воркеров прежнего запуска с шардированием
+        for path in indexed_paths(ANSWERS_JOURNAL_PATH).values():
+            await answer_queue.adopt(path)
+        for path in indexed_paths(RESUME_SPOOL_DIR).values():
+            await resume_spool.adopt(path)
+        for path in indexed_paths(TIMERS_DB_PATH).values():
+            deadline_scheduler.adopt(await asyncio.to_thread(take_deadlines, path))
+
+        # Команды меню устанавливаются в фоне, не задерживая первое обновление
+        commands = asyncio.create_task(set_bot_commands(bot))
+
+        if BOT_MODE == 'webhook':
+            await run_webhook(dp, bot)
+        else:
+            # Удаляем старые обновления и запускаем polling
+            await bot.delete_webhook(drop_pending_updates=True)
+            # Сессию бота закрывает bot_services: таймеры могут отправлять сообщения до своей остановки
+            await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types(), close_bot_session=False)
+
+
 # ⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿
 # ⣿⣿⣿⣿⣿⣿⣿⣿⣿⠿⠻⠛⠛⠻⢿⣿⣿⣿⣿⣿⣿⣿⣿⣿
 # ⣿⣿⣿⣿⣿⣿⣿⣿⠁⠄⠄⠄⠄⠄⠄⠘⣿⣿⣿⣿⣿⣿⣿⣿
@@ -0,0 +1,407 @@
+"""
+Каталог сообщений бота: шаблоны, скомпилированные при импорте, и неизменяемые клавиатуры
+
+Шаблон с полями ("{name}", "{size:.2f}") один раз разбирается и компилируется в функцию
+с f-строкой, поэтому подстановка стоит как обычная f-строка, а сообщение без полей -
+готовая строка без копирования. Тексты сгруппированы по локалям; язык бота задается
+MESSAGES_LOCALE, отсутствующий в локали ключ берется из локали по умолчанию.
+
+Клавиатуры создаются один раз (объекты aiogram неизменяемы) и регистрируются через freeze():
+CatalogSession сериализует такую клавиатуру в JSON при первой отправке и дальше
+отдает готовую строку, не вызывая model_dump и json.dumps на каждое сообщение.
+"""
+import logging
+from string import Formatter
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.types import TelegramObject
+from aiohttp import FormData
+
+from config import MAX_RESUME_SIZE_MB, MESSAGES_LOCALE, RESUME_MAX_PAGES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCALE = 'ru'
+
+CATALOG: Dict[str, Dict[str, str]] = {
+    'ru': {
+        # ==================== Команды ====================
+        'start.welcome': (
+            "👋 Добро пожаловать!\n\n"
+            "Я помогу вам пройти процесс отбора.\n\n"
+            "📝 Приступим к сбору ваших данных.\n\n"
+            "Пожалуйста, введите ваше <b>ФИО</b>:"
+        ),
+        'start.no_link': (
+            "❌ <b>Ошибка</b>\n\n"
+            "Для начала работы перейдите по ссылке от рекрутера.\n\n"
+            "Обратитесь к HR-специалисту для получения корректной ссылки."
+        ),
+        'faq.menu': (
+            "❓ <b>Часто задаваемые вопросы</b>\n\n"
+            "Выберите интересующий вас вопрос:"
+        ),
+        'resume.no_active': (
+            "У вас нет активных интервью.\n\n"
+            "Используйте ссылку от рекрутера, чтобы начать новое интервью."
+        ),
+        'resume.upload_prompt': (
+            "📎 Теперь отправьте ваше <b>резюме</b> в формате PDF\n"
+            "(максимальный размер: {max_mb} МБ):"
+        ),
+        'resume.info_failed': (
+            "❌ Не удалось получить информацию о вашем интервью.\n\n"
+            "Пожалуйста, используйте ссылку от рекрутера для начала нового интервью."
+        ),
+        'resume.welcome_back': (
+            "👋 С возвращением!\n\n"
+            "Вы прошли скрининг резюме.\n"
+            "Готовы начать интервью?"
+        ),
+        'resume.screening_failed': (
+            "😔 К сожалению, вы не прошли этап скрининга резюме.\n\n"
+            "Для участия в других вакансиях используйте новую ссылку от рекрутера."
+        ),
+        'resume.interview_ok': (
+            "🎉 Поздравляем! Вы успешно прошли интервью!\n\n"
+            "📧 С вами свяжется наш HR-менеджер для обсуждения следующих шагов."
+        ),
+        'resume.interview_failed': (
+            "😔 К сожалению, вы не прошли интервью.\n\n"
+            "Мы ценим ваше время и интерес к нашей компании.\n"
+            "Желаем успехов в поиске работы!"
+        ),
+        'resume.no_process': (
+            "У вас нет активных интервью.\n\n"
+            "Используйте ссылку от HR-менеджера, чтобы начать новый процесс отбора."
+        ),
+        'resume.error': (
+            "❌ Произошла ошибка при проверке статуса интервью.\n\n"
+            "Пожалуйста, попробуйте позже или используйте ссылку от рекрутера для нового интервью."
+        ),
+
+        # ==================== Регистрация ====================
+        'registration.ask_phone': (
+            "✅ Принято!\n\n"
+            "Введите ваш <b>номер телефона</b> (например: +79991234567):"
+        ),
+        'registration.invalid_phone': (
+            "❌ <b>Неверный формат номера телефона!</b>\n\n"
+            "Пожалуйста, введите номер в одном из форматов:\n"
+            "• +79991234567\n"
+            "Номер должен содержать 11 цифр после кода страны."
+        ),
+        'registration.ask_city': (
+            "✅ Принято!\n\n"
+            "Введите ваш <b>город проживания</b>:"
+        ),
+        'registration.ask_username': (
+            "✅ Принято!\n\n"
+            "Пожалуйста, введите ваш <b>Telegram username</b> (например: @username):"
+        ),
+        'registration.saved': (
+            "✅ Данные сохранены!\n\n"
+            "📎 Теперь отправьте ваше <b>резюме</b> в формате PDF\n"
+            "(максимальный размер: {max_mb} МБ):"
+        ),
+        'error.connection': "❌ Проблемы с подключением, повторите попытку позже",
+
+        # ==================== Резюме ====================
+        'upload.not_pdf_name': "❌ Пожалуйста, отправьте файл в формате PDF",
+        'upload.too_large': (
+            "❌ Файл слишком большой!\n\n"
+            "Максимальный размер резюме: {max_mb} МБ\n"
+            "Размер вашего файла: {size_mb:.2f} МБ\n\n"
+            "Пожалуйста, уменьшите размер файла и отправьте снова."
+        ),
+        'upload.rejected.not_pdf': "❌ Файл не является PDF-документом.\n\nПожалуйста, отправьте резюме в формате PDF",
+        'upload.rejected.corrupt': (
+            "❌ Не удалось открыть PDF: файл поврежден.\n\nСохраните резюме заново и отправьте снова."
+        ),
+        'upload.rejected.encrypted': "❌ PDF защищен паролем.\n\nПожалуйста, отправьте резюме без пароля.",
+        'upload.rejected.no_pages': "❌ В PDF нет ни одной страницы.\n\nПожалуйста, проверьте файл и отправьте снова.",
+        'upload.rejected.too_many_pages': (
+            "❌ Резюме слишком длинное (больше {max_pages} страниц).\n\n"
+            "Пожалуйста, сократите его и отправьте снова."
+        ),
+        'upload.accepted': (
+            "✅ Данные приняты!\n\n"
+            "👤 {name}\n"
+            "📱 {phone}\n"
+            "💬 {username}\n"
+            "🏙 {city}\n"
+            "📄 {file_name}"
+        ),
+        'upload.username_missing': "не указан",
+        'upload.stored_note': "\n\n☁️ Резюме сохранено в облачном хранилище",
+        'upload.deferred_note': (
+            "\n\n⚠️ Хранилище временно недоступно. Резюме будет загружено автоматически, "
+            "мы сообщим, когда начнем его проверку."
+        ),
+        'upload.stored_later': "☁️ Ваше резюме сохранено в облачном хранилище",
+        'upload.wrong_content': (
+            "❌ Пожалуйста, отправьте файл резюме (PDF), а не текст.\n\n"
+            "Прикрепите файл через скрепку 📎"
+        ),
+
+        # ==================== Скрининг ====================
+        'screening.started': "⏳ Проверяем ваше резюме. Мы пришлем результат, как только он будет готов.",
+        'screening.in_progress': (
+            "⏳ Ваше резюме еще проверяется.\n\n"
+            "Мы пришлем результат, как только он будет готов."
+        ),
+        'screening.unknown_vacancy': (
+            "❌ Вы пытаетесь подать резюме на несуществующую вакансию.\n"
+            "Свяжитесь с HR-менеджером для уточнения деталей."
+        ),
+        'screening.slow': (
+            "⏳ Проверка резюме занимает больше времени, чем обычно.\n\n"
+            "Используйте /resume чуть позже, чтобы узнать результат."
+        ),
+        'screening.good_news': "🎉 Хорошие новости!",
+        'screening.invitation': (
+            "Приглашаем на интервью!\n"
+            "Вопросов: {questions}\n"
+            "Время на каждый вопрос будет ограничено."
+        ),
+        'screening.rejected': "😔 К сожалению вы не подходите для данной вакансии.",
+
+        # ==================== Интервью ====================
+        'interview.start': "🎯 Начинаем интервью!",
+        'interview.answer_hint': "Отвечайте текстовыми сообщениями.",
+        'interview.postponed': (
+            "👌 Хорошо, вы можете пройти интервью позже.\n\n"
+            "Когда будете готовы, используйте команду /resume чтобы продолжить."
+        ),
+        'interview.question': (
+            "❓ <b>Вопрос {number} из {total}:</b>\n\n"
+            "{content}\n\n"
+            "⏱ Обратите внимание! У вас {time_limit} секунд на ответ."
+        ),
+        'interview.timeout': (
+            "⏰ <b>Время вышло!</b>\n\n"
+            "Вопрос пропущен. Переходим к следующему..."
+        ),
+        'interview.no_start_time': "❌ Ошибка: время начала вопроса не установлено",
+        'interview.late_answer': (
+            "⏰ К сожалению, время на ответ истекло.\n"
+            "Этот ответ не будет учтен."
+        ),
+        'interview.answer_accepted': "✅ Ответ принят!",
+        'interview.finished': (
+            "🎊 <b>Интервью завершено!</b>\n\n"
+            "📊 Статистика:\n"
+            "• Всего вопросов: {total}\n"
+            "• Отвечено: {answered}\n"
+            "• Пропущено: {skipped}\n\n"
+            "✅ Все ваши ответы сохранены и отправлены на анализ.\n\n"
+            "⏳ Пожалуйста, подождите результаты проверки..."
+        ),
+        'interview.result_pending': (
+            "⏳ Результаты еще обрабатываются.\n\n"
+            "Используйте /resume чуть позже, чтобы узнать результат."
+        ),
+        'interview.passed': (
+            "🎉 <b>Поздравляем!</b>\n\n"
+            "📧 С вами свяжется наш HR-менеджер для обсуждения следующих шагов.\n\n"
+            "Спасибо за участие!"
+        ),
+        'interview.rejected': (
+            "😔 <b>К сожалению вы не подходите для данной вакансии.</b>\n\n"
+            "Мы ценим ваше время и интерес к нашей компании.\n"
+            "Желаем успехов в карьере!"
+        ),
+
+        # ==================== Быстрые вопросы ====================
+        'faq.status': (
+            "📊 <b>Ваш текущий статус:</b>\n\n"
+            "🔹 {text}\n\n"
+            "{description}\n\n"
+            "Мы уведомим вас о любых изменениях!"
+        ),
+        'faq.status_unavailable': (
+            "❌ Не удалось узнать ваш статус.\n\n"
+            "Пожалуйста, попробуйте позже."
+        ),
+        'faq.closed': "Закрыто",
+
+        # ==================== Статусы кандидата ====================
+        'status.screening_in_progress.text': "Проверка резюме",
+        'status.screening_in_progress.description': "Ваше резюме проходит проверку",
+        'status.screening_ok.text': "Резюме одобрено",
+        'status.screening_ok.description': "Вы можете пройти интервью: используйте /resume",
+        'status.screening_failed.text': "Резюме не прошло проверку",
+        'status.screening_failed.description': (
+            "Для участия в других вакансиях используйте новую ссылку от рекрутера"
+        ),
+        'status.interview_ok.text': "Интервью пройдено",
+        'status.interview_ok.description': "Поздравляем! С вами свяжется HR-менеджер",
+        'status.interview_failed.text': "Интервью не пройдено",
+        'status.interview_failed.description': "Спасибо за участие! Желаем успехов в поиске работы",
+        'status.unknown.text': "На рассмотрении",
+        'status.unknown.description': "Ваша заявка обрабатывается",
+        'faq.menu_closed': (
+            "Меню закрыто.\n\n"
+            "Используйте /questions чтобы открыть снова."
+        ),
+    },
+}
+
+# Значения, общие для всех локалей (подставляются в шаблоны при компиляции)
+CONSTANTS = {'max_mb': MAX_RESUME_SIZE_MB, 'max_pages': RESUME_MAX_PAGES}
+
+
+# ==================== ШАБЛОНЫ ====================
+
+class Template:
+    """Шаблон сообщения, скомпилированный в функцию с f-строкой"""
+
+    __slots__ = ('key', 'text', 'fields', '_render')
+
+    def __init__(self, key: str, text: str, constants: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            key: Ключ в каталоге (для сообщений об ошибках)
+            text: Текст с полями в синтаксисе str.format
+            constants: Значения, известные при компиляции (подставляются сразу)
+        """
+        self.key = key
+        parts = list(Formatter().parse(text))
+        if constants:
+            # Константы подставляются один раз, остальные поля остаются полями шаблона
+            text = ''.join(
+                _escape_braces(literal) + (
+                    _escape_braces(format(constants[field], spec or '')) if field in constants
+                    else _field(field, conversion, spec)
+                ) if field is not None else _escape_braces(literal)
+                for literal, field, spec, conversion in parts
+            )
+            parts = list(Formatter().parse(text))
+
+        self.fields = tuple(field for _, field, _, _ in parts if field is not None)
+        for field in self.fields:
+            if not field.isidentifier():
+                raise ValueError(f"Template {key}: field {field!r} must be a plain name")
+        if not self.fields:
+            # Без полей - готовая строка ("{{" и "}}" раскрыты)
+            self.text = ''.join(literal for literal, _, _, _ in parts)
+            self._render = None
+        else:
+            self.text = text
+            self._render = _compile(key, text, sorted(set(self.fields)))
+
+    def __call__(self, **values) -> str:
+        if self._render is None:
+            return self.text
+        return self._render(**values)
+
+
+def _escape_braces(text: str) -> str:
+    return text.replace('{', '{{').replace('}', '}}')
+
+
+def _field(name: str, conversion: Optional[str], spec: Optional[str]) -> str:
+    return '{' + name + (f'!{conversion}' if conversion else '') + (f':{spec}' if spec else '') + '}'
+
+
+def _compile(key: str, text: str, fields) -> Callable[..., str]:
+    """Функция def render(*, поля): return f'...' из текста шаблона"""
+    source = f"def render(*, {', '.join(fields)}):\n    return f{text!r}\n"
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, f'<template {key}>', 'exec'), namespace)
+    return namespace['render']
+
+
+class MessageCatalog:
+    """Скомпилированные шаблоны по локалям"""
+
+    def __init__(self, catalog: Dict[str, Dict[str, str]] = CATALOG, locale: str = MESSAGES_LOCALE,
+                 constants: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            catalog: Тексты по локалям; локаль DEFAULT_LOCALE должна содержать все ключи
+            locale: Локаль бота по умолчанию
+        """
+        self._templates: Dict[str, Dict[str, Template]] = {
+            name: {key: Template(key, text, constants) for key, text in texts.items()}
+            for name, texts in catalog.items()
+        }
+        base = self._templates[DEFAULT_LOCALE]
+        for name, templates in self._templates.items():
+            # Недостающие ключи локали берутся из локали по умолчанию
+            for key, template in base.items():
+                templates.setdefault(key, template)
+        if locale not in self._templates:
+            logger.warning(f"Unknown MESSAGES_LOCALE {locale!r}, using {DEFAULT_LOCALE!r}")
+            locale = DEFAULT_LOCALE
+        self.locale = locale
+        self._default = self._templates[locale]
+
+    def locale_for(self, language_code: Optional[str]) -> str:
+        """Локаль по language_code пользователя Telegram ("en-US" -> "en"), иначе локаль бота"""
+        if language_code:
+            code = language_code.split('-', 1)[0].lower()
+            if code in self._templates:
+                return code
+        return self.locale
+
+    def get(self, key: str, locale: Optional[str] = None) -> Template:
+        templates = self._default if locale is None else self._templates.get(locale, self._default)
+        return templates[key]
+
+    def render(self, key: str, locale: Optional[str] = None, **values) -> str:
+        return self.get(key, locale)(**values)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._default
+
+    def __call__(self, key: str, **values) -> str:
+        """Сообщение на языке бота: messages('interview.question', number=1, ...)"""
+        return self._default[key](**values)
+
+
+# ==================== КЛАВИАТУРЫ ====================
+
+_T = TypeVar('_T', bound=TelegramObject)
+
+# id(объект) -> (объект, JSON после первой сериализации)
+_frozen: Dict[int, Tuple[TelegramObject, Optional[str]]] = {}
+
+
+def freeze(markup: _T) -> _T:
+    """Зарегистрировать неизменяемую клавиатуру для сериализации один раз"""
+    _frozen.setdefault(id(markup), (markup, None))
+    return markup
+
+
+class CatalogSession(AiohttpSession):
+    """Сессия бота, отдающая зарегистрированные клавиатуры готовой JSON-строкой"""
+
+    def build_form_data(self, bot, method) -> FormData:
+        markup = getattr(method, 'reply_markup', None)
+        entry = _frozen.get(id(markup)) if markup is not None else None
+        if entry is None or entry[0] is not markup:
+            return super().build_form_data(bot, method)
+
+        serialized = entry[1]
+        if serialized is None:
+            serialized = self.prepare_value(markup.model_dump(warnings=False), bot=bot, files={})
+            _frozen[id(markup)] = (markup, serialized)
+
+        # Как AiohttpSession.build_form_data, но клавиатура не проходит model_dump и json.dumps
+        form = FormData(quote_fields=False)
+        files: Dict[str, Any] = {}
+        for key, value in method.model_dump(warnings=False, exclude={'reply_markup'}).items():
+            value = self.prepare_value(value, bot=bot, files=files)
+            if not value:
+                continue
+            form.add_field(key, value)
+        form.add_field('reply_markup', serialized)
+        for key, value in files.items():
+            form.add_field(key, value.read(bot), filename=value.filename or key)
+        return form
+
+
+# Глобальный каталог
+messages = MessageCatalog(constants=CONSTANTS)
@@ -0,0 +1,341 @@
+"""
+Метрики бота: счетчики, гистограммы задержек и gauge в текстовом формате Prometheus
+
+Метрики с метками возвращают дочерний объект через labels(...); его можно сохранить
+и использовать на горячем пути без поиска по словарю. Значения gauge с функцией
+вычисляются только при запросе /metrics.
+"""
+import bisect
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+from config import METRICS_HOST
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограммы задержек по умолчанию, сек
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """Дочерняя метрика для значений меток"""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[key] = self._new_child()
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type_name}']
+        for values, child in list(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values, child) -> List[str]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class Counter(_Metric):
+    """Монотонно растущий счетчик"""
+    type_name = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self._children[()].inc(amount)
+
+    def _render_child(self, values, child) -> List[str]:
+        return [f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}']
+
+
+class _GaugeChild:
+    __slots__ = ('value', 'func')
+
+    def __init__(self):
+        self.value = 0
+        self.func: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set_function(self, func: Callable[[], float]):
+        """Значение вычисляется при каждом запросе метрик"""
+        self.func = func
+
+    def get(self) -> float:
+        return self.func() if self.func is not None else self.value
+
+
+class Gauge(_Metric):
+    """Текущее значение"""
+    type_name = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._children[()].set(value)
+
+    def set_function(self, func: Callable[[], float]):
+        self._children[()].set_function(func)
+
+    def _render_child(self, values, child) -> List[str]:
+        try:
+            value = child.get()
+        except Exception as e:
+            logger.error(f"Failed to collect gauge {self.name}: {e}")
+            return []
+        return [f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}']
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> '_Timer':
+        """Контекстный менеджер, измеряющий длительность блока"""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ('child', 'started')
+
+    def __init__(self, child: _HistogramChild):
+        self.child = child
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.started)
+
+
+class Histogram(_Metric):
+    """Распределение значений (обычно задержек) по корзинам"""
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value: float):
+        self._children[()].observe(value)
+
+    def time(self) -> _Timer:
+        return self._children[()].time()
+
+    def _render_child(self, values, child) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float('inf'),), child.counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f'{self.name}_sum{labels} {_format_value(child.sum)}')
+        lines.append(f'{self.name}_count{labels} {child.count}')
+        return lines
+
+
+class Registry:
+    """Набор метрик процесса"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# Глобальный реестр
+registry = Registry()
+
+# ==================== МЕТРИКИ БОТА ====================
+
+HANDLER_LATENCY = registry.histogram(
+    'bot_handler_duration_seconds', 'Handler execution time', ['handler'])
+HANDLER_ERRORS = registry.counter(
+    'bot_handler_errors_total', 'Handler calls that raised an exception', ['handler'])
+
+BACKEND_LATENCY = registry.histogram(
+    'backend_request_duration_seconds', 'Backend API call time including retries', ['endpoint'])
+BACKEND_REQUESTS = registry.counter(
+    'backend_requests_total', 'Backend API calls by response status (0 - no response)', ['endpoint', 'status'])
+BACKEND_CONNECTIONS = registry.counter(
+    'backend_connections_total', 'Backend pool events: created, reused (keep-alive), queued (pool exhausted)',
+    ['event'])
+BACKEND_CONNECTIONS_IN_USE = registry.gauge(
+    'backend_connections_in_use', 'Backend requests currently holding a pooled connection')
+BACKEND_CALLS = registry.counter(
+    'backend_calls_total', 'Backend client calls by source: request, cache, coalesced (joined an in-flight GET)',
+    ['endpoint', 'source'])
+
+S3_UPLOAD_LATENCY = registry.histogram(
+    's3_upload_duration_seconds', 'Resume upload time', ['mode'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+S3_UPLOADS = registry.counter(
+    's3_uploads_total', 'Resume uploads by result', ['mode', 'result'])
+
+RESUME_VALIDATION_LATENCY = registry.histogram(
+    'resume_validation_duration_seconds', 'PDF structure check time in the process pool')
+RESUME_VALIDATIONS = registry.counter(
+    'resume_validations_total', 'Resume checks by result (ok or rejection reason)', ['result'])
+
+RESUME_DEDUP = registry.counter(
+    'resume_dedup_total', 'Resume ingests by outcome: resent, copied, uploaded, spooled', ['result'])
+
+RETENTION_OBJECTS = registry.counter(
+    'resume_retention_objects_total', 'Objects scanned by retention, by decision', ['decision'])
+RETENTION_DELETES = registry.counter(
+    'resume_retention_deletes_total', 'Objects removed by retention (dry_run - would be removed)', ['result'])
+RETENTION_DELETED_BYTES = registry.counter(
+    'resume_retention_deleted_bytes_total', 'Bytes removed from the bucket by retention')
+RETENTION_RATE = registry.gauge(
+    'resume_retention_objects_per_second', 'Scan throughput of the last retention run')
+RETENTION_LAST_RUN = registry.gauge(
+    'resume_retention_last_run_timestamp_seconds', 'Completion time of the last retention run')
+
+FSM_LATENCY = registry.histogram(
+    'fsm_operation_duration_seconds', 'FSM storage operation time', ['operation'])
+FSM_FLUSH_LATENCY = registry.histogram(
+    'fsm_flush_duration_seconds', 'FSM storage batch write time')
+FSM_FLUSH_KEYS = registry.counter(
+    'fsm_flushed_keys_total', 'Keys written by FSM storage batches')
+
+OUTBOUND_LATENCY = registry.histogram(
+    'telegram_send_duration_seconds', 'Telegram Bot API call time', ['method'])
+OUTBOUND_SENDS = registry.counter(
+    'telegram_sends_total', 'Telegram Bot API calls by result', ['method', 'result'])
+
+ACTIVE_INTERVIEWS = registry.gauge(
+    'bot_active_interviews', 'Candidates currently answering an interview question')
+PENDING_TIMERS = registry.gauge(
+    'bot_pending_timers', 'Scheduled question deadlines')
+QUEUE_SIZE = registry.gauge(
+    'bot_queue_size', 'Items waiting in internal queues', ['queue'])
+
+STARTUP_SECONDS = registry.gauge(
+    'bot_startup_seconds', 'Startup phases: imports, services, warm_up, first_update (since process start)',
+    ['phase'])
+
+
+# ==================== HTTP ====================
+
+def create_metrics_app() -> web.Application:
+    """aiohttp-приложение с /metrics"""
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(text=registry.render(), content_type='text/plain', charset='utf-8',
+                            headers={'X-Prometheus-Format': '0.0.4'})
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle)
+    return app
+
+
+async def start_metrics_server(port: int, host: str = METRICS_HOST) -> Optional[web.AppRunner]:
+    """
+    Запуск HTTP-сервера метрик
+
+    Returns:
+        AppRunner для остановки или None, если порт не задан или занят (бот работает без /metrics)
+    """
+    if not port:
+        return None
+    runner = web.AppRunner(create_metrics_app(), access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError as e:
+        logger.error(f"Failed to start metrics server on {host}:{port}: {e}")
+        await runner.cleanup()
+        return None
+    logger.info(f"Metrics available on http://{host}:{port}/metrics")
+    return runner
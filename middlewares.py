@@ -0,0 +1,58 @@
+"""
+Middleware диспетчера
+"""
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from metrics import HANDLER_LATENCY, HANDLER_ERRORS, STARTUP_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Время выполнения и ошибки каждого обработчика (регистрируется как inner middleware)"""
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any],
+    ) -> Any:
+        handler_object = data.get('handler')
+        name = handler_object.callback.__name__ if handler_object is not None else 'unknown'
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.labels(name).inc()
+            raise
+        finally:
+            HANDLER_LATENCY.labels(name).observe(time.perf_counter() - started)
+
+
+class FirstUpdateMiddleware(BaseMiddleware):
+    """Время от запуска процесса до первого обработанного обновления (регистрируется на dp.update)"""
+
+    def __init__(self, process_started: float):
+        self.process_started = process_started
+        self.seen = False
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any],
+    ) -> Any:
+        if self.seen:
+            return await handler(event, data)
+        self.seen = True
+        try:
+            return await handler(event, data)
+        finally:
+            elapsed = time.perf_counter() - self.process_started
+            STARTUP_SECONDS.labels('first_update').set(elapsed)
+            logger.info(f"First update handled {elapsed:.2f}s after start")
@@ -2,7 +2,6 @@
 Заглушки для данных из базы данных и бэкенда
 В будущем это будет заменено на реальные API-запросы к Go бэкенду
 """
-import random
 
 
 class MockDatabase:
@@ -13,25 +12,6 @@ class MockDatabase:
         self.interview_results = {}
         self.pending_interviews = {}  # Кандидаты, ожидающие прохождения интервью
 
-    def get_candidate_status(self, user_id: int) -> dict:
-        """
-        Получить статус кандидата
-        В будущем: GET запрос к Go API endpoint /api/candidates/{user_id}/status
-        """
-        statuses = [
-            {'status': 'new', 'text': 'Новый кандидат', 'description': 'Ваша заявка зарегистрирована'},
-            {'status': 'resume_review', 'text': 'Проверка резюме', 'description': 'Ваше резюме проходит проверку'},
-            {'status': 'interview_pending', 'text': 'Ожидание интервью', 'description': 'Готовимся к вашему интервью'},
-            {'status': 'interview_completed', 'text': 'Интервью завершено', 'description': 'Анализируем ваши ответы'},
-            {'status': 'hr_review', 'text': 'Проверка HR', 'description': 'HR-менеджер рассматривает вашу кандидатуру'},
-            {'status': 'approved', 'text': 'Одобрено', 'description': 'Поздравляем! С вами свяжется HR'},
-        ]
-
-        # Случайный статус для заглушки
-        status_data = random.choice(statuses)
-        print(f"[MOCK DB] Статус кандидата {user_id}: {status_data['status']}")
-        return status_data
-
     def get_timing_info(self) -> str:
         """
         Получить информацию о сроках
@@ -0,0 +1,294 @@
+"""
+Исходящие сообщения в Telegram через общий планировщик
+
+Все отправки проходят через одну очередь с приоритетами и двумя ограничителями скорости:
+общим для бота (Telegram допускает около 30 сообщений в секунду; при шардировании каждый воркер
+получает свою долю) и отдельным для каждого чата.
+Ответ 429 (retry_after) приостанавливает чат и повторяет отправку.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import DeleteMessage, EditMessageText, SendMessage, TelegramMethod
+from aiogram.types import Message
+
+from config import OUTBOUND_RATE, OUTBOUND_BURST, OUTBOUND_PER_CHAT_RATE, OUTBOUND_PER_CHAT_BURST, \
+    OUTBOUND_MAX_RETRIES
+from metrics import OUTBOUND_LATENCY, OUTBOUND_SENDS
+
+logger = logging.getLogger(__name__)
+
+# Через сколько секунд простоя забывается состояние чата
+CHAT_IDLE_TTL = 60
+
+
+class Priority(IntEnum):
+    """Приоритет отправки: меньше - раньше"""
+    CRITICAL = 0  # вопросы интервью и истечение времени
+    NORMAL = 1
+    LOW = 2  # ответы на FAQ
+
+
+class TokenBucket:
+    """Ограничитель скорости: rate токенов в секунду, не больше burst в запасе"""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Сколько ждать до появления токена (0 - токен есть)"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def drain(self, now: float):
+        """Израсходовать запас (после 429)"""
+        self._refill(now)
+        self.tokens = min(self.tokens, 0)
+
+
+class _Chat:
+    """Очередь и ограничитель одного чата"""
+
+    __slots__ = ('bucket', 'queue', 'paused_until', 'last_used')
+
+    def __init__(self, rate: float, burst: float):
+        self.bucket = TokenBucket(rate, burst)
+        # (priority, seq, bot, method, future, attempt)
+        self.queue: List[Tuple] = []
+        self.paused_until = 0.0
+        self.last_used = time.monotonic()
+
+    def wait_time(self, now: float) -> float:
+        return max(self.paused_until - now, self.bucket.wait_time(now))
+
+
+class OutboundScheduler:
+    """
+    Планировщик исходящих сообщений
+
+    Готовые к отправке чаты выбираются по приоритету и времени постановки их первого сообщения;
+    внутри чата порядок тоже по приоритету, затем FIFO.
+    """
+
+    def __init__(self, rate: float = OUTBOUND_RATE, burst: float = OUTBOUND_BURST,
+                 per_chat_rate: float = OUTBOUND_PER_CHAT_RATE, per_chat_burst: float = OUTBOUND_PER_CHAT_BURST,
+                 max_retries: int = OUTBOUND_MAX_RETRIES):
+        self.rate = rate
+        self.burst = burst
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst
+        self.max_retries = max_retries
+        self._global = TokenBucket(rate, burst)
+        self._chats: Dict[int, _Chat] = {}
+        # Готовые чаты (priority, seq, chat_id) и ожидающие лимита (ready_at, chat_id)
+        self._ready: List[Tuple[int, int, int]] = []
+        self._waiting: List[Tuple[float, int]] = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+        self._last_prune = time.monotonic()
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+
+    # ==================== API ====================
+
+    async def call(self, bot: Bot, method: TelegramMethod, chat_id: int, priority: Priority = Priority.NORMAL) -> Any:
+        """Выполнить метод Bot API с учетом лимитов и вернуть его результат"""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self._push(chat_id, (int(priority), next(self._seq), bot, method, future, 0))
+        return await future
+
+    async def send_message(self, bot: Bot, chat_id: int, text: str, priority: Priority = Priority.NORMAL,
+                           **kwargs) -> Message:
+        """Аналог bot.send_message"""
+        return await self.call(bot, SendMessage(chat_id=chat_id, text=text, **kwargs), chat_id, priority)
+
+    async def answer(self, message: Message, text: str, priority: Priority = Priority.NORMAL, **kwargs) -> Message:
+        """Аналог message.answer"""
+        return await self.send_message(message.bot, message.chat.id, text, priority, **kwargs)
+
+    async def edit_text(self, message: Message, text: str, priority: Priority = Priority.NORMAL, **kwargs) -> Any:
+        """Аналог message.edit_text"""
+        method = EditMessageText(chat_id=message.chat.id, message_id=message.message_id, text=text, **kwargs)
+        return await self.call(message.bot, method, message.chat.id, priority)
+
+    async def delete(self, message: Message, priority: Priority = Priority.NORMAL) -> bool:
+        """Аналог message.delete"""
+        method = DeleteMessage(chat_id=message.chat.id, message_id=message.message_id)
+        return await self.call(message.bot, method, message.chat.id, priority)
+
+    async def stop(self):
+        """Остановка планировщика: неотправленные сообщения отменяются"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, *self._inflight, return_exceptions=True)
+        self._task = None
+        for chat in self._chats.values():
+            for item in chat.queue:
+                item[4].cancel()
+        self._chats.clear()
+        self._ready.clear()
+        self._waiting.clear()
+        logger.info(f"Outbound scheduler stopped: {self.get_stats()}")
+
+    def set_share(self, shares: int):
+        """
+        Доля общего лимита бота: при шардировании лимит Telegram делится между процессами-воркерами
+
+        Args:
+            shares: Число процессов, отправляющих от имени одного бота
+        """
+        shares = max(1, shares)
+        self._global.rate = self.rate / shares
+        self._global.burst = max(1.0, self.burst / shares)
+        self._global.tokens = min(self._global.tokens, self._global.burst)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Размер очереди и счетчики"""
+        return {
+            'queued': sum(len(chat.queue) for chat in self._chats.values()),
+            'chats': len(self._chats),
+            'in_flight': len(self._inflight),
+            'sent': self.sent,
+            'retried': self.retried,
+            'failed': self.failed,
+        }
+
+    # ==================== ПЛАНИРОВАНИЕ ====================
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    def _push(self, chat_id: int, item: Tuple):
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            chat = self._chats[chat_id] = _Chat(self.per_chat_rate, self.per_chat_burst)
+        heapq.heappush(chat.queue, item)
+        # Лишние записи в _ready отбрасываются при извлечении
+        heapq.heappush(self._ready, (item[0], item[1], chat_id))
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            self._prune(now)
+            while self._waiting and self._waiting[0][0] <= now:
+                _, chat_id = heapq.heappop(self._waiting)
+                chat = self._chats.get(chat_id)
+                if chat is not None and chat.queue:
+                    head = chat.queue[0]
+                    heapq.heappush(self._ready, (head[0], head[1], chat_id))
+
+            if not self._ready:
+                timeout = self._waiting[0][0] - now if self._waiting else None
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            delay = self._global.wait_time(now)
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            priority, seq, chat_id = heapq.heappop(self._ready)
+            chat = self._chats.get(chat_id)
+            if chat is None or not chat.queue or chat.queue[0][1] != seq:
+                continue  # устаревшая запись
+            delay = chat.wait_time(now)
+            if delay > 0:
+                heapq.heappush(self._waiting, (now + delay, chat_id))
+                continue
+
+            item = heapq.heappop(chat.queue)
+            self._global.take(now)
+            chat.bucket.take(now)
+            chat.last_used = now
+            task = asyncio.create_task(self._send(chat_id, item))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+            if chat.queue:
+                head = chat.queue[0]
+                heapq.heappush(self._ready, (head[0], head[1], chat_id))
+
+    async def _send(self, chat_id: int, item: Tuple):
+        priority, seq, bot, method, future, attempt = item
+        if future.cancelled():
+            return
+        name = type(method).__name__
+        started = time.perf_counter()
+        try:
+            result = await bot(method)
+        except TelegramRetryAfter as e:
+            OUTBOUND_SENDS.labels(name, 'retry_after').inc()
+            if attempt >= self.max_retries:
+                self.failed += 1
+                logger.error(f"Flood control for chat {chat_id}, giving up after {attempt + 1} attempts")
+                if not future.done():
+                    future.set_exception(e)
+                return
+            self.retried += 1
+            logger.warning(f"Flood control for chat {chat_id}, retry in {e.retry_after}s")
+            now = time.monotonic()
+            self._global.drain(now)
+            chat = self._chats.get(chat_id)
+            if chat is None:
+                chat = self._chats[chat_id] = _Chat(self.per_chat_rate, self.per_chat_burst)
+            chat.paused_until = max(chat.paused_until, now + e.retry_after)
+            # Повтор с тем же местом в очереди
+            self._push(chat_id, (priority, seq, bot, method, future, attempt + 1))
+            return
+        except Exception as e:
+            OUTBOUND_SENDS.labels(name, 'error').inc()
+            self.failed += 1
+            if not future.done():
+                future.set_exception(e)
+            return
+        finally:
+            OUTBOUND_LATENCY.labels(name).observe(time.perf_counter() - started)
+        OUTBOUND_SENDS.labels(name, 'ok').inc()
+        self.sent += 1
+        if not future.done():
+            future.set_result(result)
+
+    def _prune(self, now: float):
+        """Забыть простаивающие чаты"""
+        if now - self._last_prune < CHAT_IDLE_TTL:
+            return
+        self._last_prune = now
+        for chat_id in [chat_id for chat_id, chat in self._chats.items()
+                        if not chat.queue and now - chat.last_used > CHAT_IDLE_TTL and chat.paused_until < now]:
+            del self._chats[chat_id]
+
+
+# Глобальный экземпляр планировщика
+outbound = OutboundScheduler()
@@ -0,0 +1,259 @@
+"""
+Проверка PDF-резюме до загрузки в хранилище и запуска скрининга
+
+Заголовок проверяется на первом чанке прямо в потоке скачивания: переименованная картинка
+отсекается, не дочитываясь до конца. Структура (xref, шифрование, число страниц) разбирается
+в пуле процессов, чтобы разбор не блокировал event loop.
+"""
+import asyncio
+import logging
+import multiprocessing
+import re
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, NamedTuple, Optional
+
+from config import PDF_VALIDATION_WORKERS, PDF_VALIDATION_TIMEOUT, RESUME_MAX_PAGES
+from metrics import RESUME_VALIDATION_LATENCY, RESUME_VALIDATIONS
+
+logger = logging.getLogger(__name__)
+
+PDF_HEADER = b'%PDF-'
+# Заголовок допускается не с первого байта (мусор перед ним читают все просмотрщики)
+HEADER_SEARCH_LIMIT = 1024
+# Хвост файла, в котором ищутся startxref и %%EOF
+TAIL_SIZE = 2048
+# Предел цепочки /Prev (инкрементальные обновления)
+MAX_XREF_SECTIONS = 32
+# Предел распакованного потока объектов (защита от zip-бомб)
+MAX_OBJSTM_SIZE = 16 * 1024 * 1024
+
+_STARTXREF = re.compile(rb'startxref\s+(\d+)')
+_OBJ_HEADER = re.compile(rb'\s*(\d+)\s+(\d+)\s+obj\b')
+_XREF_SUBSECTION = re.compile(rb'\s*(\d+)\s+(\d+)\s*?[\r\n]+')
+_XREF_ENTRY = re.compile(rb'(\d{10}) (\d{5}) ([nf])')
+_PREV = re.compile(rb'/Prev\s+(\d+)')
+_PAGES_COUNT = re.compile(rb'/Type\s*/Pages\b[^>]*?/Count\s+(\d+)|/Count\s+(\d+)[^>]*?/Type\s*/Pages\b', re.S)
+_OBJSTM = re.compile(rb'/Type\s*/ObjStm\b[^>]*>>\s*stream\r?\n', re.S)
+
+
+class PdfCheck(NamedTuple):
+    """Результат проверки: reason - not_pdf | corrupt | encrypted | no_pages | too_many_pages"""
+    ok: bool
+    reason: Optional[str] = None
+    pages: int = 0
+
+
+UNCHECKED = PdfCheck(True, 'unchecked')
+
+
+def check_header(head: bytes) -> bool:
+    """Начало файла похоже на PDF (проверка первого чанка в потоке)"""
+    return PDF_HEADER in head[:HEADER_SEARCH_LIMIT]
+
+
+# ==================== РАЗБОР (выполняется в процессе пула) ====================
+
+def validate_pdf(data: bytes, max_pages: int = RESUME_MAX_PAGES) -> PdfCheck:
+    """
+    Структурная проверка PDF
+
+    Проверяются заголовок, %%EOF и startxref в конце файла, таблицы xref по всей цепочке /Prev
+    (каждая используемая запись должна указывать на "N G obj"), отсутствие /Encrypt в трейлере
+    и число страниц по /Count корневого /Pages. Для xref-потоков (PDF 1.5+) проверяется,
+    что startxref указывает на объект /Type /XRef; содержимое потока не декодируется.
+    """
+    base = data.find(PDF_HEADER, 0, HEADER_SEARCH_LIMIT)
+    if base < 0:
+        return PdfCheck(False, 'not_pdf')
+
+    tail = data[-TAIL_SIZE:]
+    if b'%%EOF' not in tail:
+        return PdfCheck(False, 'corrupt')
+    matches = _STARTXREF.findall(tail)
+    if not matches:
+        return PdfCheck(False, 'corrupt')
+
+    offset = int(matches[-1])
+    trailers = []
+    for _ in range(MAX_XREF_SECTIONS):
+        section = _read_xref_section(data, offset, base)
+        if section is None:
+            return PdfCheck(False, 'corrupt')
+        trailers.append(section)
+        prev = _PREV.search(section)
+        if prev is None:
+            break
+        offset = int(prev.group(1))
+
+    if any(b'/Encrypt' in trailer for trailer in trailers):
+        return PdfCheck(False, 'encrypted')
+
+    pages = max(_page_counts(data), default=0)
+    if pages <= 0:
+        return PdfCheck(False, 'no_pages')
+    if pages > max_pages:
+        return PdfCheck(False, 'too_many_pages', pages)
+    return PdfCheck(True, None, pages)
+
+
+def _read_xref_section(data: bytes, offset: int, base: int) -> Optional[bytes]:
+    """
+    Проверка одной секции xref
+
+    Returns:
+        Словарь трейлера (сырые байты) или None, если секция повреждена
+    """
+    # Смещения считаются от начала файла; при мусоре перед заголовком - от заголовка
+    for shift in (0, base) if base else (0,):
+        position = offset + shift
+        if data.startswith(b'xref', position):
+            return _check_xref_table(data, position + 4, shift)
+        header = _OBJ_HEADER.match(data, position)
+        if header is not None:
+            end = data.find(b'stream', header.end())
+            dictionary = data[header.end():end if end >= 0 else header.end() + TAIL_SIZE]
+            if re.search(rb'/Type\s*/XRef\b', dictionary):
+                return dictionary
+    return None
+
+
+def _check_xref_table(data: bytes, position: int, shift: int) -> Optional[bytes]:
+    """Записи таблицы xref указывают на заголовки объектов; возвращает словарь трейлера"""
+    while True:
+        subsection = _XREF_SUBSECTION.match(data, position)
+        if subsection is None:
+            break
+        first, count = int(subsection.group(1)), int(subsection.group(2))
+        position = subsection.end()
+        for number in range(first, first + count):
+            entry = _XREF_ENTRY.match(data, position)
+            if entry is None:
+                return None
+            position = entry.end()
+            while position < len(data) and data[position] in b' \r\n':
+                position += 1
+            if entry.group(3) != b'n':
+                continue
+            header = _OBJ_HEADER.match(data, int(entry.group(1)) + shift)
+            if header is None or int(header.group(1)) != number:
+                return None
+
+    trailer = re.match(rb'\s*trailer\s*(<<.*?>>)\s*startxref', data[position:position + TAIL_SIZE * 4], re.S)
+    return trailer.group(1) if trailer else None
+
+
+def _page_counts(data: bytes) -> Iterator[int]:
+    """/Count всех узлов /Pages, включая сжатые потоки объектов"""
+    for match in _PAGES_COUNT.finditer(data):
+        yield int(match.group(1) or match.group(2))
+    for stream in _object_streams(data):
+        for match in _PAGES_COUNT.finditer(stream):
+            yield int(match.group(1) or match.group(2))
+
+
+def _object_streams(data: bytes) -> Iterator[bytes]:
+    for match in _OBJSTM.finditer(data):
+        end = data.find(b'endstream', match.end())
+        if end < 0:
+            continue
+        try:
+            yield zlib.decompressobj().decompress(data[match.end():end], MAX_OBJSTM_SIZE)
+        except zlib.error:
+            continue
+
+
+def _noop() -> None:
+    return None
+
+
+# ==================== ПУЛ ПРОЦЕССОВ ====================
+
+class PdfValidator:
+    """Проверка PDF в пуле процессов (пул создается при первом обращении или в warm_up)"""
+
+    def __init__(self, workers: int = PDF_VALIDATION_WORKERS, timeout: float = PDF_VALIDATION_TIMEOUT,
+                 max_pages: int = RESUME_MAX_PAGES):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.accepted = 0
+        self.rejected = 0
+        self.unchecked = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, как у воркеров шардирования: fork процесса с потоками небезопасен
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+            )
+        return self._executor
+
+    async def warm_up(self):
+        """Запуск процессов пула заранее, чтобы первое резюме не ждало их старта"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(*(loop.run_in_executor(executor, _noop) for _ in range(self.workers)))
+
+    async def validate(self, data: bytes) -> PdfCheck:
+        """
+        Проверка файла целиком
+
+        Если пул недоступен или не уложился в таймаут, файл пропускается (UNCHECKED):
+        проверка - оптимизация, а не повод отказать кандидату.
+        """
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            check = await asyncio.wait_for(
+                loop.run_in_executor(self._get_executor(), validate_pdf, data, self.max_pages), self.timeout,
+            )
+        except BrokenProcessPool as e:
+            # Процесс пула упал (например, OOM на огромном файле) - пул пересоздается при следующей проверке
+            logger.error(f"PDF validation pool is broken: {e!r}")
+            self._reset()
+            check = UNCHECKED
+        except Exception as e:
+            logger.error(f"PDF validation failed to run: {e!r}")
+            check = UNCHECKED
+
+        if check is UNCHECKED:
+            self.unchecked += 1
+        elif check.ok:
+            self.accepted += 1
+        else:
+            self.rejected += 1
+        RESUME_VALIDATIONS.labels(check.reason or 'ok').inc()
+        RESUME_VALIDATION_LATENCY.observe(time.perf_counter() - started)
+        return check
+
+    def reject_header(self) -> PdfCheck:
+        """Учет файла, отсеянного по заголовку в потоке"""
+        self.rejected += 1
+        RESUME_VALIDATIONS.labels('not_pdf').inc()
+        return PdfCheck(False, 'not_pdf')
+
+    def _reset(self):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            'workers': self.workers,
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'unchecked': self.unchecked,
+        }
+
+
+# Глобальный экземпляр
+pdf_validator = PdfValidator()
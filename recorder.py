@@ -0,0 +1,221 @@
+"""
+Запись входящих обновлений и ответов бэкенда для воспроизведения (bench/replay.py)
+
+Журнал - gzip с JSON-строками, отдельный файл на каждый запуск: ключ обезличивания живет
+только в памяти процесса, а время t отсчитывается от старта записи, поэтому два запуска
+в одном файле воспроизводились бы наложенными друг на друга. Перед записью данные обезличиваются:
+идентификаторы заменяются ключевым хешем (одинаковым в пределах одной записи),
+имена, телефоны и тексты ответов - заглушками той же длины и формы. Команды (/start, /resume)
+сохраняются, чтобы воспроизведение шло по тем же веткам обработчиков.
+"""
+import asyncio
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+import secrets
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from config import RECORD_FLUSH_INTERVAL
+from util import is_valid_phone
+
+logger = logging.getLogger(__name__)
+
+# Поля с персональными данными: значение заменяется заглушкой той же длины
+PII_FIELDS = {'first_name', 'last_name', 'username', 'full_name', 'phone', 'phone_number', 'city',
+              'telegram_username', 'title', 'content', 'caption', 'answer'}
+# Идентификаторы, которые заменяются хешем
+ID_FIELDS = {'id', 'user_id', 'chat_id', 'telegram_id', 'candidate_id'}
+FILE_ID_FIELDS = {'file_id', 'file_unique_id'}
+
+_NUMERIC_SEGMENT = re.compile(r'(?<=/)\d+(?=/|$)')
+_WORD_CHARS = re.compile(r'[^\W_]')
+
+
+class Anonymizer:
+    """Обезличивание с ключом, который живет только в памяти процесса"""
+
+    def __init__(self, key: Optional[bytes] = None):
+        self._key = key or secrets.token_bytes(16)
+
+    def _digest(self, value: str) -> bytes:
+        return hmac.new(self._key, value.encode(), hashlib.sha256).digest()
+
+    def number(self, value: int) -> int:
+        """Идентификатор -> другой положительный идентификатор (48 бит)"""
+        return int.from_bytes(self._digest(str(value))[:6], 'big') or 1
+
+    def token(self, value: str) -> str:
+        return self._digest(value).hex()[:24]
+
+    def text(self, value: str) -> str:
+        """
+        Текст сообщения: команды сохраняются, остальное заменяется заглушкой той же формы
+
+        Буквы -> 'x', цифры -> '0', пробелы и знаки остаются: валидация в обработчиках
+        ("-" вместо имени, формат телефона) при воспроизведении дает те же ветки.
+        """
+        if value.startswith('/'):
+            return value
+        if is_valid_phone(value):
+            return '+7' + str(self.number(int(re.sub(r'\D', '', value))) % 10 ** 10).zfill(10)
+        return _WORD_CHARS.sub(lambda m: '0' if m.group().isdigit() else 'x', value)
+
+    def path(self, endpoint: str) -> str:
+        """Путь запроса: числовые сегменты (telegram_id, candidate_id) обезличиваются"""
+        return _NUMERIC_SEGMENT.sub(lambda m: str(self.number(int(m.group()))), endpoint)
+
+    def scrub(self, value: Any, field: str = '') -> Any:
+        """Рекурсивное обезличивание JSON-совместимой структуры"""
+        if isinstance(value, dict):
+            return {key: self.scrub(item, key) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.scrub(item, field) for item in value]
+        if isinstance(value, bool) or value is None:
+            return value
+        if field in ID_FIELDS and isinstance(value, int):
+            return self.number(value)
+        if field in FILE_ID_FIELDS and isinstance(value, str):
+            return self.token(value)
+        if field == 'file_name' and isinstance(value, str):
+            return 'file' + os.path.splitext(value)[1]
+        if field == 'text' and isinstance(value, str):
+            return self.text(value)
+        if field in PII_FIELDS and isinstance(value, str):
+            return 'x' * len(value)
+        return value
+
+
+class UpdateRecorder(BaseMiddleware):
+    """
+    Outer middleware для dp.update: пишет каждое обновление в журнал
+
+    Ответы бэкенда записываются через BackendClient.add_response_listener(recorder.record_backend).
+    """
+
+    def __init__(self, path: str, flush_interval: float = RECORD_FLUSH_INTERVAL):
+        """
+        Args:
+            path: Базовый путь (RECORD_UPDATES_PATH); файл запуска - run_path(path)
+        """
+        self.base_path = path
+        self.path: Optional[str] = None
+        self.flush_interval = flush_interval
+        self.anonymizer = Anonymizer()
+        self._buffer: List[str] = []
+        self._file = None
+        self._started = time.monotonic()
+        self._flusher: Optional[asyncio.Task] = None
+        self.records = 0
+
+    async def start(self):
+        directory = os.path.dirname(self.base_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path, self._file = await asyncio.to_thread(_create_run_file, self.base_path)
+        self._started = time.monotonic()
+        self._flusher = asyncio.create_task(self._flush_loop())
+        logger.info(f"Recording updates to {self.path}")
+
+    async def stop(self):
+        if self._flusher is None:
+            return
+        self._flusher.cancel()
+        await asyncio.gather(self._flusher, return_exceptions=True)
+        self._flusher = None
+        await self._flush()
+        await asyncio.to_thread(self._file.close)
+        logger.info(f"Recorder stopped: {self.records} records")
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any],
+    ) -> Any:
+        if isinstance(event, Update):
+            try:
+                self._append({'u': self.anonymizer.scrub(event.model_dump(mode='json', exclude_none=True, by_alias=True))})
+            except Exception as e:
+                logger.error(f"Failed to record update: {e}")
+        return await handler(event, data)
+
+    def record_backend(self, name: str, method: str, endpoint: str, data: Any, status: int, latency: float):
+        """Слушатель ответов BackendClient"""
+        self._append({
+            'b': name, 'm': method, 'p': self.anonymizer.path(endpoint),
+            's': status, 'l': round(latency, 4), 'd': self.anonymizer.scrub(data),
+        })
+
+    def _append(self, record: Dict[str, Any]):
+        record['t'] = round(time.monotonic() - self._started, 4)
+        self._buffer.append(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+        self.records += 1
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self._flush()
+
+    async def _flush(self):
+        if not self._buffer:
+            return
+        lines, self._buffer = self._buffer, []
+        payload = ('\n'.join(lines) + '\n').encode()
+        try:
+            await asyncio.to_thread(self._write, payload)
+        except Exception as e:
+            logger.error(f"Failed to write recording: {e}")
+
+    def _write(self, payload: bytes):
+        self._file.write(payload)
+        self._file.flush()
+
+
+def run_path(path: str, started: float, attempt: int = 0) -> str:
+    """
+    Файл записи одного запуска: к имени до первой точки добавляются дата и время старта
+
+    data/updates.log.gz -> data/updates-20261018-120000.log.gz,
+    у воркера data/updates.log.gz.1 -> data/updates-20261018-120000.log.gz.1
+    """
+    directory, name = os.path.split(path)
+    stem, dot, suffix = name.partition('.')
+    stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(started))
+    if attempt:
+        stamp += f'-{attempt}'
+    return os.path.join(directory, f'{stem}-{stamp}{dot}{suffix}')
+
+
+def _create_run_file(path: str):
+    """Новый файл запуска (существующий файл не дописывается)"""
+    started = time.time()
+    for attempt in range(100):
+        candidate = run_path(path, started, attempt)
+        try:
+            return candidate, gzip.open(candidate, 'xb')
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"No free recording file name for {path}")
+
+
+def read_recording(path: str) -> List[Dict[str, Any]]:
+    """Прочитать журнал (оборванный хвост после аварийного завершения пропускается)"""
+    records = []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        try:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        except EOFError:
+            logger.warning(f"Recording {path} is truncated")
+    return records
@@ -0,0 +1,105 @@
+"""
+Повторы запросов и автоматический выключатель (circuit breaker) для внешних сервисов
+"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Union
+
+from util import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Политика повторов одного эндпоинта"""
+    # Всего попыток, включая первую
+    attempts: int = 1
+    initial_delay: float = 0.2
+    max_delay: float = 2.0
+    # Таймаут одной попытки, сек
+    timeout: float = 10.0
+    # HTTP-статусы, при которых запрос повторяется (0 - сетевая ошибка или таймаут)
+    retry_statuses: FrozenSet[int] = frozenset({0, 502, 503, 504})
+
+    def should_retry(self, attempt: int, status: int) -> bool:
+        """Нужна ли еще одна попытка после неудачной попытки номер attempt (с нуля)"""
+        return attempt + 1 < self.attempts and status in self.retry_statuses
+
+    def delay(self, attempt: int) -> float:
+        """Задержка перед следующей попыткой"""
+        return backoff_delay(attempt, self.initial_delay, self.max_delay)
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель
+
+    closed - запросы проходят; после failure_threshold ошибок подряд переходит в open.
+    open - запросы сразу отклоняются; через reset_timeout переходит в half_open.
+    half_open - пропускается один пробный запрос: успех закрывает выключатель, ошибка снова открывает.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Можно ли выполнить запрос сейчас"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        # Пробный запрос, который так и не завершился (например, отменен), не блокирует выключатель
+        if state == self.HALF_OPEN and (not self._probe_in_flight
+                                        or time.monotonic() - self._probe_started >= self.reset_timeout):
+            self._probe_in_flight = True
+            self._probe_started = time.monotonic()
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        if self._state != self.CLOSED:
+            logger.info(f"Circuit '{self.name}' closed")
+        self._state = self.CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self.opened += 1
+                logger.warning(f"Circuit '{self.name}' opened after {self._failures} failures")
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def get_stats(self) -> Dict[str, Union[str, int]]:
+        """Состояние выключателя и счетчики"""
+        return {
+            'state': self.state,
+            'consecutive_failures': self._failures,
+            'opened': self.opened,
+            'rejected': self.rejected,
+        }
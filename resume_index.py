@@ -0,0 +1,144 @@
+"""
+Индекс загруженных резюме: (кандидат, вакансия) -> SHA-256 содержимого и ключ в S3
+
+По индексу повторная отправка того же файла не скачивается и не загружается заново,
+а файл, который уже лежит в хранилище под другим ключом, копируется на стороне S3.
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Optional
+
+from config import RESUME_INDEX_PATH
+
+logger = logging.getLogger(__name__)
+
+
+class ResumeRecord(NamedTuple):
+    """Последнее резюме кандидата на вакансию"""
+    sha256: str
+    s3_key: str
+    file_unique_id: Optional[str]
+    # Скрининг этого файла уже дал финальный результат
+    screened: bool
+
+
+class ResumeIndex:
+    """Индекс резюме в SQLite (запросы выполняются в отдельном потоке)"""
+
+    def __init__(self, path: str = RESUME_INDEX_PATH):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='resume-index')
+        self._conn: Optional[sqlite3.Connection] = None
+
+    # ==================== API ====================
+
+    async def get(self, candidate_id: int, vacancy_id) -> Optional[ResumeRecord]:
+        """Последнее резюме кандидата на вакансию (None - нет или индекс недоступен)"""
+        try:
+            row = await self._run_db(self._get, candidate_id, str(vacancy_id))
+        except Exception as e:
+            logger.error(f"Resume index lookup failed: {e}")
+            return None
+        return ResumeRecord(row[0], row[1], row[2], bool(row[3])) if row else None
+
+    async def find_by_hash(self, sha256: str) -> Optional[str]:
+        """Ключ любого объекта в S3 с таким содержимым"""
+        try:
+            return await self._run_db(self._find_by_hash, sha256)
+        except Exception as e:
+            logger.error(f"Resume index lookup failed: {e}")
+            return None
+
+    async def put(self, candidate_id: int, vacancy_id, sha256: str, s3_key: str, file_unique_id: Optional[str]):
+        """Запись загруженного резюме (признак скрининга сбрасывается)"""
+        try:
+            await self._run_db(self._put, candidate_id, str(vacancy_id), sha256, s3_key, file_unique_id)
+        except Exception as e:
+            logger.error(f"Resume index update failed: {e}")
+
+    async def mark_screened(self, candidate_id: int, vacancy_id, sha256: str):
+        """Скрининг файла sha256 завершен (если кандидат с тех пор не прислал другой файл)"""
+        try:
+            await self._run_db(self._mark_screened, candidate_id, str(vacancy_id), sha256)
+        except Exception as e:
+            logger.error(f"Resume index update failed: {e}")
+
+    async def forget(self, s3_keys: List[str]):
+        """Удаление записей об объектах, удаленных из хранилища (очистка по сроку хранения)"""
+        try:
+            await self._run_db(self._forget, s3_keys)
+        except Exception as e:
+            logger.error(f"Resume index update failed: {e}")
+
+    async def close(self):
+        if self._conn is not None:
+            await self._run_db(self._conn.close)
+            self._conn = None
+        self._executor.shutdown(wait=True)
+
+    # ==================== SQLITE ====================
+
+    async def _run_db(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS resumes ('
+                'candidate_id INTEGER NOT NULL, vacancy_id TEXT NOT NULL, sha256 TEXT NOT NULL, '
+                's3_key TEXT NOT NULL, file_unique_id TEXT, screened INTEGER NOT NULL DEFAULT 0, '
+                'updated_at REAL NOT NULL, PRIMARY KEY (candidate_id, vacancy_id))'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS resumes_sha256 ON resumes (sha256)')
+            conn.execute('CREATE INDEX IF NOT EXISTS resumes_s3_key ON resumes (s3_key)')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _get(self, candidate_id: int, vacancy_id: str):
+        return self._connect().execute(
+            'SELECT sha256, s3_key, file_unique_id, screened FROM resumes WHERE candidate_id = ? AND vacancy_id = ?',
+            (candidate_id, vacancy_id),
+        ).fetchone()
+
+    def _find_by_hash(self, sha256: str) -> Optional[str]:
+        row = self._connect().execute(
+            'SELECT s3_key FROM resumes WHERE sha256 = ? ORDER BY updated_at DESC LIMIT 1', (sha256,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _put(self, candidate_id: int, vacancy_id: str, sha256: str, s3_key: str, file_unique_id: Optional[str]):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO resumes '
+                '(candidate_id, vacancy_id, sha256, s3_key, file_unique_id, screened, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, 0, ?)',
+                (candidate_id, vacancy_id, sha256, s3_key, file_unique_id, time.time()),
+            )
+
+    def _mark_screened(self, candidate_id: int, vacancy_id: str, sha256: str):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                'UPDATE resumes SET screened = 1 WHERE candidate_id = ? AND vacancy_id = ? AND sha256 = ?',
+                (candidate_id, vacancy_id, sha256),
+            )
+
+    def _forget(self, s3_keys: List[str]):
+        conn = self._connect()
+        with conn:
+            conn.executemany('DELETE FROM resumes WHERE s3_key = ?', [(key,) for key in s3_keys])
+
+
+# Глобальный экземпляр индекса
+resume_index = ResumeIndex()
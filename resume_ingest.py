@@ -0,0 +1,172 @@
+"""
+Прием резюме: скачивание из Telegram, проверка PDF и загрузка в объектное хранилище
+"""
+import hashlib
+import logging
+import uuid
+from contextlib import aclosing
+from typing import AsyncIterator, NamedTuple, Optional, Tuple
+
+import aiofiles
+from aiogram import Bot
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.types import Document
+
+from config import RESUME_DOWNLOAD_CHUNK_SIZE, RESUME_DOWNLOAD_TIMEOUT
+from metrics import RESUME_DEDUP
+from pdf_validator import HEADER_SEARCH_LIMIT, PdfCheck, UNCHECKED, check_header, pdf_validator
+from resume_index import ResumeRecord, resume_index
+from resume_spool import resume_spool
+from s3_service import storage_service
+
+logger = logging.getLogger(__name__)
+
+
+async def stream_telegram_file(bot: Bot, file_id: str) -> AsyncIterator[bytes]:
+    """
+    Поток чанков файла из Telegram без сохранения на диск
+
+    Args:
+        bot: Экземпляр бота
+        file_id: Идентификатор файла в Telegram
+    """
+    file = await bot.get_file(file_id)
+
+    if bot.session.api.is_local:
+        # Локальный Bot API сервер отдает путь к файлу на диске
+        local_path = str(bot.session.api.wrap_local_file.to_local(file.file_path))
+        async with aiofiles.open(local_path, 'rb') as f:
+            while chunk := await f.read(RESUME_DOWNLOAD_CHUNK_SIZE):
+                yield chunk
+        return
+
+    url = bot.session.api.file_url(bot.token, file.file_path)
+    async for chunk in bot.session.stream_content(
+            url=url,
+            timeout=RESUME_DOWNLOAD_TIMEOUT,
+            chunk_size=RESUME_DOWNLOAD_CHUNK_SIZE,
+            raise_for_status=True,
+    ):
+        yield chunk
+
+
+class IngestResult(NamedTuple):
+    """
+    Результат приема резюме: ключ в S3 (None - не загружено) и результат проверки файла
+
+    duplicate - кандидат повторно прислал тот же файл на ту же вакансию (загрузка пропущена),
+    screened - скрининг этого файла уже дал финальный результат,
+    spooled - S3 недоступен, файл в очереди на диске и будет загружен в фоне.
+    """
+    s3_key: Optional[str]
+    check: PdfCheck
+    sha256: Optional[str] = None
+    duplicate: bool = False
+    screened: bool = False
+    spooled: bool = False
+
+
+async def download_resume(bot: Bot, document: Document) -> Tuple[Optional[bytes], PdfCheck]:
+    """
+    Скачивание резюме в память с проверкой заголовка PDF по мере поступления байтов
+
+    Файл, который не начинается как PDF, не дочитывается. Размер уже ограничен
+    проверкой document.file_size, поэтому файл целиком помещается в память.
+
+    Returns:
+        Содержимое файла (None - не удалось скачать) и результат проверки заголовка
+    """
+    buffer = bytearray()
+    try:
+        # aclosing: при раннем отказе соединение со скачиванием закрывается сразу
+        async with aclosing(stream_telegram_file(bot, document.file_id)) as chunks:
+            async for chunk in chunks:
+                header_checked = len(buffer) >= HEADER_SEARCH_LIMIT
+                buffer += chunk
+                if not header_checked and len(buffer) >= HEADER_SEARCH_LIMIT and not check_header(buffer):
+                    return None, pdf_validator.reject_header()
+    except Exception as e:
+        logger.warning(f"Streaming download failed ({e}), retrying with a plain download")
+        try:
+            buffer = bytearray((await bot.download(document)).getvalue())
+        except Exception as e:
+            logger.error(f"Resume download failed: {e}")
+            return None, UNCHECKED
+
+    if not check_header(buffer):
+        return None, pdf_validator.reject_header()
+    return bytes(buffer), UNCHECKED
+
+
+async def ingest_resume(bot: Bot, document: Document, candidate_id: int, vacancy_id: uuid,
+                        owner: Optional[StorageKey] = None) -> IngestResult:
+    """
+    Проверка и загрузка резюме в хранилище
+
+    Файл скачивается в память, проверяется в пуле процессов и только после этого загружается:
+    поврежденный или зашифрованный PDF не попадает ни в S3, ни на скрининг.
+    По SHA-256 содержимого (resume_index) повторная отправка того же файла не загружается,
+    а файл, уже лежащий в хранилище под другим ключом, копируется на стороне S3.
+    Если S3 недоступен, файл ставится в очередь на диске (resume_spool) и загружается в фоне.
+
+    Args:
+        owner: Ключ FSM кандидата - чат для отложенного подтверждения (без него файл не ставится в очередь)
+
+    Returns:
+        IngestResult; при отказе проверки check.ok == False и s3_key == None
+    """
+    previous = await resume_index.get(candidate_id, vacancy_id)
+    if previous and document.file_unique_id and previous.file_unique_id == document.file_unique_id:
+        # Тот же файл Telegram - содержимое известно без скачивания
+        return _resent(previous, candidate_id, vacancy_id)
+
+    data, check = await download_resume(bot, document)
+    if data is None:
+        return IngestResult(None, check)
+
+    sha256 = hashlib.sha256(data).hexdigest()
+    if previous and previous.sha256 == sha256:
+        return _resent(previous, candidate_id, vacancy_id)
+
+    check = await pdf_validator.validate(data)
+    if not check.ok:
+        logger.info(f"Resume rejected for {candidate_id}/{vacancy_id}: {check.reason}")
+        return IngestResult(None, check)
+
+    s3_key = await _store(data, sha256, candidate_id, vacancy_id) if storage_service.is_available() else None
+    if s3_key:
+        await resume_index.put(candidate_id, vacancy_id, sha256, s3_key, document.file_unique_id)
+        # Резюме, оставшееся в очереди со времени недоступности S3, не должно заменить новое
+        await resume_spool.discard(candidate_id, vacancy_id)
+        return IngestResult(s3_key, check, sha256)
+
+    if owner is None:
+        return IngestResult(None, check, sha256)
+    logger.warning(f"Upload failed for {candidate_id}/{vacancy_id}, spooling the resume")
+    entry = await resume_spool.add(data, candidate_id, vacancy_id, owner.bot_id, owner.chat_id, owner.user_id,
+                                   sha256, document.file_unique_id)
+    if entry is not None:
+        RESUME_DEDUP.labels('spooled').inc()
+    return IngestResult(None, check, sha256, spooled=entry is not None)
+
+
+def _resent(previous: ResumeRecord, candidate_id: int, vacancy_id: uuid) -> IngestResult:
+    logger.info(f"Resume for {candidate_id}/{vacancy_id} is unchanged, skipping upload")
+    RESUME_DEDUP.labels('resent').inc()
+    return IngestResult(previous.s3_key, PdfCheck(True), previous.sha256, True, previous.screened)
+
+
+async def _store(data: bytes, sha256: str, candidate_id: int, vacancy_id: uuid) -> Optional[str]:
+    """Копия уже загруженного объекта с тем же содержимым или загрузка файла"""
+    source_key = await resume_index.find_by_hash(sha256)
+    if source_key:
+        s3_key = await storage_service.copy_object_async(source_key, candidate_id, vacancy_id)
+        if s3_key:
+            RESUME_DEDUP.labels('copied').inc()
+            return s3_key
+        logger.warning(f"Copy from {source_key} failed for {candidate_id}/{vacancy_id}, uploading")
+
+    s3_key = await storage_service.put_bytes_async(data, candidate_id, vacancy_id, sha256)
+    if s3_key:
+        RESUME_DEDUP.labels('uploaded').inc()
+    return s3_key
@@ -0,0 +1,333 @@
+"""
+Локальная очередь резюме, которые не удалось сразу загрузить в хранилище
+
+Каждое резюме - два файла: <id>.pdf и манифест <id>.json (кандидат, вакансия, чат, SHA-256).
+Оба пишутся во временный файл, сбрасываются на диск (fsync) и переименовываются;
+манифест пишется последним, поэтому запись без манифеста - незавершенная и при запуске удаляется.
+Фоновые загрузчики разбирают очередь с ограниченной параллельностью и повторами с задержкой;
+после загрузки вызывается on_stored (подтверждение кандидату и запуск скрининга),
+и только затем файлы удаляются. Очередь восстанавливается с диска при запуске.
+
+На пару (кандидат, вакансия) в очереди остается только последнее резюме: более старое
+снимается (и не попадает в индекс, даже если уже загружается), иначе после повторов
+оно могло бы загрузиться последним и заменить новое. Очередь другого процесса
+(воркер убран или не запущен) принимается через adopt().
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from config import RESUME_SPOOL_DIR, RESUME_SPOOL_CONCURRENCY, RESUME_SPOOL_RETRY_INITIAL_DELAY, \
+    RESUME_SPOOL_RETRY_MAX_DELAY
+from resume_index import resume_index
+from s3_service import storage_service
+from util import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+
+class SpoolEntry(NamedTuple):
+    """Манифест резюме в очереди"""
+    id: str
+    candidate_id: int
+    vacancy_id: str
+    bot_id: int
+    chat_id: int
+    user_id: int
+    sha256: str
+    file_unique_id: Optional[str]
+    created: float
+
+
+class ResumeSpool:
+    """Очередь резюме на диске с фоновой загрузкой в S3"""
+
+    def __init__(self, directory: str = RESUME_SPOOL_DIR, concurrency: int = RESUME_SPOOL_CONCURRENCY):
+        self.directory = directory
+        self.concurrency = concurrency
+        self._on_stored: Optional[Callable[[SpoolEntry, str], Awaitable[None]]] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._retry_tasks: set = set()
+        self._pending: Dict[str, SpoolEntry] = {}
+        # Последнее резюме пары (candidate_id, vacancy_id) в очереди и загружаемые сейчас записи
+        self._latest: Dict[Tuple[int, str], str] = {}
+        self._uploading: set = set()
+        self.uploaded = 0
+        self.retries = 0
+        self.superseded = 0
+
+    # ==================== ЖИЗНЕННЫЙ ЦИКЛ ====================
+
+    async def start(self, on_stored: Callable[[SpoolEntry, str], Awaitable[None]], directory: Optional[str] = None):
+        """
+        Восстановление очереди с диска и запуск загрузчиков
+
+        Args:
+            on_stored: Вызывается с (entry, s3_key) после загрузки, до удаления файлов из очереди
+            directory: Отдельная директория очереди (для воркеров с шардированием)
+        """
+        if directory:
+            self.directory = directory
+        self._on_stored = on_stored
+        self._queue = asyncio.Queue()
+
+        recovered = await asyncio.to_thread(_recover, self.directory)
+        for entry in recovered:
+            await self._admit(entry)
+        if recovered:
+            logger.info(f"Recovered {len(recovered)} spooled resumes from {self.directory}")
+
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        """Остановка загрузчиков (незагруженные резюме остаются на диске до следующего запуска)"""
+        tasks = [*self._workers, *self._retry_tasks]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        if self._pending:
+            logger.warning(f"{len(self._pending)} resumes left in spool {self.directory}")
+
+    # ==================== API ====================
+
+    async def add(self, data: bytes, candidate_id: int, vacancy_id, bot_id: int, chat_id: int, user_id: int,
+                  sha256: str, file_unique_id: Optional[str] = None) -> Optional[SpoolEntry]:
+        """
+        Поставить резюме в очередь: возвращается после записи на диск
+
+        Returns:
+            Запись очереди или None, если записать на диск не удалось
+        """
+        entry = SpoolEntry(uuid.uuid4().hex, candidate_id, str(vacancy_id), bot_id, chat_id, user_id,
+                           sha256, file_unique_id, time.time())
+        try:
+            await asyncio.to_thread(self._write, entry, data)
+        except Exception as e:
+            logger.error(f"Failed to spool resume for {candidate_id}/{vacancy_id}: {e}")
+            return None
+        if self._queue is not None:
+            await self._admit(entry)
+        logger.info(f"Resume for {candidate_id}/{vacancy_id} spooled as {entry.id}")
+        return entry
+
+    def is_pending(self, candidate_id: int, vacancy_id) -> bool:
+        """Ждет ли резюме пары загрузки в очереди"""
+        return (candidate_id, str(vacancy_id)) in self._latest
+
+    async def discard(self, candidate_id: int, vacancy_id):
+        """Снять резюме пары из очереди (новое резюме загружено в хранилище напрямую)"""
+        entry_id = self._latest.get((candidate_id, str(vacancy_id)))
+        if entry_id is not None:
+            await self._drop(self._pending[entry_id])
+
+    async def adopt(self, directory: str) -> int:
+        """
+        Принять очередь другого процесса: файлы переносятся в свою директорию и загружаются
+
+        Returns:
+            Число принятых резюме
+        """
+        if not os.path.isdir(directory) or os.path.abspath(directory) == os.path.abspath(self.directory):
+            return 0
+        entries = await asyncio.to_thread(self._move_from, directory)
+        for entry in entries:
+            await self._admit(entry)
+        logger.info(f"Adopted {len(entries)} spooled resumes from {directory}")
+        return len(entries)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            'pending': len(self._pending),
+            'uploaded': self.uploaded,
+            'retries': self.retries,
+            'superseded': self.superseded,
+        }
+
+    # ==================== ЗАГРУЗКА ====================
+
+    async def _admit(self, entry: SpoolEntry):
+        """Поставить в очередь, сняв более старое резюме той же пары (или отбросить запись, если она старше)"""
+        pair = (entry.candidate_id, entry.vacancy_id)
+        previous = self._pending.get(self._latest.get(pair))
+        if previous is not None:
+            if previous.created > entry.created:
+                await self._drop(entry)
+                return
+            await self._drop(previous)
+        self._latest[pair] = entry.id
+        self._pending[entry.id] = entry
+        self._queue.put_nowait((entry, 0))
+
+    async def _drop(self, entry: SpoolEntry):
+        """Снять запись: файлы загружаемой сейчас записи удалит ее загрузчик"""
+        self._pending.pop(entry.id, None)
+        pair = (entry.candidate_id, entry.vacancy_id)
+        if self._latest.get(pair) == entry.id:
+            del self._latest[pair]
+        self.superseded += 1
+        logger.info(f"Spooled resume {entry.id} for {entry.candidate_id}/{entry.vacancy_id} is superseded")
+        if entry.id not in self._uploading:
+            await asyncio.to_thread(self._remove, entry.id)
+
+    async def _worker(self):
+        while True:
+            entry, attempt = await self._queue.get()
+            try:
+                # Снятая запись (заменена более новым резюме) в очереди или после повтора
+                if entry.id in self._pending:
+                    self._uploading.add(entry.id)
+                    await self._upload(entry, attempt)
+            except Exception as e:
+                logger.error(f"Spooled resume {entry.id} failed: {e!r}")
+                self._retry(entry, attempt)
+            finally:
+                self._uploading.discard(entry.id)
+                self._queue.task_done()
+
+    async def _upload(self, entry: SpoolEntry, attempt: int):
+        s3_key = None
+        if storage_service.is_available():
+            s3_key = await storage_service.upload_file_async(
+                self._data_path(entry.id), entry.candidate_id, entry.vacancy_id, entry.sha256,
+            )
+        if not s3_key:
+            self._retry(entry, attempt)
+            return
+        if entry.id not in self._pending:
+            # Пока файл загружался, кандидат прислал новое резюме: старое не должно заменить его в индексе
+            await asyncio.to_thread(self._remove, entry.id)
+            return
+
+        await resume_index.put(entry.candidate_id, entry.vacancy_id, entry.sha256, s3_key, entry.file_unique_id)
+        try:
+            await self._on_stored(entry, s3_key)
+        except Exception as e:
+            logger.error(f"Spooled resume {entry.id} uploaded, but notification failed: {e!r}")
+        await asyncio.to_thread(self._remove, entry.id)
+        self._pending.pop(entry.id, None)
+        if self._latest.get((entry.candidate_id, entry.vacancy_id)) == entry.id:
+            del self._latest[(entry.candidate_id, entry.vacancy_id)]
+        self.uploaded += 1
+        logger.info(f"Spooled resume {entry.id} uploaded to {s3_key} after {attempt + 1} attempts")
+
+    def _retry(self, entry: SpoolEntry, attempt: int):
+        self.retries += 1
+        delay = backoff_delay(attempt, RESUME_SPOOL_RETRY_INITIAL_DELAY, RESUME_SPOOL_RETRY_MAX_DELAY)
+        task = asyncio.create_task(self._retry_later(entry, attempt + 1, delay))
+        self._retry_tasks.add(task)
+        task.add_done_callback(self._retry_tasks.discard)
+
+    async def _retry_later(self, entry: SpoolEntry, attempt: int, delay: float):
+        await asyncio.sleep(delay)
+        self._queue.put_nowait((entry, attempt))
+
+    # ==================== ДИСК ====================
+
+    def _data_path(self, entry_id: str) -> str:
+        return _data_path(self.directory, entry_id)
+
+    def _manifest_path(self, entry_id: str) -> str:
+        return _manifest_path(self.directory, entry_id)
+
+    def _write(self, entry: SpoolEntry, data: bytes):
+        os.makedirs(self.directory, exist_ok=True)
+        _write_durable(self._data_path(entry.id), data)
+        # Манифест последним: его появление означает, что резюме целиком на диске
+        _write_durable(self._manifest_path(entry.id), json.dumps(entry._asdict()).encode())
+        _fsync_directory(self.directory)
+
+    def _remove(self, entry_id: str):
+        _remove(self.directory, entry_id)
+
+    def _move_from(self, directory: str) -> List[SpoolEntry]:
+        """Перенести завершенные записи из чужой директории в свою (в том же порядке: данные, затем манифест)"""
+        entries = _recover(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        for entry in entries:
+            os.replace(_data_path(directory, entry.id), self._data_path(entry.id))
+            os.replace(_manifest_path(directory, entry.id), self._manifest_path(entry.id))
+        _fsync_directory(self.directory)
+        try:
+            os.rmdir(directory)
+        except OSError as e:
+            logger.warning(f"Spool directory {directory} is not removed: {e}")
+        return entries
+
+
+def _data_path(directory: str, entry_id: str) -> str:
+    return os.path.join(directory, f'{entry_id}.pdf')
+
+
+def _manifest_path(directory: str, entry_id: str) -> str:
+    return os.path.join(directory, f'{entry_id}.json')
+
+
+def _remove(directory: str, entry_id: str):
+    # Сначала манифест: после сбоя между удалениями остается файл без манифеста, он будет удален
+    for path in (_manifest_path(directory, entry_id), _data_path(directory, entry_id)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _recover(directory: str) -> List[SpoolEntry]:
+    """Записи с манифестом и данными; незавершенные записи удаляются"""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+
+    entries = []
+    manifests = set()
+    for name in names:
+        if not name.endswith('.json'):
+            continue
+        entry_id = name[:-len('.json')]
+        try:
+            with open(_manifest_path(directory, entry_id), 'rb') as f:
+                entry = SpoolEntry(**json.loads(f.read()))
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(f"Broken spool manifest {name}, dropping it: {e}")
+            _remove(directory, entry_id)
+            continue
+        if not os.path.exists(_data_path(directory, entry_id)):
+            logger.error(f"Spooled resume {entry_id} has no data file, dropping it")
+            _remove(directory, entry_id)
+            continue
+        manifests.add(entry_id)
+        entries.append(entry)
+
+    for name in names:
+        stem, extension = os.path.splitext(name)
+        if extension == '.tmp' or (extension == '.pdf' and stem not in manifests):
+            os.remove(os.path.join(directory, name))
+    return sorted(entries, key=lambda entry: entry.created)
+
+
+def _write_durable(path: str, data: bytes):
+    """Запись через временный файл с fsync и атомарным переименованием"""
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def _fsync_directory(directory: str):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# Глобальный экземпляр
+resume_spool = ResumeSpool()
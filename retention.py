@@ -0,0 +1,209 @@
+"""
+Очистка хранилища резюме по срокам хранения
+
+Бакет обходится постранично. Для каждого ключа "{candidate_id}/{vacancy_id}" статус берется
+с бэкенда, и объект удаляется, если:
+- кандидат получил отказ (screening_failed, interview_failed) больше RETENTION_REJECTED_DAYS назад;
+- бэкенд не знает такого кандидата или вакансию (404), а файлу больше RETENTION_ORPHAN_GRACE_HOURS;
+- файлу больше RETENTION_MAX_AGE_DAYS при любом статусе.
+Если статус получить не удалось, объект остается. Удаление - пакетами DeleteObjects
+до 1000 ключей с ограниченным числом одновременных запросов. Заодно из RESUMES_DIR
+удаляются временные файлы, оставшиеся после аварийного завершения.
+
+Запуск вручную или по расписанию (в боте - каждые RETENTION_INTERVAL часов):
+    python -m retention --dry-run
+"""
+import argparse
+import asyncio
+import logging
+import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from backend_client import get_backend_client
+from config import RESUMES_DIR, RESUMES_DIR_MAX_AGE, RETENTION_CONCURRENCY, RETENTION_DELETE_CONCURRENCY, \
+    RETENTION_MAX_AGE_DAYS, RETENTION_ORPHAN_GRACE_HOURS, RETENTION_REJECTED_DAYS
+from metrics import RETENTION_DELETED_BYTES, RETENTION_DELETES, RETENTION_LAST_RUN, RETENTION_OBJECTS, \
+    RETENTION_RATE
+from resume_index import resume_index
+from s3_service import DELETE_BATCH_SIZE, storage_service
+
+logger = logging.getLogger(__name__)
+
+# Статусы отказа: резюме хранится RETENTION_REJECTED_DAYS
+REJECTED_STATUSES = {'screening_failed', 'interview_failed'}
+
+_RESUME_KEY = re.compile(r'^(\d+)/([^/]+)$')
+
+
+class RetentionJob:
+    """Один проход очистки бакета и временной директории"""
+
+    def __init__(self, dry_run: bool = False, prefix: str = '',
+                 concurrency: int = RETENTION_CONCURRENCY, delete_concurrency: int = RETENTION_DELETE_CONCURRENCY):
+        """
+        Args:
+            dry_run: Только посчитать, что было бы удалено
+            prefix: Обходить только ключи с этим префиксом (например, "12345/")
+        """
+        self.dry_run = dry_run
+        self.prefix = prefix
+        self._status_semaphore = asyncio.Semaphore(concurrency)
+        self._delete_semaphore = asyncio.Semaphore(delete_concurrency)
+        self._deletes: List[asyncio.Task] = []
+        self.decisions: Dict[str, int] = {}
+        self.scanned = 0
+        self.deleted = 0
+        self.failed = 0
+        self.deleted_bytes = 0
+        self.local_removed = 0
+
+    async def run(self) -> Dict[str, object]:
+        """Полный проход; возвращает итоговую статистику"""
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        batch: List[dict] = []
+
+        async for page in storage_service.iter_objects_async(self.prefix):
+            decisions = await asyncio.gather(*(self._decide(obj, now) for obj in page))
+            for obj, decision in zip(page, decisions):
+                self.scanned += 1
+                self.decisions[decision] = self.decisions.get(decision, 0) + 1
+                RETENTION_OBJECTS.labels(decision).inc()
+                if decision in ('rejected', 'orphaned', 'expired'):
+                    batch.append(obj)
+                if len(batch) >= DELETE_BATCH_SIZE:
+                    await self._submit_delete(batch)
+                    batch = []
+
+            elapsed = time.perf_counter() - started
+            logger.info(f"Retention progress: scanned {self.scanned}, deleted {self.deleted}, "
+                        f"{self.scanned / elapsed:.0f} objects/s")
+
+        if batch:
+            await self._submit_delete(batch)
+        await asyncio.gather(*self._deletes)
+        self.local_removed = await asyncio.to_thread(self._sweep_local, time.time())
+
+        elapsed = time.perf_counter() - started
+        RETENTION_RATE.set(self.scanned / elapsed if elapsed else 0)
+        RETENTION_LAST_RUN.set(time.time())
+        stats = self.get_stats()
+        logger.info(f"Retention finished in {elapsed:.1f}s: {stats}")
+        return stats
+
+    async def _decide(self, obj: dict, now: datetime) -> str:
+        """
+        Решение по объекту: keep | rejected | orphaned | expired | unknown (нет статуса) | foreign (не резюме)
+        """
+        match = _RESUME_KEY.match(obj['Key'])
+        if match is None:
+            return 'foreign'
+        age = now - obj['LastModified']
+        if age > timedelta(days=RETENTION_MAX_AGE_DAYS):
+            return 'expired'
+
+        async with self._status_semaphore:
+            data, status = await get_backend_client().get_screening_status(int(match.group(1)), match.group(2))
+        if status == 404:
+            return 'orphaned' if age > timedelta(hours=RETENTION_ORPHAN_GRACE_HOURS) else 'keep'
+        if not 200 <= status < 300 or not isinstance(data, dict):
+            return 'unknown'
+        if data.get('status') in REJECTED_STATUSES and age > timedelta(days=RETENTION_REJECTED_DAYS):
+            return 'rejected'
+        return 'keep'
+
+    async def _submit_delete(self, objects: List[dict]):
+        """Пакет на удаление; ожидание, пока освободится слот, сдерживает обход бакета"""
+        await self._delete_semaphore.acquire()
+        self._deletes.append(asyncio.create_task(self._delete(objects)))
+
+    async def _delete(self, objects: List[dict]):
+        try:
+            keys = [obj['Key'] for obj in objects]
+            if self.dry_run:
+                self.deleted += len(keys)
+                self.deleted_bytes += sum(obj['Size'] for obj in objects)
+                RETENTION_DELETES.labels('dry_run').inc(len(keys))
+                return
+
+            failed = set(await storage_service.delete_files_async(keys))
+            removed = [obj for obj in objects if obj['Key'] not in failed]
+            await resume_index.forget([obj['Key'] for obj in removed])
+            removed_bytes = sum(obj['Size'] for obj in removed)
+            self.deleted += len(removed)
+            self.failed += len(failed)
+            self.deleted_bytes += removed_bytes
+            RETENTION_DELETES.labels('ok').inc(len(removed))
+            RETENTION_DELETES.labels('error').inc(len(failed))
+            RETENTION_DELETED_BYTES.inc(removed_bytes)
+        except Exception as e:
+            logger.error(f"Retention delete batch failed: {e}")
+            self.failed += len(objects)
+            RETENTION_DELETES.labels('error').inc(len(objects))
+        finally:
+            self._delete_semaphore.release()
+
+    def _sweep_local(self, now: float) -> int:
+        """Временные файлы RESUMES_DIR старше RESUMES_DIR_MAX_AGE"""
+        removed = 0
+        try:
+            entries = list(os.scandir(RESUMES_DIR))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            try:
+                if entry.is_file() and now - entry.stat().st_mtime > RESUMES_DIR_MAX_AGE:
+                    if not self.dry_run:
+                        os.remove(entry.path)
+                    removed += 1
+            except OSError as e:
+                logger.error(f"Can't delete temp file {entry.path}: {e}")
+        return removed
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            'dry_run': self.dry_run,
+            'scanned': self.scanned,
+            'decisions': dict(self.decisions),
+            'deleted': self.deleted,
+            'failed': self.failed,
+            'deleted_bytes': self.deleted_bytes,
+            'local_removed': self.local_removed,
+        }
+
+
+async def run_periodically(interval_hours: float):
+    """Фоновая очистка в боте: первый проход через интервал после запуска"""
+    while True:
+        await asyncio.sleep(interval_hours * 3600)
+        try:
+            await RetentionJob().run()
+        except Exception as e:
+            logger.error(f"Retention run failed: {e!r}")
+
+
+async def _main(args) -> Optional[Dict[str, object]]:
+    if not storage_service.is_available():
+        logger.error("S3 unavailable, nothing to clean")
+        return None
+    try:
+        return await RetentionJob(dry_run=args.dry_run, prefix=args.prefix).run()
+    finally:
+        await get_backend_client().close()
+        await resume_index.close()
+        storage_service.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dry-run', action='store_true', help='Только показать, что было бы удалено')
+    parser.add_argument('--prefix', default='', help='Обходить только ключи с префиксом')
+    args = parser.parse_args()
+    asyncio.run(_main(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,21 @@
 """
 Сервис для работы с Yandex Object Storage (S3-совместимое API)
 """
+import asyncio
 import logging
 import sys
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, AsyncIterator
 
-import boto3
-from botocore.client import Config
 from botocore.exceptions import ClientError, NoCredentialsError
 
-from config import YC_ACCESS_KEY_ID, YC_SECRET_ACCESS_KEY, YC_BUCKET_NAME, YC_ENDPOINT_URL
+from config import YC_ACCESS_KEY_ID, YC_SECRET_ACCESS_KEY, YC_BUCKET_NAME, YC_ENDPOINT_URL, YC_ADDRESSING_STYLE, \
+    S3_UPLOAD_WORKERS, S3_UPLOAD_CONCURRENCY, PRESIGNED_URL_CACHE_SIZE, PRESIGNED_URL_MIN_REMAINING
+from cache import TTLCache
+from metrics import S3_UPLOAD_LATENCY, S3_UPLOADS
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,15 +24,71 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+UPLOAD_METADATA = {'uploaded_via': 'telegram_bot'}
+# Предел ключей в одном запросе DeleteObjects
+DELETE_BATCH_SIZE = 1000
+
+
+def _observe_upload(mode: str, started: float, s3_key: Optional[str]):
+    S3_UPLOAD_LATENCY.labels(mode).observe(time.perf_counter() - started)
+    S3_UPLOADS.labels(mode, 'ok' if s3_key else 'error').inc()
+
 
 class YandexStorageService:
-    """Сервис для работы с Yandex Object Storage"""
+    """
+    Сервис для работы с Yandex Object Storage
+
+    Клиент boto3 создается лениво - при первом обращении или в warm_up() после запуска бота,
+    поэтому импорт модуля не ходит в сеть и не падает без нее.
+    """
 
     def __init__(self):
         self.s3_client = None
         self.bucket_name = YC_BUCKET_NAME
         self.endpoint_url = YC_ENDPOINT_URL
-        self._initialize_client()
+        # Пул потоков для блокирующих вызовов boto3 и ограничение числа одновременных загрузок
+        self._executor = ThreadPoolExecutor(max_workers=S3_UPLOAD_WORKERS, thread_name_prefix='s3-upload')
+        self._upload_semaphore = asyncio.Semaphore(S3_UPLOAD_CONCURRENCY)
+        self._uploads_in_flight = 0
+        self._client_lock = threading.Lock()
+        self._initialized = False
+        # (s3_key, expires_in) -> ссылка; запись живет, пока у ссылки остается достаточный срок.
+        # Ссылки подписываются и из пула потоков, поэтому доступ к кэшу под блокировкой
+        self._url_cache = TTLCache(maxsize=PRESIGNED_URL_CACHE_SIZE, ttl=0)
+        self._url_cache_lock = threading.Lock()
+
+    def _ensure_client(self):
+        """Клиент S3 (создается при первом вызове; блокирующий, вызывать из пула потоков)"""
+        if not self._initialized:
+            with self._client_lock:
+                if not self._initialized:
+                    self._initialize_client()
+                    self._initialized = True
+        return self.s3_client
+
+    async def _get_client(self):
+        """Клиент S3 без блокировки event loop при первом обращении"""
+        if self._initialized:
+            return self.s3_client
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._ensure_client)
+
+    async def warm_up(self) -> bool:
+        """
+        Создание клиента и проверка бакета в фоне после запуска бота
+
+        Returns:
+            True, если бакет доступен
+        """
+        loop = asyncio.get_running_loop()
+        if await self._get_client() is None:
+            return False
+        try:
+            await loop.run_in_executor(self._executor, self._check_connection)
+            return True
+        except Exception as e:
+            # Клиент остается: загрузки повторят попытку, когда хранилище станет доступно
+            logger.error(f"Проверка хранилища не прошла: {e}")
+            return False
 
     def _initialize_client(self):
         """Инициализация S3 клиента для Yandex Cloud"""
@@ -40,19 +102,22 @@ class YandexStorageService:
                 self.s3_client = None
                 return
 
+            # boto3 импортируется только при создании клиента
+            import boto3
+            from botocore.client import Config
+
             self.s3_client = boto3.client(
                 's3',
                 endpoint_url=self.endpoint_url,
                 aws_access_key_id=YC_ACCESS_KEY_ID,
                 aws_secret_access_key=YC_SECRET_ACCESS_KEY,
                 config=Config(
-                    s3={'addressing_style': 'virtual'},
-                    retries={'max_attempts': 3, 'mode': 'standard'}
+                    s3={'addressing_style': YC_ADDRESSING_STYLE},
+                    retries={'max_attempts': 3, 'mode': 'standard'},
+                    max_pool_connections=S3_UPLOAD_WORKERS,
                 )
             )
 
-            self._check_connection()
-
         except NoCredentialsError:
             logger.error("Не найдены credentials для Yandex Cloud")
             self.s3_client = None
@@ -82,11 +147,14 @@ class YandexStorageService:
             logger.error(f"Ошибка доступа к бакету: {error_code} - {error_message}")
             raise
 
-    def upload_file(self, file_path: str, tg_id: int, vacancy_id: uuid) -> str:
+    def upload_file(self, file_path: str, tg_id: int, vacancy_id: uuid, sha256: Optional[str] = None) -> str:
         """
         Загрузка файла в Yandex Object Storage
+
+        Args:
+            sha256: Хеш содержимого, сохраняется в метаданных объекта
         """
-        if not self.s3_client:
+        if not self._ensure_client():
             logger.error("Клиент не инициализирован, загрузка невозможна")
             return None
 
@@ -98,9 +166,7 @@ class YandexStorageService:
                 self.bucket_name,
                 s3_key,
                 ExtraArgs={
-                    'Metadata': {
-                        'uploaded_via': 'telegram_bot'
-                    }
+                    'Metadata': {**UPLOAD_METADATA, 'sha256': sha256} if sha256 else UPLOAD_METADATA
                 }
             )
             return s3_key
@@ -114,24 +180,181 @@ class YandexStorageService:
             logger.error(f"Неожиданная ошибка при загрузке: {e}")
             return None
 
-    def get_file_url(self, s3_key: str, expires_in: int = 3600) -> str:
-        """Получение временной ссылки на файл"""
-        if not self.s3_client:
+    async def upload_file_async(self, file_path: str, tg_id: int, vacancy_id: uuid,
+                                sha256: Optional[str] = None) -> Optional[str]:
+        """
+        Асинхронная загрузка файла: boto3 выполняется в пуле потоков,
+        event loop не блокируется. Число одновременных загрузок ограничено семафором.
+        """
+        if not await self._get_client():
+            logger.error("Клиент не инициализирован, загрузка невозможна")
+            return None
+
+        async with self._upload_semaphore:
+            self._uploads_in_flight += 1
+            started = time.perf_counter()
+            s3_key = None
+            try:
+                loop = asyncio.get_running_loop()
+                s3_key = await loop.run_in_executor(self._executor, self.upload_file, file_path, tg_id, vacancy_id,
+                                                    sha256)
+                return s3_key
+            finally:
+                self._uploads_in_flight -= 1
+                _observe_upload('file', started, s3_key)
+
+    async def put_bytes_async(self, data: bytes, tg_id: int, vacancy_id: uuid,
+                              sha256: Optional[str] = None) -> Optional[str]:
+        """
+        Загрузка файла из памяти одним PUT без промежуточных копий
+
+        Резюме к этому моменту уже целиком в памяти (его нужно проверить до загрузки)
+        и не больше MAX_RESUME_SIZE_BYTES, поэтому multipart-загрузка не нужна.
+
+        Args:
+            sha256: Хеш содержимого, сохраняется в метаданных объекта
+        """
+        if not await self._get_client():
+            logger.error("Клиент не инициализирован, загрузка невозможна")
+            return None
+
+        s3_key = f"{tg_id}/{vacancy_id}"
+        async with self._upload_semaphore:
+            self._uploads_in_flight += 1
+            started = time.perf_counter()
+            uploaded = None
+            try:
+                metadata = {**UPLOAD_METADATA, 'sha256': sha256} if sha256 else UPLOAD_METADATA
+                await asyncio.get_running_loop().run_in_executor(self._executor, lambda: self.s3_client.put_object(
+                    Bucket=self.bucket_name, Key=s3_key, Body=data, Metadata=metadata,
+                ))
+                uploaded = s3_key
+                return s3_key
+            except ClientError as e:
+                error_code = e.response['Error']['Code']
+                error_message = e.response['Error']['Message']
+                logger.error(f"Ошибка загрузки файла: {error_code} - {error_message}")
+                return None
+            except Exception as e:
+                logger.error(f"Неожиданная ошибка при загрузке: {e}")
+                return None
+            finally:
+                self._uploads_in_flight -= 1
+                _observe_upload('bytes', started, uploaded)
+
+    async def copy_object_async(self, source_key: str, tg_id: int, vacancy_id: uuid) -> Optional[str]:
+        """
+        Копирование уже загруженного объекта под ключ кандидата на стороне S3 (без передачи данных)
+
+        Returns:
+            Новый ключ или None (например, исходный объект уже удален)
+        """
+        if not await self._get_client():
+            logger.error("Клиент не инициализирован, копирование невозможно")
             return None
+
+        s3_key = f"{tg_id}/{vacancy_id}"
+        if source_key == s3_key:
+            return s3_key
+        started = time.perf_counter()
+        copied = None
         try:
-            url = self.s3_client.generate_presigned_url(
-                'get_object',
-                Params={'Bucket': self.bucket_name, 'Key': s3_key},
-                ExpiresIn=expires_in
-            )
-            return url
+            await asyncio.get_running_loop().run_in_executor(self._executor, lambda: self.s3_client.copy_object(
+                Bucket=self.bucket_name, Key=s3_key,
+                CopySource={'Bucket': self.bucket_name, 'Key': source_key},
+                MetadataDirective='COPY',
+            ))
+            copied = s3_key
+            return s3_key
         except ClientError as e:
-            logger.error(f"Ошибка генерации ссылки: {e}")
+            error_code = e.response['Error']['Code']
+            error_message = e.response['Error']['Message']
+            logger.error(f"Ошибка копирования {source_key}: {error_code} - {error_message}")
             return None
+        except Exception as e:
+            logger.error(f"Неожиданная ошибка при копировании: {e}")
+            return None
+        finally:
+            _observe_upload('copy', started, copied)
+
+    def get_upload_stats(self) -> dict:
+        """Статистика асинхронных загрузок"""
+        return {
+            'workers': S3_UPLOAD_WORKERS,
+            'concurrency_limit': S3_UPLOAD_CONCURRENCY,
+            'in_flight': self._uploads_in_flight,
+        }
+
+    def shutdown(self):
+        """Остановка пула потоков загрузки"""
+        self._executor.shutdown(wait=True)
+
+    def get_file_url(self, s3_key: str, expires_in: int = 3600) -> str:
+        """
+        Получение временной ссылки на файл
+
+        Ссылка из кэша выдается повторно, пока действует не меньше PRESIGNED_URL_MIN_REMAINING
+        ее срока, поэтому получатель всегда успевает ей воспользоваться.
+        """
+        return self.get_file_urls([s3_key], expires_in).get(s3_key)
+
+    def get_file_urls(self, s3_keys: Iterable[str], expires_in: int = 3600) -> Dict[str, Optional[str]]:
+        """
+        Временные ссылки на несколько файлов за один вызов
+
+        Returns:
+            Словарь ключ -> ссылка (None - не удалось подписать)
+        """
+        urls: Dict[str, Optional[str]] = {}
+        missing = []
+        with self._url_cache_lock:
+            for s3_key in s3_keys:
+                url = self._url_cache.get((s3_key, expires_in))
+                if url is None:
+                    missing.append(s3_key)
+                urls[s3_key] = url
+        if not missing:
+            return urls
+
+        if not self._ensure_client():
+            return urls
+        # Запись в кэше истекает раньше ссылки на гарантированный остаток срока
+        reuse_for = expires_in * (1 - PRESIGNED_URL_MIN_REMAINING)
+        for s3_key in missing:
+            try:
+                url = self.s3_client.generate_presigned_url(
+                    'get_object',
+                    Params={'Bucket': self.bucket_name, 'Key': s3_key},
+                    ExpiresIn=expires_in
+                )
+            except ClientError as e:
+                logger.error(f"Ошибка генерации ссылки: {e}")
+                continue
+            urls[s3_key] = url
+            if reuse_for > 0:
+                with self._url_cache_lock:
+                    self._url_cache.set((s3_key, expires_in), url, ttl=reuse_for)
+        return urls
+
+    async def get_file_urls_async(self, s3_keys: Iterable[str], expires_in: int = 3600) -> Dict[str, Optional[str]]:
+        """Пакетная подпись ссылок в пуле потоков (ссылки из кэша - без переключения потока)"""
+        s3_keys = list(s3_keys)
+        with self._url_cache_lock:
+            cached = all((s3_key, expires_in) in self._url_cache for s3_key in s3_keys)
+        if cached:
+            return self.get_file_urls(s3_keys, expires_in)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, self.get_file_urls, s3_keys, expires_in,
+        )
+
+    def get_url_cache_stats(self) -> dict:
+        """Статистика кэша временных ссылок"""
+        with self._url_cache_lock:
+            return self._url_cache.get_stats()
 
     def delete_file(self, s3_key: str) -> bool:
         """Удаление файла из хранилища"""
-        if not self.s3_client:
+        if not self._ensure_client():
             return False
         try:
             self.s3_client.delete_object(Bucket=self.bucket_name, Key=s3_key)
@@ -140,8 +363,58 @@ class YandexStorageService:
             logger.error(f"Ошибка удаления файла: {e}")
             return False
 
+    def delete_files(self, s3_keys: List[str]) -> List[str]:
+        """
+        Удаление нескольких файлов (DeleteObjects, до DELETE_BATCH_SIZE ключей за запрос)
+
+        Returns:
+            Ключи, которые удалить не удалось
+        """
+        if not self._ensure_client():
+            return list(s3_keys)
+        failed = []
+        for start in range(0, len(s3_keys), DELETE_BATCH_SIZE):
+            batch = s3_keys[start:start + DELETE_BATCH_SIZE]
+            try:
+                response = self.s3_client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True},
+                )
+            except ClientError as e:
+                logger.error(f"Ошибка пакетного удаления: {e}")
+                failed.extend(batch)
+                continue
+            for error in response.get('Errors', []):
+                logger.error(f"Ошибка удаления {error.get('Key')}: {error.get('Code')} - {error.get('Message')}")
+                failed.append(error.get('Key'))
+        return failed
+
+    async def delete_files_async(self, s3_keys: List[str]) -> List[str]:
+        """Пакетное удаление в пуле потоков; возвращает ключи, которые удалить не удалось"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.delete_files, s3_keys)
+
+    async def iter_objects_async(self, prefix: str = '', page_size: int = 1000) -> AsyncIterator[List[dict]]:
+        """
+        Постраничный обход бакета (ListObjectsV2): каждая страница запрашивается в пуле потоков
+
+        Yields:
+            Списки объектов страницы (словари boto3 с Key, Size, LastModified)
+        """
+        if not await self._get_client():
+            return
+        loop = asyncio.get_running_loop()
+        params = {'Bucket': self.bucket_name, 'Prefix': prefix, 'MaxKeys': page_size}
+        while True:
+            response = await loop.run_in_executor(self._executor, lambda: self.s3_client.list_objects_v2(**params))
+            yield response.get('Contents', [])
+            if not response.get('IsTruncated'):
+                return
+            params['ContinuationToken'] = response['NextContinuationToken']
+
     def is_available(self) -> bool:
-        """Проверка доступности Yandex Object Storage"""
+        """Проверка доступности Yandex Object Storage (до создания клиента - по наличию настроек)"""
+        if not self._initialized:
+            return all([YC_ACCESS_KEY_ID, YC_SECRET_ACCESS_KEY, YC_BUCKET_NAME])
         return self.s3_client is not None
 
     def get_public_url(self, s3_key: str) -> str:
@@ -0,0 +1,151 @@
+"""
+Фоновые задачи скрининга резюме
+"""
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from backend_client import get_backend_client
+from config import SCREENING_WORKERS, SCREENING_QUEUE_SIZE, SCREENING_POLL_INITIAL_DELAY, \
+    SCREENING_POLL_MAX_DELAY, SCREENING_TIMEOUT
+from util import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+# Статусы, после которых опрос скрининга прекращается
+FINAL_SCREENING_STATUSES = {'screening_ok', 'screening_failed', 'interview_ok', 'interview_failed'}
+
+
+@dataclass
+class ScreeningJob:
+    """Задача скрининга одного резюме"""
+    candidate_id: int
+    vacancy_id: uuid
+    # Вызывается с (job, meta, status_code), когда результат получен или время ожидания вышло
+    on_result: Callable[["ScreeningJob", Optional[Dict[str, Any]], int], Awaitable[None]]
+    # Произвольный контекст обработчика (сообщение, FSMContext и т.п.)
+    context: Dict[str, Any] = field(default_factory=dict)
+    # Запускать ли скрининг на бэкенде или только дождаться уже идущего
+    trigger: bool = True
+    submitted_at: float = field(default_factory=time.monotonic)
+
+
+class ScreeningManager:
+    """
+    Пул воркеров, которые запускают скрининг и опрашивают его статус
+    с экспоненциальной задержкой и джиттером.
+
+    Очередь ограничена, поэтому число задач в работе не превышает
+    SCREENING_WORKERS + SCREENING_QUEUE_SIZE.
+    """
+
+    def __init__(self, workers: int = SCREENING_WORKERS, queue_size: int = SCREENING_QUEUE_SIZE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list = []
+        self._active = 0
+        # Пары (candidate_id, vacancy_id) с задачей в очереди или в работе
+        self._pending: set = set()
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def start(self):
+        """Запуск воркеров (повторный вызов ничего не делает)"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Screening workers started: {self.workers}, queue size: {self.queue_size}")
+
+    async def stop(self):
+        """Остановка воркеров"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info(f"Screening workers stopped: {self.get_stats()}")
+
+    def submit(self, job: ScreeningJob) -> bool:
+        """
+        Поставить задачу в очередь
+
+        Returns:
+            False, если очередь заполнена
+        """
+        self.start()
+        try:
+            self._queue.put_nowait(job)
+            self._pending.add((job.candidate_id, str(job.vacancy_id)))
+            return True
+        except asyncio.QueueFull:
+            self.rejected += 1
+            logger.error(f"Screening queue is full, job for candidate {job.candidate_id} rejected")
+            return False
+
+    def is_pending(self, candidate_id: int, vacancy_id) -> bool:
+        """Есть ли задача скрининга кандидата в очереди или в работе"""
+        return (candidate_id, str(vacancy_id)) in self._pending
+
+    def get_stats(self) -> Dict[str, int]:
+        """Число задач в очереди и в работе"""
+        return {
+            'queued': self._queue.qsize() if self._queue else 0,
+            'in_flight': self._active,
+            'limit': self.workers + self.queue_size,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+        }
+
+    async def _worker(self, index: int):
+        while True:
+            job = await self._queue.get()
+            self._active += 1
+            try:
+                meta, code = await self._run(job)
+                await job.on_result(job, meta, code)
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Screening job for candidate {job.candidate_id} failed: {e}")
+            finally:
+                self._active -= 1
+                self._pending.discard((job.candidate_id, str(job.vacancy_id)))
+                self._queue.task_done()
+
+    async def _run(self, job: ScreeningJob) -> (Optional[Dict[str, Any]], int):
+        """Запуск скрининга и опрос статуса до финального результата или таймаута"""
+        backend_client = get_backend_client()
+
+        if job.trigger:
+            result = await backend_client.process_screening(job.candidate_id, job.vacancy_id)
+            if result.status == 0:
+                return result
+
+        deadline = time.monotonic() + SCREENING_TIMEOUT
+        meta, code = None, 0
+        attempt = 0
+        while True:
+            result = await backend_client.get_screening_status(job.candidate_id, job.vacancy_id)
+            if result.status:
+                meta, code = result
+                if code == 404 or (meta and meta.get('status') in FINAL_SCREENING_STATUSES):
+                    return meta, code
+
+            delay = backoff_delay(attempt, SCREENING_POLL_INITIAL_DELAY, SCREENING_POLL_MAX_DELAY)
+            if time.monotonic() + delay > deadline:
+                logger.warning(f"Screening for candidate {job.candidate_id} timed out after {attempt + 1} polls")
+                return meta, code
+            attempt += 1
+            await asyncio.sleep(delay)
+
+
+# Глобальный экземпляр менеджера
+screening_manager = ScreeningManager()
@@ -0,0 +1,439 @@
+"""
+Шардирование по процессам: супервизор принимает обновления и распределяет их
+по воркерам согласованным хешированием user_id
+
+Все обновления одного кандидата попадают в один воркер, поэтому его FSM и таймеры
+живут в одном процессе. При добавлении или удалении воркера перераспределяется
+только доля пользователей, приходившаяся на изменившийся участок кольца.
+
+Кроме обновлений супервизор передает воркерам через ту же очередь управляющие
+сообщения - кортежи (команда, аргумент):
+- новое кольцо после добавления или удаления воркера. Воркер снимает таймеры
+  пользователей, ушедших к другому воркеру, и отправляет их супервизору через
+  общую очередь событий, а супервизор - новому владельцу. Общий лимит отправки
+  в Telegram делится поровну между воркерами;
+- таймеры, переданные от другого воркера;
+- журнал ответов и очередь незагруженных резюме убранного воркера (или оставшиеся
+  от прежнего запуска с другим числом воркеров) - их принимает воркер с наименьшим номером.
+"""
+import asyncio
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import BOT_MODE, WORKER_QUEUE_SIZE, SHARD_VIRTUAL_NODES, WEBHOOK_BASE_URL, WEBHOOK_PATH, \
+    WEBHOOK_HOST, WEBHOOK_PORT, ANSWERS_JOURNAL_PATH, METRICS_PORT, \
+    RECORD_UPDATES_PATH, RETENTION_INTERVAL, RESUME_SPOOL_DIR, TIMERS_DB_PATH
+from util import indexed_paths
+
+logger = logging.getLogger(__name__)
+
+# Как часто супервизор проверяет, что воркеры живы, сек
+MONITOR_INTERVAL = 1.0
+
+# Управляющие сообщения воркеру: новое кольцо (список узлов), таймеры от другого воркера,
+# журнал ответов и очередь резюме по пути
+RING = 'ring'
+ADOPT_DEADLINES = 'adopt_deadlines'
+ADOPT_JOURNAL = 'adopt_journal'
+ADOPT_SPOOL = 'adopt_spool'
+# Событие воркера супервизору: таймеры пользователей, принадлежащих другим воркерам
+RELEASED_DEADLINES = 'released_deadlines'
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Кольцо согласованного хеширования с виртуальными узлами"""
+
+    def __init__(self, nodes: Optional[List[int]] = None, replicas: int = SHARD_VIRTUAL_NODES):
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._owners: Dict[int, int] = {}
+        for node in nodes or []:
+            self.add(node)
+
+    @property
+    def nodes(self) -> List[int]:
+        return sorted(set(self._owners.values()))
+
+    def add(self, node: int):
+        """Добавить узел"""
+        for replica in range(self.replicas):
+            point = _hash(f'{node}:{replica}')
+            if point not in self._owners:
+                bisect.insort(self._points, point)
+                self._owners[point] = node
+
+    def remove(self, node: int):
+        """Удалить узел"""
+        for replica in range(self.replicas):
+            point = _hash(f'{node}:{replica}')
+            if self._owners.get(point) == node:
+                del self._owners[point]
+                self._points.remove(point)
+
+    def get(self, key: int) -> int:
+        """Узел, отвечающий за ключ"""
+        if not self._points:
+            raise LookupError("Hash ring is empty")
+        index = bisect.bisect(self._points, _hash(str(key))) % len(self._points)
+        return self._owners[self._points[index]]
+
+
+def extract_user_id(raw_update: Dict[str, Any]) -> int:
+    """user_id автора обновления (или id чата, если автора нет)"""
+    for field, value in raw_update.items():
+        if field == 'update_id' or not isinstance(value, dict):
+            continue
+        author = value.get('from') or value.get('user')
+        if isinstance(author, dict) and 'id' in author:
+            return author['id']
+        chat = value.get('chat')
+        if isinstance(chat, dict) and 'id' in chat:
+            return chat['id']
+    return 0
+
+
+def to_raw_update(update) -> Dict[str, Any]:
+    """
+    Обновление aiogram -> JSON в формате Telegram
+
+    by_alias: поле автора называется 'from', а не 'from_user' - по нему extract_user_id
+    выбирает воркер, и воркер восстанавливает Update из тех же имен полей.
+    """
+    return update.model_dump(mode='json', exclude_none=True, by_alias=True)
+
+
+def worker_main(index: int, updates: multiprocessing.Queue, events: multiprocessing.Queue, nodes: List[int]):
+    """Точка входа процесса-воркера"""
+    try:
+        asyncio.run(_run_worker(index, updates, events, nodes))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _run_worker(index: int, updates: multiprocessing.Queue, events: multiprocessing.Queue,
+                      nodes: List[int]):
+    # Импорт внутри процесса-воркера: модули бота нужны только здесь
+    from answer_queue import answer_queue
+    from main import bot_services, create_bot, create_dispatcher
+    from outbound import outbound
+    from resume_spool import resume_spool
+    from timers import deadline_scheduler
+    from webhook import UpdateProcessor
+
+    bot = create_bot()
+    dp = create_dispatcher()
+    ring = HashRing(nodes)
+
+    def owns(key: str, payload: dict) -> bool:
+        return ring.get(payload.get('user_id', 0)) == index
+
+    def rebalance(nodes: List[int]):
+        """Принять новое кольцо: отдать чужие таймеры и пересчитать долю лимита отправки"""
+        nonlocal ring
+        ring = HashRing(nodes)
+        # Убранный воркер сам не на кольце: делит лимит, пока дорабатывает очередь
+        outbound.set_share(len(set(nodes) | {index}))
+        released = deadline_scheduler.release(owns) if nodes else []
+        if released:
+            events.put((RELEASED_DEADLINES, released))
+            logger.info(f"Worker {index} handed over {len(released)} deadlines")
+
+    async with bot_services(bot, dp, answers_journal=f'{ANSWERS_JOURNAL_PATH}.{index}',
+                            timers_db=f'{TIMERS_DB_PATH}.{index}',
+                            metrics_port=METRICS_PORT + 1 + index if METRICS_PORT else 0,
+                            record_path=f'{RECORD_UPDATES_PATH}.{index}' if RECORD_UPDATES_PATH else '',
+                            # Очистку хранилища выполняет только первый воркер
+                            retention_interval=RETENTION_INTERVAL if index == 0 else 0,
+                            resume_spool_dir=f'{RESUME_SPOOL_DIR}.{index}'):
+        # Кольцо могло измениться, пока воркер не работал: таймеры из своего файла восстанавливаются все,
+        # чужие сразу передаются владельцам
+        rebalance(nodes)
+        processor = UpdateProcessor(dp, bot)
+        await dp.emit_startup(bot=bot)
+        processor.start()
+        logger.info(f"Worker {index} started")
+        loop = asyncio.get_running_loop()
+
+        async def control(command: str, argument: Any):
+            if command == RING:
+                rebalance(argument)
+            elif command == ADOPT_DEADLINES:
+                deadline_scheduler.adopt(argument)
+            elif command == ADOPT_JOURNAL:
+                await answer_queue.adopt(argument)
+            elif command == ADOPT_SPOOL:
+                await resume_spool.adopt(argument)
+            else:
+                logger.error(f"Worker {index}: unknown command {command!r}")
+
+        try:
+            while True:
+                raw_update = await loop.run_in_executor(None, updates.get)
+                if raw_update is None:
+                    break
+                if isinstance(raw_update, tuple):
+                    await control(*raw_update)
+                    continue
+                await processor.put(raw_update)
+        finally:
+            await processor.stop()
+            await dp.emit_shutdown(bot=bot)
+            logger.info(f"Worker {index} stopped: {processor.get_stats()}")
+
+
+class Supervisor:
+    """Процесс-супервизор: прием обновлений и распределение по воркерам"""
+
+    def __init__(self, workers: int):
+        self.initial_workers = workers
+        self.ring = HashRing()
+        self._context = multiprocessing.get_context('spawn')
+        self._processes: Dict[int, multiprocessing.Process] = {}
+        self._queues: Dict[int, multiprocessing.Queue] = {}
+        # События от воркеров (одна очередь на всех)
+        self._events = self._context.Queue()
+        self._next_index = 0
+        self._background: set = set()
+        self._send_locks: Dict[int, asyncio.Lock] = {}
+        self.routed = 0
+        self.dropped = 0
+
+    # ==================== ВОРКЕРЫ ====================
+
+    def add_worker(self) -> int:
+        """Запустить новый воркер и добавить его на кольцо"""
+        index = self._next_index
+        self._next_index += 1
+        self._queues[index] = self._context.Queue(maxsize=WORKER_QUEUE_SIZE)
+        self.ring.add(index)
+        self._spawn(index)
+        self._broadcast_ring()
+        logger.info(f"Worker {index} added, workers: {self.ring.nodes}")
+        return index
+
+    def remove_worker(self, index: Optional[int] = None):
+        """Убрать воркер с кольца и остановить его после обработки очереди"""
+        nodes = self.ring.nodes
+        if len(nodes) <= 1:
+            logger.warning("Can't remove the last worker")
+            return
+        index = nodes[-1] if index is None else index
+        self.ring.remove(index)
+        process = self._processes.pop(index)
+        # Убранный воркер тоже получает кольцо и отдает все свои таймеры
+        self._broadcast_ring()
+        self._background_task(self._retire(index, process))
+        logger.info(f"Worker {index} removed, workers: {self.ring.nodes}")
+
+    async def _retire(self, index: int, process: multiprocessing.Process):
+        """Остановить убранный воркер после обработки очереди и передать его журнал и очередь резюме оставшимся"""
+        await self._send(index, None)
+        await asyncio.get_running_loop().run_in_executor(None, process.join)
+        del self._queues[index]
+        self._send_locks.pop(index, None)
+        await self._adopt_orphans()
+
+    def _broadcast_ring(self):
+        """Разослать текущее кольцо всем воркерам (сообщения идут в порядке изменений)"""
+        message = (RING, self.ring.nodes)
+        for index in list(self._queues):
+            self._background_task(self._send(index, message))
+
+    def _background_task(self, coro):
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _adopt_orphans(self):
+        """Журналы ответов, очереди резюме и таймеры без работающего воркера передаются оставшимся"""
+        nodes = self.ring.nodes
+        if not nodes:
+            return
+        orphans = [path for index, path in sorted(indexed_paths(ANSWERS_JOURNAL_PATH).items())
+                   if index not in self._processes]
+        # Журнал запуска без шардирования
+        if os.path.exists(ANSWERS_JOURNAL_PATH):
+            orphans.append(ANSWERS_JOURNAL_PATH)
+        for path in orphans:
+            logger.info(f"Handing over answers journal {path} to worker {nodes[0]}")
+            await self._send(nodes[0], (ADOPT_JOURNAL, path))
+
+        spools = [path for index, path in sorted(indexed_paths(RESUME_SPOOL_DIR).items())
+                  if index not in self._processes]
+        if os.path.isdir(RESUME_SPOOL_DIR):
+            spools.append(RESUME_SPOOL_DIR)
+        for path in spools:
+            logger.info(f"Handing over resume spool {path} to worker {nodes[0]}")
+            await self._send(nodes[0], (ADOPT_SPOOL, path))
+
+        # Файлы таймеров без работающего воркера (и файл запуска без шардирования) читает супервизор
+        from timers import take_deadlines
+        paths = [path for index, path in indexed_paths(TIMERS_DB_PATH).items() if index not in self._processes]
+        paths.append(TIMERS_DB_PATH)
+        for path in paths:
+            deadlines = await asyncio.to_thread(take_deadlines, path)
+            if deadlines:
+                logger.info(f"Handing over {len(deadlines)} deadlines from {path}")
+                await self._route_deadlines(deadlines)
+
+    async def _route_deadlines(self, deadlines: List[Tuple[str, float, Dict[str, Any]]]):
+        """Передать таймеры воркерам-владельцам пользователей"""
+        by_owner: Dict[int, list] = {}
+        for entry in deadlines:
+            by_owner.setdefault(self.ring.get(entry[2].get('user_id', 0)), []).append(entry)
+        for index, entries in by_owner.items():
+            await self._send(index, (ADOPT_DEADLINES, entries))
+
+    async def _events_loop(self):
+        """События воркеров"""
+        loop = asyncio.get_running_loop()
+        while True:
+            event = await loop.run_in_executor(None, self._events.get)
+            if event is None:
+                break
+            command, argument = event
+            if command == RELEASED_DEADLINES:
+                await self._route_deadlines(argument)
+            else:
+                logger.error(f"Unknown worker event {command!r}")
+
+    async def _send(self, index: int, message: Optional[Tuple[str, Any]]):
+        """Отправить управляющее сообщение воркеру, дождавшись места в его очереди"""
+        # Блокировка сохраняет порядок сообщений одному воркеру, пока его очередь заполнена
+        async with self._send_locks.setdefault(index, asyncio.Lock()):
+            while True:
+                updates = self._queues.get(index)
+                if updates is None:
+                    return
+                try:
+                    updates.put_nowait(message)
+                    return
+                except queue.Full:
+                    await asyncio.sleep(0.05)
+
+    def _spawn(self, index: int):
+        process = self._context.Process(
+            target=worker_main,
+            args=(index, self._queues[index], self._events, self.ring.nodes),
+            name=f'hr-bot-worker-{index}',
+            # Не daemon: воркер запускает пул процессов проверки PDF; остановку воркеров выполняет run()
+            daemon=False,
+        )
+        process.start()
+        self._processes[index] = process
+
+    async def _monitor(self):
+        """Перезапуск упавших воркеров с тем же индексом (кольцо не меняется)"""
+        while True:
+            await asyncio.sleep(MONITOR_INTERVAL)
+            for index, process in list(self._processes.items()):
+                if not process.is_alive():
+                    logger.error(f"Worker {index} exited with code {process.exitcode}, restarting")
+                    self._spawn(index)
+
+    # ==================== МАРШРУТИЗАЦИЯ ====================
+
+    def route(self, raw_update: Dict[str, Any]) -> bool:
+        """Отправить обновление воркеру. False - очередь воркера заполнена"""
+        index = self.ring.get(extract_user_id(raw_update))
+        try:
+            self._queues[index].put_nowait(raw_update)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.routed += 1
+        return True
+
+    async def _route_wait(self, raw_update: Dict[str, Any]):
+        """Отправить обновление, дождавшись места в очереди воркера"""
+        while not self.route(raw_update):
+            await asyncio.sleep(0.05)
+
+    # ==================== ПРИЕМ ОБНОВЛЕНИЙ ====================
+
+    async def _poll(self, bot, allowed_updates: List[str]):
+        await bot.delete_webhook(drop_pending_updates=True)
+        offset = None
+        while True:
+            try:
+                updates = await bot.get_updates(offset=offset, timeout=30, allowed_updates=allowed_updates)
+            except Exception as e:
+                logger.error(f"getUpdates failed: {e}")
+                await asyncio.sleep(1)
+                continue
+            for update in updates:
+                await self._route_wait(to_raw_update(update))
+                offset = update.update_id + 1
+
+    async def _serve_webhook(self, bot, allowed_updates: List[str]):
+        from aiohttp import web
+        from webhook import create_webhook_app, webhook_secret
+
+        if not WEBHOOK_BASE_URL:
+            raise RuntimeError("WEBHOOK_BASE_URL is required in webhook mode")
+        secret = webhook_secret()
+        runner = web.AppRunner(create_webhook_app(self.route, secret))
+        await runner.setup()
+        await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+        try:
+            await bot.set_webhook(
+                f"{WEBHOOK_BASE_URL.rstrip('/')}{WEBHOOK_PATH}",
+                secret_token=secret,
+                allowed_updates=allowed_updates,
+                drop_pending_updates=True,
+            )
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+    async def run(self):
+        """Запуск воркеров и приема обновлений (до отмены задачи)"""
+        from handlers import router
+        from main import create_bot, set_bot_commands
+
+        for _ in range(self.initial_workers):
+            self.add_worker()
+        await self._adopt_orphans()
+
+        # SIGTTIN / SIGTTOU - добавить / убрать воркер
+        loop = asyncio.get_running_loop()
+        for sig, action in ((getattr(signal, 'SIGTTIN', None), self.add_worker),
+                            (getattr(signal, 'SIGTTOU', None), self.remove_worker)):
+            if sig is not None:
+                loop.add_signal_handler(sig, action)
+
+        bot = create_bot()
+        monitor = asyncio.create_task(self._monitor())
+        events = asyncio.create_task(self._events_loop())
+        try:
+            await set_bot_commands(bot)
+            allowed_updates = router.resolve_used_update_types()
+            if BOT_MODE == 'webhook':
+                await self._serve_webhook(bot, allowed_updates)
+            else:
+                await self._poll(bot, allowed_updates)
+        finally:
+            monitor.cancel()
+            for task in self._background:
+                task.cancel()
+            for index in list(self._processes):
+                await self._send(index, None)
+            for index, process in self._processes.items():
+                await loop.run_in_executor(None, process.join, 30)
+                if process.is_alive():
+                    logger.error(f"Worker {index} did not stop in time, terminating")
+                    process.terminate()
+            self._events.put_nowait(None)
+            await events
+            await bot.session.close()
+            logger.info(f"Supervisor stopped: routed={self.routed}, dropped={self.dropped}")
@@ -12,6 +12,7 @@ class RegistrationStates(StatesGroup):
     waiting_for_telegram_username = State()
     waiting_for_city = State()
     waiting_for_resume = State()
+    waiting_for_screening = State()
 
 
 class InterviewStates(StatesGroup):
@@ -0,0 +1,104 @@
+"""
+Статус кандидата по вакансии для быстрых вопросов (кнопка "Какой мой статус?")
+
+Статус берется с бэкенда (get_screening_status) и кэшируется на время, зависящее от статуса:
+итоговые (interview_ok, interview_failed, screening_failed) больше не меняются и хранятся
+STATUS_CACHE_FINAL_TTL, промежуточные - STATUS_CACHE_TTL, отсутствие процесса (404) -
+STATUS_CACHE_NEGATIVE_TTL. Ошибки бэкенда не кэшируются. Одновременные запросы статуса
+одной пары кандидат/вакансия объединяются в один запрос к бэкенду.
+
+Бот сам сбрасывает запись, когда меняет статус (запуск скрининга, завершение интервью),
+и подставляет свежий статус, когда узнает его другим путем (опрос скрининга).
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from backend_client import ApiResponse, get_backend_client
+from cache import TTLCache
+from config import STATUS_CACHE_SIZE, STATUS_CACHE_TTL, STATUS_CACHE_FINAL_TTL, STATUS_CACHE_NEGATIVE_TTL
+
+logger = logging.getLogger(__name__)
+
+# Статусы, которые больше не меняются
+FINAL_STATUSES = {'interview_ok', 'interview_failed', 'screening_failed'}
+
+
+class StatusService:
+    """Кэш статусов кандидатов с объединением одновременных запросов"""
+
+    def __init__(self, maxsize: int = STATUS_CACHE_SIZE):
+        self._cache = TTLCache(maxsize=maxsize, ttl=STATUS_CACHE_TTL)
+        self._inflight: Dict[Tuple[int, str], asyncio.Task] = {}
+        self.requests = 0
+        self.coalesced = 0
+
+    async def get_status(self, candidate_id: int, vacancy_id) -> ApiResponse:
+        """
+        Статус кандидата по вакансии
+
+        Returns:
+            ApiResponse с meta бэкенда ({'status': ...}); 404 - процесса отбора нет, 0 - бэкенд недоступен
+        """
+        key = (candidate_id, str(vacancy_id))
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.requests += 1
+            task = asyncio.create_task(get_backend_client().get_screening_status(candidate_id, key[1]))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        # shield: отмена одного ожидающего не отменяет запрос остальных
+        return await asyncio.shield(task)
+
+    def remember(self, candidate_id: int, vacancy_id, meta: Dict[str, Any]):
+        """Свежий статус, полученный ботом другим путем"""
+        key = (candidate_id, str(vacancy_id))
+        self._inflight.pop(key, None)
+        self._store(key, ApiResponse(meta, 200))
+
+    def invalidate(self, candidate_id: int, vacancy_id):
+        """Статус изменился: следующий запрос пойдет на бэкенд"""
+        key = (candidate_id, str(vacancy_id))
+        # Ответ уже идущего запроса может оказаться устаревшим - он не попадет в кэш
+        self._inflight.pop(key, None)
+        self._cache.invalidate(key)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            **self._cache.get_stats(),
+            'requests': self.requests,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._inflight),
+        }
+
+    def _finish(self, key: Tuple[int, str], task: asyncio.Task):
+        if self._inflight.get(key) is not task:
+            return
+        del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._store(key, task.result())
+
+    def _store(self, key: Tuple[int, str], response: ApiResponse):
+        ttl = _ttl_for(response)
+        if ttl:
+            self._cache.set(key, response, ttl=ttl)
+
+
+def _ttl_for(response: ApiResponse) -> Optional[float]:
+    """Время жизни ответа в кэше (None - не кэшировать)"""
+    if response.status == 404:
+        return STATUS_CACHE_NEGATIVE_TTL
+    if not response.ok or not isinstance(response.data, dict):
+        return None
+    return STATUS_CACHE_FINAL_TTL if response.data.get('status') in FINAL_STATUSES else STATUS_CACHE_TTL
+
+
+# Глобальный экземпляр
+status_service = StatusService()
@@ -0,0 +1,21 @@
+"""
+Общая настройка тестов: модули бота импортируются из корня репозитория без .env,
+файлы состояния - во временной директории
+"""
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+os.environ.setdefault('BOT_TOKEN', '123456:TEST-TOKEN')
+os.environ.setdefault('BACKEND_BASE_URL', 'http://127.0.0.1:1')
+os.environ.setdefault('METRICS_PORT', '0')
+
+DATA_DIR = tempfile.mkdtemp(prefix='hr-bot-tests-')
+for name, file_name in (('FSM_SQLITE_PATH', 'fsm.sqlite3'), ('TIMERS_DB_PATH', 'timers.sqlite3'),
+                        ('ANSWERS_JOURNAL_PATH', 'answers.journal'), ('RESUMES_DIR', 'resumes'),
+                        ('RESUME_INDEX_PATH', 'resume_index.sqlite3')):
+    os.environ.setdefault(name, os.path.join(DATA_DIR, file_name))
@@ -0,0 +1,130 @@
+"""
+Журнал очереди ответов: восстановление после сбоя, сжатие, прием чужого журнала
+"""
+import asyncio
+import json
+
+import answer_queue as answer_queue_module
+from answer_queue import AnswerQueue, read_pending
+from backend_client import ApiResponse
+
+
+class FakeBackend:
+    """Бэкенд ответов: запоминает ключи идемпотентности; недоступный отвечает 503"""
+
+    def __init__(self, available: bool = True):
+        self.available = available
+        self.keys = []
+
+    async def post_answer_by_question_id(self, candidate_id, question_id, answer, time_taken,
+                                         idempotency_key=None):
+        if not self.available:
+            return ApiResponse(None, 503)
+        self.keys.append(idempotency_key)
+        return ApiResponse({}, 201)
+
+
+def _use_backend(monkeypatch, backend):
+    monkeypatch.setattr(answer_queue_module, 'get_backend_client', lambda: backend)
+
+
+def _lines(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_replay_after_crash(tmp_path, monkeypatch):
+    journal = tmp_path / 'answers.journal'
+    added = [{'op': 'add', 'id': f'r{i}', 'candidate_id': 1, 'question_id': i, 'answer': 'a',
+              'time_taken': 1, 'ts': 0} for i in range(3)]
+    # r0 подтвержден, процесс упал посреди записи последней строки
+    journal.write_text(''.join(json.dumps(r) + '\n' for r in added) + json.dumps({'op': 'ack', 'id': 'r0'})
+                       + '\n{"op": "ack", "id": "r1', encoding='utf-8')
+    backend = FakeBackend()
+    _use_backend(monkeypatch, backend)
+
+    async def scenario():
+        queue = AnswerQueue(str(journal))
+        await queue.start()
+        assert await queue.drain(1, timeout=5)
+        await queue.stop()
+        return queue
+
+    queue = asyncio.run(scenario())
+    assert sorted(backend.keys) == ['r1', 'r2']
+    assert queue.get_stats()['sent'] == 2
+    assert read_pending(str(journal)) == []
+
+
+def test_unsent_answers_survive_restart(tmp_path, monkeypatch):
+    journal = str(tmp_path / 'answers.journal')
+    backend = FakeBackend(available=False)
+    _use_backend(monkeypatch, backend)
+
+    async def first_run():
+        queue = AnswerQueue(journal)
+        await queue.start()
+        ids = [await queue.submit(7, i, 'answer', 3) for i in range(4)]
+        await queue.stop(timeout=0.1)
+        return ids
+
+    ids = asyncio.run(first_run())
+    assert sorted(r['id'] for r in read_pending(journal)) == sorted(ids)
+
+    backend.available = True
+
+    async def second_run():
+        queue = AnswerQueue(journal)
+        await queue.start()
+        assert await queue.drain(7, timeout=5)
+        await queue.stop()
+
+    asyncio.run(second_run())
+    assert sorted(backend.keys) == sorted(ids)
+    assert read_pending(journal) == []
+
+
+def test_runtime_compaction_keeps_unacked(tmp_path, monkeypatch):
+    journal = str(tmp_path / 'answers.journal')
+    backend = FakeBackend()
+    _use_backend(monkeypatch, backend)
+    monkeypatch.setattr(answer_queue_module, 'ANSWER_JOURNAL_COMPACT_ACKS', 5)
+
+    async def scenario():
+        queue = AnswerQueue(journal)
+        await queue.start()
+        for i in range(20):
+            await queue.submit(1, i, 'a', 1)
+        assert await queue.drain(1, timeout=5)
+        backend.available = False
+        left = await queue.submit(2, 0, 'a', 1)
+        lines = _lines(journal)
+        await queue.stop(timeout=0.1)
+        return left, lines
+
+    left, lines = asyncio.run(scenario())
+    # Без сжатия в журнале было бы 20 добавлений и 20 подтверждений
+    assert len(lines) < 10
+    assert [r['id'] for r in read_pending(journal)] == [left]
+
+
+def test_adopt_orphaned_journal(tmp_path, monkeypatch):
+    own = str(tmp_path / 'answers.journal.0')
+    orphan = tmp_path / 'answers.journal.3'
+    orphan.write_text(json.dumps({'op': 'add', 'id': 'o1', 'candidate_id': 5, 'question_id': 1,
+                                  'answer': 'a', 'time_taken': 1, 'ts': 0}) + '\n', encoding='utf-8')
+    backend = FakeBackend()
+    _use_backend(monkeypatch, backend)
+
+    async def scenario():
+        queue = AnswerQueue(own)
+        await queue.start()
+        adopted = await queue.adopt(str(orphan))
+        assert await queue.drain(5, timeout=5)
+        await queue.stop()
+        return adopted
+
+    assert asyncio.run(scenario()) == 1
+    assert backend.keys == ['o1']
+    assert not orphan.exists()
+    assert read_pending(own) == []
@@ -0,0 +1,167 @@
+"""
+Объединение одинаковых GET-запросов в BackendClient
+"""
+import asyncio
+
+from aiohttp import web
+
+from backend_client import BackendClient
+
+
+class FakeMeta:
+    """Бэкенд со статусом кандидата; GET можно задержать до release"""
+
+    def __init__(self):
+        self.status = 'screening_ok'
+        self.gets = 0
+        self.release = asyncio.Event()
+        self.questions = [{'id': 'q1', 'content': 'Опыт?'}, {'id': 'q2', 'content': 'Ожидания?'}]
+        self.question_gets = 0
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/api/v1/meta/{candidate_id}/{vacancy_id}', self.get_meta)
+        app.router.add_post('/api/v1/interview/process', self.process_interview)
+        app.router.add_get('/api/v1/questions/{vacancy_id}', self.get_questions)
+        return app
+
+    async def get_meta(self, request: web.Request) -> web.Response:
+        self.gets += 1
+        status = self.status  # статус на момент получения запроса
+        await self.release.wait()
+        return web.json_response({'status': status})
+
+    async def get_questions(self, request: web.Request) -> web.Response:
+        self.question_gets += 1
+        return web.json_response(self.questions)
+
+    async def process_interview(self, request: web.Request) -> web.Response:
+        self.status = 'interview_ok'
+        return web.json_response({}, status=201)
+
+
+async def _with_backend(scenario):
+    fake = FakeMeta()
+    runner = web.AppRunner(fake.create_app())
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    client = BackendClient(f'http://127.0.0.1:{port}')
+    try:
+        return await scenario(client, fake)
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+def test_concurrent_gets_share_one_request():
+    async def scenario(client, fake):
+        calls = [asyncio.create_task(client.get_screening_status(1, 'v')) for _ in range(10)]
+        await asyncio.sleep(0.1)
+        fake.release.set()
+        results = await asyncio.gather(*calls)
+        return fake.gets, results, client.get_resilience_stats()['endpoints']['get_screening_status']
+
+    gets, results, stats = asyncio.run(_with_backend(scenario))
+    assert gets == 1
+    assert all(result == ({'status': 'screening_ok'}, 200) for result in results)
+    assert stats['requests'] == 1
+    assert stats['coalesced'] == 9
+
+
+def test_get_after_write_does_not_join_earlier_get():
+    async def scenario(client, fake):
+        before = asyncio.create_task(client.get_screening_status(1, 'v'))
+        await asyncio.sleep(0.1)
+        await client.post_update_status(1, 'v')
+        after = asyncio.create_task(client.get_screening_status(1, 'v'))
+        await asyncio.sleep(0.1)
+        fake.release.set()
+        return fake.gets, await before, await after
+
+    gets, before, after = asyncio.run(_with_backend(scenario))
+    assert gets == 2
+    assert before.data == {'status': 'screening_ok'}
+    assert after.data == {'status': 'interview_ok'}
+
+
+def test_fresh_get_sends_own_request():
+    async def scenario(client, fake):
+        shared = asyncio.create_task(client.get_screening_status(1, 'v'))
+        await asyncio.sleep(0.1)
+        fake.status = 'interview_failed'
+        fresh = asyncio.create_task(client.get_screening_status(1, 'v', fresh=True))
+        await asyncio.sleep(0.1)
+        fake.release.set()
+        return fake.gets, await shared, await fresh
+
+    gets, shared, fresh = asyncio.run(_with_backend(scenario))
+    assert gets == 2
+    assert shared.data == {'status': 'screening_ok'}
+    assert fresh.data == {'status': 'interview_failed'}
+
+
+def test_cancelled_caller_does_not_cancel_shared_request():
+    async def scenario(client, fake):
+        first = asyncio.create_task(client.get_screening_status(1, 'v'))
+        second = asyncio.create_task(client.get_screening_status(1, 'v'))
+        await asyncio.sleep(0.1)
+        first.cancel()
+        fake.release.set()
+        return await second
+
+    assert asyncio.run(_with_backend(scenario)) == ({'status': 'screening_ok'}, 200)
+
+
+def test_cached_questions_are_returned_as_copies():
+    async def scenario(client, fake):
+        first, _ = await client.get_questions_by_vacancy_id('v')
+        first.pop()
+        first[0]['content'] = 'изменено'
+        second, _ = await client.get_questions_by_vacancy_id('v')
+        return second, client._endpoint_stats['get_questions']['cache_hits']
+
+    questions, hits = asyncio.run(_with_backend(scenario))
+    assert hits == 1
+    assert questions == [{'id': 'q1', 'content': 'Опыт?'}, {'id': 'q2', 'content': 'Ожидания?'}]
+
+
+def test_pool_stats_count_new_and_reused_connections():
+    async def scenario(client, fake):
+        for index in range(3):
+            await client.get_questions_by_vacancy_id(f'v{index}')
+        return client.get_pool_stats()
+
+    stats = asyncio.run(_with_backend(scenario))
+    # keep-alive: одно соединение на все запросы
+    assert (stats['created'], stats['reused'], stats['in_use']) == (1, 2, 0)
+
+
+def test_invalidated_questions_are_fetched_again():
+    async def scenario(client, fake):
+        await client.get_questions_by_vacancy_id('v')
+        await client.get_questions_by_vacancy_id('v')
+        fake.questions = [{'id': 'q3', 'content': 'Новый вопрос'}]
+        client.invalidate_questions('v')
+        questions, _ = await client.get_questions_by_vacancy_id('v')
+        return questions, fake.question_gets
+
+    questions, gets = asyncio.run(_with_backend(scenario))
+    assert questions == [{'id': 'q3', 'content': 'Новый вопрос'}]
+    assert gets == 2
+
+
+def test_prefetch_started_before_invalidation_is_not_cached():
+    async def scenario(client, fake):
+        client.prefetch_questions('v')
+        task = client._questions_prefetch['v']
+        client.invalidate_questions()
+        await task
+        cached = 'v' in client._questions_cache
+        await client.get_questions_by_vacancy_id('v')
+        return cached, fake.question_gets
+
+    cached, gets = asyncio.run(_with_backend(scenario))
+    assert not cached
+    assert gets == 2
@@ -0,0 +1,70 @@
+"""
+Хранилище FSM в SQLite: объединение записи, удаление пустых записей
+"""
+import asyncio
+import sqlite3
+
+from aiogram.fsm.storage.base import StorageKey
+
+from fsm_storage import SQLiteStorage
+
+
+def _key(user_id: int) -> StorageKey:
+    return StorageKey(bot_id=1, chat_id=user_id, user_id=user_id)
+
+
+def _rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {key: (state, data) for key, state, data in conn.execute('SELECT key, state, data FROM fsm')}
+    finally:
+        conn.close()
+
+
+def test_writes_are_coalesced_and_read_back(tmp_path):
+    path = str(tmp_path / 'fsm.sqlite3')
+
+    async def scenario():
+        storage = SQLiteStorage(path, flush_interval=60)
+        await storage.set_state(_key(1), 'Form:name')
+        await storage.set_data(_key(1), {'name': 'Иван'})
+        await storage.set_data(_key(1), {'name': 'Иван', 'phone': '+79991234567'})
+        # До сброса чтение видит отложенную запись
+        assert await storage.get_state(_key(1)) == 'Form:name'
+        await storage.flush()
+        stats = storage.get_stats()
+        await storage.close()
+
+        reopened = SQLiteStorage(path)
+        state, data = await reopened.get_state(_key(1)), await reopened.get_data(_key(1))
+        await reopened.close()
+        return stats, state, data
+
+    stats, state, data = asyncio.run(scenario())
+    assert stats['writes_staged'] == 3 and stats['writes_flushed'] == 1
+    assert state == 'Form:name'
+    assert data == {'name': 'Иван', 'phone': '+79991234567'}
+
+
+def test_flush_deletes_only_emptied_keys_of_the_batch(tmp_path):
+    path = str(tmp_path / 'fsm.sqlite3')
+
+    async def scenario():
+        storage = SQLiteStorage(path, flush_interval=60)
+        for user_id in (1, 2):
+            await storage.set_state(_key(user_id), 'Form:name')
+        await storage.flush()
+        # Пустая запись, оставленная другим процессом: не входит в пачку и не удаляется
+        storage._connect().execute("INSERT INTO fsm (key, state, data) VALUES ('foreign', NULL, '{}')")
+        storage._connect().commit()
+
+        await storage.set_state(_key(1), None)
+        await storage.set_data(_key(1), {})
+        await storage.flush()
+        await storage.close()
+
+    asyncio.run(scenario())
+    rows = _rows(path)
+    assert len(rows) == 2
+    assert 'foreign' in rows
+    assert ('Form:name', '{}') in rows.values()
@@ -0,0 +1,106 @@
+"""
+Обработчики скрининга: состояние при запуске, /resume после долгой проверки
+"""
+import asyncio
+import datetime
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Chat, Message, User
+
+import handlers
+from backend_client import ApiResponse
+from states import RegistrationStates
+
+KEY = StorageKey(bot_id=1, chat_id=10, user_id=10)
+
+
+class FakeScreeningManager:
+    """Менеджер скрининга: запоминает задачи и состояние FSM на момент постановки"""
+
+    def __init__(self, storage: MemoryStorage, pending: bool = False):
+        self.storage = storage
+        self.pending = pending
+        self.jobs = []
+        self.states = []
+
+    def submit(self, job) -> bool:
+        self.jobs.append(job)
+        self.states.append(self.storage.storage[KEY].state)
+        return True
+
+    def is_pending(self, candidate_id, vacancy_id) -> bool:
+        return self.pending
+
+
+class FakeOutbound:
+    def __init__(self):
+        self.texts = []
+
+    async def send_message(self, bot, chat_id, text, priority=None, **kwargs):
+        self.texts.append(text)
+
+    async def answer(self, message, text, priority=None, **kwargs):
+        self.texts.append(text)
+
+
+def _setup(monkeypatch, pending: bool = False, status: str = 'screening_in_progress'):
+    storage = MemoryStorage()
+    manager = FakeScreeningManager(storage, pending)
+    sent = FakeOutbound()
+    monkeypatch.setattr(handlers, 'screening_manager', manager)
+    monkeypatch.setattr(handlers, 'outbound', sent)
+
+    async def get_screening_status(candidate_id, vacancy_id, fresh=False):
+        return ApiResponse({'status': status}, 200)
+
+    monkeypatch.setattr(handlers.backend_client, 'get_screening_status', get_screening_status)
+    return FSMContext(storage=storage, key=KEY), manager, sent
+
+
+def _resume_command() -> Message:
+    return Message(
+        message_id=1, date=datetime.datetime.now(), text='/resume',
+        chat=Chat(id=KEY.chat_id, type='private'), from_user=User(id=KEY.user_id, is_bot=False, first_name='Иван'),
+    )
+
+
+def test_start_screening_sets_state_before_submit(monkeypatch):
+    state, manager, sent = _setup(monkeypatch)
+
+    async def scenario():
+        await state.set_state(RegistrationStates.waiting_for_resume)
+        return await handlers.start_screening(None, state, 1, 'v', None)
+
+    assert asyncio.run(scenario())
+    assert manager.states == [RegistrationStates.waiting_for_screening.state]
+
+
+def test_resume_after_slow_screening_polls_again(monkeypatch):
+    state, manager, sent = _setup(monkeypatch)
+
+    async def scenario():
+        await state.set_data({'candidate_id': 1, 'vacancy_id': 'v'})
+        await state.set_state(RegistrationStates.waiting_for_screening)
+        await handlers.cmd_resume(_resume_command(), state)
+        return await state.get_state()
+
+    assert asyncio.run(scenario()) == RegistrationStates.waiting_for_screening.state
+    assert len(manager.jobs) == 1
+    # Скрининг уже запущен на бэкенде: только опрос статуса
+    assert manager.jobs[0].trigger is False
+    assert sent.texts == [handlers.messages('screening.started')]
+
+
+def test_resume_while_screening_is_polled_does_not_submit_twice(monkeypatch):
+    state, manager, sent = _setup(monkeypatch, pending=True)
+
+    async def scenario():
+        await state.set_data({'candidate_id': 1, 'vacancy_id': 'v'})
+        await state.set_state(RegistrationStates.waiting_for_screening)
+        await handlers.cmd_resume(_resume_command(), state)
+
+    asyncio.run(scenario())
+    assert manager.jobs == []
+    assert sent.texts == [handlers.messages('screening.in_progress')]
@@ -0,0 +1,43 @@
+"""
+Остановка сервисов бота: хранилище FSM закрывается после таймеров и очереди резюме
+"""
+import asyncio
+
+from aiogram import Bot, Dispatcher
+from aiogram.fsm.storage.memory import MemoryStorage
+
+import main
+
+
+class RecordingStorage(MemoryStorage):
+    def __init__(self, events):
+        super().__init__()
+        self.events = events
+
+    async def close(self):
+        self.events.append('storage')
+
+
+def test_fsm_storage_outlives_background_services(monkeypatch):
+    events = []
+
+    async def stopped(name):
+        events.append(name)
+
+    async def warm_up_services(backend_client):
+        pass
+
+    monkeypatch.setattr(main, 'warm_up_services', warm_up_services)
+    monkeypatch.setattr(main.deadline_scheduler, 'stop', lambda: stopped('timers'))
+    monkeypatch.setattr(main.resume_spool, 'stop', lambda: stopped('spool'))
+
+    async def scenario():
+        dp = Dispatcher(storage=RecordingStorage(events))
+        bot = Bot('1:test')
+        async with main.bot_services(bot, dp, metrics_port=0, record_path='', retention_interval=0):
+            # Как в конце start_polling / run_webhook
+            await dp.emit_shutdown(bot=bot)
+            events.append('dispatcher')
+
+    asyncio.run(scenario())
+    assert events == ['dispatcher', 'timers', 'spool', 'storage']
@@ -0,0 +1,21 @@
+"""
+HTTP-сервер метрик
+"""
+import asyncio
+import socket
+
+from metrics import start_metrics_server
+
+
+def test_busy_port_does_not_stop_the_bot():
+    async def scenario():
+        with socket.socket() as busy:
+            busy.bind(('127.0.0.1', 0))
+            busy.listen()
+            return await start_metrics_server(busy.getsockname()[1], host='127.0.0.1')
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_disabled_without_port():
+    assert asyncio.run(start_metrics_server(0)) is None
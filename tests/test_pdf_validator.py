@@ -0,0 +1,57 @@
+"""
+Проверка PDF-резюме: корректный файл, шифрование, обрыв, переименованная картинка
+"""
+import asyncio
+
+from bench.common import make_pdf
+from pdf_validator import PdfCheck, PdfValidator, check_header, validate_pdf
+
+JPEG = b'\xff\xd8\xff\xe0\x00\x10JFIF\x00' + b'\x00' * 4096
+
+
+def test_valid_pdf_is_accepted_with_page_count():
+    assert validate_pdf(make_pdf(pages=3, padding=1000)) == PdfCheck(True, pages=3)
+    # Мусор перед заголовком допускается
+    assert validate_pdf(b'junk\n' + make_pdf(pages=2)).ok
+
+
+def test_encrypted_pdf_is_rejected():
+    pdf = make_pdf().replace(b'/Root 1 0 R', b'/Root 1 0 R /Encrypt 9 0 R')
+    assert validate_pdf(pdf).reason == 'encrypted'
+
+
+def test_truncated_pdf_is_rejected():
+    pdf = make_pdf(pages=3, padding=1000)
+    assert validate_pdf(pdf[:len(pdf) // 2]).reason == 'corrupt'
+
+
+def test_broken_xref_is_rejected():
+    pdf = bytearray(make_pdf(pages=2))
+    position = pdf.index(b'2 0 obj')
+    pdf[position:position + 1] = b'7'
+    assert validate_pdf(bytes(pdf)).reason == 'corrupt'
+
+
+def test_renamed_jpeg_is_rejected_by_header():
+    assert not check_header(JPEG[:1024])
+    assert check_header(make_pdf()[:1024])
+    assert validate_pdf(JPEG).reason == 'not_pdf'
+
+
+def test_page_limits():
+    assert validate_pdf(make_pdf(pages=0)).reason == 'no_pages'
+    assert validate_pdf(make_pdf(pages=6), max_pages=5).reason == 'too_many_pages'
+
+
+def test_pool_validation_counts_results():
+    validator = PdfValidator(workers=1, timeout=30)
+
+    async def scenario():
+        return [await validator.validate(make_pdf()), await validator.validate(JPEG)]
+
+    try:
+        good, bad = asyncio.run(scenario())
+    finally:
+        validator.shutdown()
+    assert good.ok and bad.reason == 'not_pdf'
+    assert validator.get_stats() == {'workers': 1, 'accepted': 1, 'rejected': 1, 'unchecked': 0}
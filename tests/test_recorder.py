@@ -0,0 +1,42 @@
+"""
+Запись трафика: отдельный файл на запуск, воспроизведение старых журналов
+"""
+import asyncio
+import gzip
+import json
+
+from bench.replay import load
+from recorder import UpdateRecorder, read_recording, run_path
+
+
+def test_run_path_keeps_extension_and_worker_suffix():
+    started = 1792324800.0
+    stamp = run_path('updates', started)[len('updates-'):]
+    assert run_path('data/updates.log.gz', started) == f'data/updates-{stamp}.log.gz'
+    assert run_path('data/updates.log.gz.1', started, 2) == f'data/updates-{stamp}-2.log.gz.1'
+
+
+def test_each_run_writes_its_own_file(tmp_path):
+    base = str(tmp_path / 'updates.log.gz')
+
+    async def run():
+        recorder = UpdateRecorder(base, flush_interval=60)
+        await recorder.start()
+        recorder.record_backend('get', 'GET', '/api/candidates/5', {}, 200, 0.01)
+        await recorder.stop()
+        return recorder.path
+
+    first, second = asyncio.run(run()), asyncio.run(run())
+    assert first != second
+    assert len(read_recording(first)) == 1 and len(read_recording(second)) == 1
+
+
+def test_legacy_multi_run_file_is_replayed_sequentially(tmp_path):
+    path = str(tmp_path / 'updates.log.gz')
+    for times in ((0.0, 1.0, 2.5), (0.0, 1.5)):
+        with gzip.open(path, 'ab') as f:
+            for t in times:
+                f.write((json.dumps({'u': {'update_id': 1}, 't': t}) + '\n').encode())
+
+    updates, _ = load(path)
+    assert [record['t'] for record in updates] == [0.0, 1.0, 2.5, 2.5, 4.0]
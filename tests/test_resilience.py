@@ -0,0 +1,84 @@
+"""
+Автоматический выключатель и политика повторов
+"""
+from types import SimpleNamespace
+
+import resilience
+from resilience import CircuitBreaker, RetryPolicy
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _breaker(monkeypatch, failures: int = 3, reset_timeout: float = 30) -> (CircuitBreaker, Clock):
+    clock = Clock()
+    monkeypatch.setattr(resilience, 'time', SimpleNamespace(monotonic=clock))
+    return CircuitBreaker('test', failures, reset_timeout), clock
+
+
+def test_opens_after_consecutive_failures(monkeypatch):
+    breaker, clock = _breaker(monkeypatch)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # успех сбрасывает счетчик подряд идущих ошибок
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.get_stats() == {'state': 'open', 'consecutive_failures': 3, 'opened': 1, 'rejected': 1}
+
+
+def test_half_open_lets_one_probe_through(monkeypatch):
+    breaker, clock = _breaker(monkeypatch, failures=1)
+    breaker.record_failure()
+    clock.now += 29
+    assert not breaker.allow()
+
+    clock.now += 1
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # второй запрос ждет результата пробного
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+
+def test_failed_probe_opens_again(monkeypatch):
+    breaker, clock = _breaker(monkeypatch, failures=5)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+
+    breaker.record_failure()  # в half_open хватает одной ошибки
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.opened == 2
+    clock.now += 29
+    assert not breaker.allow()
+
+
+def test_stuck_probe_does_not_block_forever(monkeypatch):
+    breaker, clock = _breaker(monkeypatch, failures=1)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    # Пробный запрос отменен и не сообщил результат
+    clock.now += 30
+    assert breaker.allow()
+
+
+def test_retry_policy_retries_only_listed_statuses():
+    policy = RetryPolicy(attempts=3, initial_delay=0.2, max_delay=1.0)
+    assert policy.should_retry(0, 503) and policy.should_retry(1, 0)
+    assert not policy.should_retry(2, 503)  # попытки кончились
+    assert not policy.should_retry(0, 500) and not policy.should_retry(0, 404)
+    assert 0.1 <= policy.delay(0) <= 0.2
+    assert 0.5 <= policy.delay(10) <= 1.0
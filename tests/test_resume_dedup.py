@@ -0,0 +1,115 @@
+"""
+Дедупликация резюме по SHA-256: индекс и прием файла
+"""
+import asyncio
+import hashlib
+
+from aiogram.types import Document
+
+import resume_ingest
+from bench.common import make_pdf
+from pdf_validator import PdfCheck
+from resume_index import ResumeIndex
+
+
+class FakeStorage:
+    def __init__(self):
+        self.uploads = []
+        self.copies = []
+
+    def is_available(self) -> bool:
+        return True
+
+    async def put_bytes_async(self, data, tg_id, vacancy_id, sha256=None):
+        self.uploads.append((tg_id, vacancy_id))
+        return f'{tg_id}/{vacancy_id}'
+
+    async def copy_object_async(self, source_key, tg_id, vacancy_id):
+        self.copies.append((source_key, tg_id, vacancy_id))
+        return f'{tg_id}/{vacancy_id}'
+
+
+class FakeSpool:
+    async def discard(self, candidate_id, vacancy_id):
+        pass
+
+
+def _setup(monkeypatch, tmp_path, files):
+    """files: file_id -> содержимое, которое отдает "Telegram" """
+    index = ResumeIndex(str(tmp_path / 'resume_index.sqlite3'))
+    storage = FakeStorage()
+    downloads = []
+
+    async def stream_telegram_file(bot, file_id):
+        downloads.append(file_id)
+        yield files[file_id]
+
+    async def validate(data):
+        return PdfCheck(True, pages=1)
+
+    monkeypatch.setattr(resume_ingest, 'resume_index', index)
+    monkeypatch.setattr(resume_ingest, 'storage_service', storage)
+    monkeypatch.setattr(resume_ingest, 'resume_spool', FakeSpool())
+    monkeypatch.setattr(resume_ingest, 'stream_telegram_file', stream_telegram_file)
+    monkeypatch.setattr(resume_ingest.pdf_validator, 'validate', validate)
+    return index, storage, downloads
+
+
+def _document(file_id: str, file_unique_id: str) -> Document:
+    return Document(file_id=file_id, file_unique_id=file_unique_id)
+
+
+def test_index_marks_screened_only_the_current_file(tmp_path):
+    async def scenario():
+        index = ResumeIndex(str(tmp_path / 'resume_index.sqlite3'))
+        await index.put(1, 'v', 'aaa', '1/v', 'u1')
+        await index.mark_screened(1, 'v', 'old-hash')
+        before = await index.get(1, 'v')
+        await index.mark_screened(1, 'v', 'aaa')
+        after = await index.get(1, 'v')
+        found = await index.find_by_hash('aaa')
+        await index.forget(['1/v'])
+        forgotten = await index.get(1, 'v'), await index.find_by_hash('aaa')
+        await index.close()
+        return before, after, found, forgotten
+
+    before, after, found, forgotten = asyncio.run(scenario())
+    assert not before.screened and after.screened
+    assert found == '1/v'
+    assert forgotten == (None, None)
+
+
+def test_resent_file_is_not_downloaded_or_uploaded(monkeypatch, tmp_path):
+    pdf = make_pdf()
+    index, storage, downloads = _setup(monkeypatch, tmp_path, {'f1': pdf, 'f2': pdf})
+
+    async def scenario():
+        first = await resume_ingest.ingest_resume(None, _document('f1', 'u1'), 1, 'v')
+        # Тот же файл Telegram: без скачивания
+        same_file = await resume_ingest.ingest_resume(None, _document('f1', 'u1'), 1, 'v')
+        # Другой файл с тем же содержимым: скачивается, но не загружается
+        same_content = await resume_ingest.ingest_resume(None, _document('f2', 'u2'), 1, 'v')
+        await index.close()
+        return first, same_file, same_content
+
+    first, same_file, same_content = asyncio.run(scenario())
+    assert first.s3_key == '1/v' and not first.duplicate
+    assert first.sha256 == hashlib.sha256(pdf).hexdigest()
+    assert same_file.duplicate and same_content.duplicate
+    assert downloads == ['f1', 'f2']
+    assert storage.uploads == [(1, 'v')]
+
+
+def test_same_content_for_another_candidate_is_copied(monkeypatch, tmp_path):
+    index, storage, downloads = _setup(monkeypatch, tmp_path, {'f1': make_pdf(), 'f2': make_pdf()})
+
+    async def scenario():
+        await resume_ingest.ingest_resume(None, _document('f1', 'u1'), 1, 'v')
+        result = await resume_ingest.ingest_resume(None, _document('f2', 'u2'), 2, 'v')
+        await index.close()
+        return result
+
+    result = asyncio.run(scenario())
+    assert result.s3_key == '2/v' and not result.duplicate
+    assert storage.uploads == [(1, 'v')]
+    assert storage.copies == [('1/v', 2, 'v')]
@@ -0,0 +1,134 @@
+"""
+Очередь резюме на диске: последнее резюме пары, прием очереди другого процесса
+"""
+import asyncio
+import os
+
+import resume_spool as resume_spool_module
+from resume_spool import ResumeSpool
+
+
+class FakeStorage:
+    """Хранилище: пока available == False, загрузка не удается; загрузку можно задержать до release"""
+
+    def __init__(self):
+        self.available = True
+        self.release = asyncio.Event()
+        self.release.set()
+        self.uploads = []
+
+    def is_available(self):
+        return self.available
+
+    async def upload_file_async(self, path, candidate_id, vacancy_id, sha256):
+        await self.release.wait()
+        self.uploads.append(sha256)
+        return f'resumes/{candidate_id}/{vacancy_id}/{sha256}.pdf'
+
+
+class FakeIndex:
+    def __init__(self):
+        self.records = {}
+
+    async def put(self, candidate_id, vacancy_id, sha256, s3_key, file_unique_id=None):
+        self.records[(candidate_id, vacancy_id)] = sha256
+
+
+def _fakes(monkeypatch):
+    storage, index = FakeStorage(), FakeIndex()
+    monkeypatch.setattr(resume_spool_module, 'storage_service', storage)
+    monkeypatch.setattr(resume_spool_module, 'resume_index', index)
+    return storage, index
+
+
+async def _add(spool, sha256, candidate_id=1):
+    return await spool.add(b'%PDF-1.4 ' + sha256.encode(), candidate_id, 'v', 1, candidate_id, candidate_id, sha256)
+
+
+async def _wait_uploaded(spool, count):
+    for _ in range(200):
+        if spool.get_stats()['uploaded'] >= count:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"uploaded: {spool.get_stats()}")
+
+
+def test_newer_resume_supersedes_queued_one(tmp_path, monkeypatch):
+    storage, index = _fakes(monkeypatch)
+    storage.available = False
+    stored = []
+
+    async def scenario():
+        spool = ResumeSpool(str(tmp_path / 'spool'))
+
+        async def on_stored(entry, s3_key):
+            stored.append(entry.sha256)
+
+        await spool.start(on_stored)
+        old = await _add(spool, 'old')
+        await _add(spool, 'new')
+        files = sorted(os.listdir(spool.directory))
+        storage.available = True
+        # Повтор после задержки: снятая запись не загружается
+        spool._queue.put_nowait((old, 1))
+        await _wait_uploaded(spool, 1)
+        await spool.stop()
+        return spool, files
+
+    spool, files = asyncio.run(scenario())
+    assert len(files) == 2
+    assert storage.uploads == ['new']
+    assert stored == ['new']
+    assert index.records == {(1, 'v'): 'new'}
+    assert spool.get_stats()['superseded'] == 1
+
+
+def test_resume_superseded_during_upload_does_not_overwrite_index(tmp_path, monkeypatch):
+    storage, index = _fakes(monkeypatch)
+    storage.release.clear()
+    stored = []
+
+    async def scenario():
+        spool = ResumeSpool(str(tmp_path / 'spool'))
+
+        async def on_stored(entry, s3_key):
+            stored.append(entry.sha256)
+
+        await spool.start(on_stored)
+        await _add(spool, 'old')
+        await asyncio.sleep(0.05)  # 'old' уже загружается
+        await _add(spool, 'new')
+        await asyncio.sleep(0.05)
+        storage.release.set()
+        await _wait_uploaded(spool, 1)
+        await asyncio.sleep(0.05)
+        await spool.stop()
+        return os.listdir(spool.directory)
+
+    left = asyncio.run(scenario())
+    assert sorted(storage.uploads) == ['new', 'old']
+    assert stored == ['new']
+    assert index.records == {(1, 'v'): 'new'}
+    assert left == []
+
+
+def test_adopt_orphaned_spool(tmp_path, monkeypatch):
+    storage, index = _fakes(monkeypatch)
+    orphan_dir = str(tmp_path / 'spool.3')
+
+    async def scenario():
+        storage.available = False
+        orphan = ResumeSpool(orphan_dir)
+        await _add(orphan, 'orphaned', candidate_id=5)
+        storage.available = True
+
+        spool = ResumeSpool(str(tmp_path / 'spool.0'))
+        await spool.start(lambda entry, s3_key: asyncio.sleep(0))
+        adopted = await spool.adopt(orphan_dir)
+        await _wait_uploaded(spool, 1)
+        await spool.stop()
+        return adopted
+
+    assert asyncio.run(scenario()) == 1
+    assert index.records == {(5, 'v'): 'orphaned'}
+    assert not os.path.exists(orphan_dir)
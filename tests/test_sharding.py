@@ -0,0 +1,76 @@
+"""
+Кольцо согласованного хеширования и маршрутизация по user_id
+"""
+import datetime
+
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from sharding import HashRing, extract_user_id, to_raw_update
+
+USERS = range(1, 20001)
+
+
+def _owners(ring):
+    return {user: ring.get(user) for user in USERS}
+
+
+def test_ring_is_deterministic():
+    assert _owners(HashRing([0, 1, 2])) == _owners(HashRing([2, 0, 1]))
+
+
+def test_ring_spreads_users_evenly():
+    counts = {}
+    for owner in _owners(HashRing([0, 1, 2, 3])).values():
+        counts[owner] = counts.get(owner, 0) + 1
+    assert sorted(counts) == [0, 1, 2, 3]
+    assert max(counts.values()) < 1.5 * len(USERS) / 4
+
+
+def test_adding_node_moves_only_users_to_it():
+    ring = HashRing([0, 1, 2])
+    before = _owners(ring)
+    ring.add(3)
+    after = _owners(ring)
+    moved = [user for user in USERS if before[user] != after[user]]
+    assert all(after[user] == 3 for user in moved)
+    # Переезжает примерно четверть пользователей, а не почти все, как при user_id % n
+    assert 0.15 < len(moved) / len(USERS) < 0.35
+
+
+def test_removing_node_moves_only_its_users():
+    ring = HashRing([0, 1, 2, 3])
+    before = _owners(ring)
+    ring.remove(3)
+    after = _owners(ring)
+    moved = [user for user in USERS if before[user] != after[user]]
+    assert all(before[user] == 3 for user in moved)
+    assert ring.nodes == [0, 1, 2]
+
+
+def test_remove_then_add_restores_owners():
+    ring = HashRing([0, 1, 2])
+    before = _owners(ring)
+    ring.remove(1)
+    ring.add(1)
+    assert _owners(ring) == before
+
+
+def test_extract_user_id():
+    assert extract_user_id({'update_id': 1, 'message': {'from': {'id': 42}, 'chat': {'id': 7}}}) == 42
+    assert extract_user_id({'update_id': 1, 'callback_query': {'from': {'id': 43}}}) == 43
+    assert extract_user_id({'update_id': 1, 'channel_post': {'chat': {'id': -100}}}) == -100
+    assert extract_user_id({'update_id': 1}) == 0
+
+
+def test_aiogram_updates_route_by_author():
+    user = User(id=4242, is_bot=False, first_name='Иван')
+    callback = Update(update_id=1, callback_query=CallbackQuery(
+        id='1', from_user=user, chat_instance='c', data='start_interview'))
+    group_message = Update(update_id=2, message=Message(
+        message_id=1, date=datetime.datetime.now(), text='/start',
+        chat=Chat(id=-100, type='supergroup'), from_user=User(id=77, is_bot=False, first_name='Петр')))
+
+    assert extract_user_id(to_raw_update(callback)) == 4242
+    assert extract_user_id(to_raw_update(group_message)) == 77
+    # Воркер восстанавливает то же обновление
+    assert Update.model_validate(to_raw_update(callback)).callback_query.from_user.id == 4242
@@ -0,0 +1,100 @@
+"""
+Кэш статусов кандидатов: время жизни по статусу, объединение запросов, сброс
+"""
+import asyncio
+from types import SimpleNamespace
+
+import cache
+import status_service as status_module
+from backend_client import ApiResponse
+from config import STATUS_CACHE_FINAL_TTL, STATUS_CACHE_NEGATIVE_TTL, STATUS_CACHE_TTL
+from status_service import StatusService, _ttl_for
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeBackend:
+    def __init__(self, response: ApiResponse):
+        self.response = response
+        self.calls = 0
+
+    async def get_screening_status(self, candidate_id, vacancy_id, fresh=False):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return self.response
+
+
+def _setup(monkeypatch, response: ApiResponse):
+    clock = Clock()
+    backend = FakeBackend(response)
+    # Часы подменяются только для кэша: event loop идет по настоящим
+    monkeypatch.setattr(cache, 'time', SimpleNamespace(monotonic=clock))
+    monkeypatch.setattr(status_module, 'get_backend_client', lambda: backend)
+    return StatusService(), backend, clock
+
+
+def test_ttl_depends_on_status():
+    assert _ttl_for(ApiResponse({'status': 'interview_ok'}, 200)) == STATUS_CACHE_FINAL_TTL
+    assert _ttl_for(ApiResponse({'status': 'screening_failed'}, 200)) == STATUS_CACHE_FINAL_TTL
+    assert _ttl_for(ApiResponse({'status': 'screening_in_progress'}, 200)) == STATUS_CACHE_TTL
+    assert _ttl_for(ApiResponse({}, 404)) == STATUS_CACHE_NEGATIVE_TTL
+    # Ошибки бэкенда не кэшируются
+    assert _ttl_for(ApiResponse(None, 0)) is None
+    assert _ttl_for(ApiResponse({}, 500)) is None
+
+
+def test_intermediate_status_expires_before_final(monkeypatch):
+    service, backend, clock = _setup(monkeypatch, ApiResponse({'status': 'screening_in_progress'}, 200))
+
+    async def scenario():
+        await service.get_status(1, 'v')
+        clock.now += STATUS_CACHE_TTL - 1
+        await service.get_status(1, 'v')
+        calls = [backend.calls]
+        clock.now += 1
+        backend.response = ApiResponse({'status': 'interview_ok'}, 200)
+        await service.get_status(1, 'v')
+        calls.append(backend.calls)
+        clock.now += STATUS_CACHE_FINAL_TTL - 1
+        response = await service.get_status(1, 'v')
+        calls.append(backend.calls)
+        return calls, response
+
+    calls, response = asyncio.run(scenario())
+    assert calls == [1, 2, 2]
+    assert response.data == {'status': 'interview_ok'}
+
+
+def test_concurrent_requests_share_one_call_and_errors_are_not_cached(monkeypatch):
+    service, backend, clock = _setup(monkeypatch, ApiResponse(None, 0))
+
+    async def scenario():
+        responses = await asyncio.gather(*(service.get_status(1, 'v') for _ in range(5)))
+        await service.get_status(1, 'v')
+        return responses
+
+    responses = asyncio.run(scenario())
+    assert all(response.status == 0 for response in responses)
+    assert backend.calls == 2
+    assert service.get_stats()['coalesced'] == 4
+
+
+def test_invalidate_and_remember(monkeypatch):
+    service, backend, clock = _setup(monkeypatch, ApiResponse({'status': 'screening_in_progress'}, 200))
+
+    async def scenario():
+        await service.get_status(1, 'v')
+        service.invalidate(1, 'v')
+        await service.get_status(1, 'v')
+        service.remember(1, 'v', {'status': 'screening_ok'})
+        return await service.get_status(1, 'v')
+
+    response = asyncio.run(scenario())
+    assert backend.calls == 2
+    assert response.data == {'status': 'screening_ok'}
@@ -0,0 +1,105 @@
+"""
+Планировщик дедлайнов: срабатывание, передача таймеров между процессами
+"""
+import asyncio
+import time
+
+from timers import DeadlineScheduler, take_deadlines
+
+
+def test_release_and_adopt_keep_deadlines(tmp_path):
+    source_path = str(tmp_path / 'timers.sqlite3.0')
+    target_path = str(tmp_path / 'timers.sqlite3.1')
+
+    async def scenario():
+        fired = []
+
+        async def on_deadline(key, payload):
+            fired.append(key)
+
+        source = DeadlineScheduler(source_path, flush_interval=0.01)
+        target = DeadlineScheduler(target_path, flush_interval=0.01)
+        await source.start(on_deadline)
+        await target.start(on_deadline)
+        source.schedule('question:1', 0.2, {'user_id': 1})
+        source.schedule('question:2', 60, {'user_id': 2})
+
+        released = source.release(lambda key, payload: payload['user_id'] == 2)
+        target.adopt(released)
+        assert [key for key, _, _ in released] == ['question:1']
+        assert len(source) == 1 and len(target) == 1
+
+        await asyncio.sleep(0.4)
+        await source.stop()
+        await target.stop()
+        return fired, released
+
+    fired, released = asyncio.run(scenario())
+    # Дедлайн абсолютный: переданный таймер срабатывает в тот же момент
+    assert fired == ['question:1']
+    assert released[0][1] < time.time()
+    assert [key for key, _, _ in take_deadlines(source_path)] == ['question:2']
+    assert take_deadlines(target_path) == []
+
+
+def test_take_deadlines_removes_file(tmp_path):
+    path = str(tmp_path / 'timers.sqlite3')
+
+    async def scenario():
+        scheduler = DeadlineScheduler(path)
+        await scheduler.start(lambda key, payload: None)
+        scheduler.schedule('question:5', 60, {'user_id': 5})
+        await scheduler.stop()
+
+    asyncio.run(scenario())
+    deadlines = take_deadlines(path)
+    assert [(key, payload) for key, _, payload in deadlines] == [('question:5', {'user_id': 5})]
+    assert take_deadlines(path) == []
+
+
+def test_count_by_kind_follows_schedule_cancel_and_fire():
+    async def scenario():
+        scheduler = DeadlineScheduler(None)
+        await scheduler.start(lambda key, payload: asyncio.sleep(0))
+        scheduler.schedule('question:1', 0.05, {})
+        scheduler.schedule('question:1', 0.05, {})  # перестановка не добавляет таймер
+        scheduler.schedule('question:2', 60, {})
+        scheduler.schedule('reminder:1', 60, {})
+        counts = [scheduler.count('question'), scheduler.count('reminder'), scheduler.count()]
+        scheduler.cancel('question:2')
+        await asyncio.sleep(0.2)
+        counts.append(scheduler.count('question'))
+        await scheduler.stop()
+        return counts
+
+    assert asyncio.run(scenario()) == [2, 1, 3, 0]
+
+
+def test_fired_deadline_stays_on_disk_until_callback_completes(tmp_path):
+    path = str(tmp_path / 'timers.sqlite3')
+
+    async def scenario():
+        release = asyncio.Event()
+        started = asyncio.Event()
+
+        async def on_deadline(key, payload):
+            started.set()
+            await release.wait()
+
+        scheduler = DeadlineScheduler(path, flush_interval=60)
+        await scheduler.start(on_deadline)
+        scheduler.schedule('question:7', 0.01, {'user_id': 7})
+        await started.wait()
+        await scheduler._flush()
+        during = await scheduler._run_db(scheduler._load)
+        counted = scheduler.count('question')
+        release.set()
+        await asyncio.sleep(0.01)
+        await scheduler.stop()
+        return [key for key, _, _ in during], counted
+
+    during, counted = asyncio.run(scenario())
+    # Обрыв посреди обработчика: дедлайн восстановится и сработает снова
+    assert during == ['question:7']
+    assert counted == 0
+    assert take_deadlines(path) == []
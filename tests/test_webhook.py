@@ -0,0 +1,55 @@
+"""
+Прием обновлений через webhook: проверка секрета
+"""
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+import webhook
+from webhook import SECRET_HEADER, create_webhook_app, webhook_secret
+
+
+async def _post(app: web.Application, headers: dict) -> int:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.post(f'http://127.0.0.1:{port}/webhook', json={'update_id': 1},
+                                    headers=headers) as response:
+                return response.status
+    finally:
+        await runner.cleanup()
+
+
+def test_update_without_valid_secret_is_rejected():
+    submitted = []
+
+    def submit(raw_update):
+        submitted.append(raw_update)
+        return True
+
+    app = create_webhook_app(submit, 'secret', path='/webhook')
+    assert asyncio.run(_post(app, {})) == 401
+    app = create_webhook_app(submit, 'secret', path='/webhook')
+    assert asyncio.run(_post(app, {SECRET_HEADER: 'wrong'})) == 401
+    app = create_webhook_app(submit, 'secret', path='/webhook')
+    assert asyncio.run(_post(app, {SECRET_HEADER: 'secret'})) == 200
+    assert submitted == [{'update_id': 1}]
+
+
+def test_empty_secret_is_not_accepted():
+    with pytest.raises(ValueError):
+        create_webhook_app(lambda raw_update: True, '')
+
+
+def test_generated_secret_when_not_configured(monkeypatch):
+    monkeypatch.setattr(webhook, 'WEBHOOK_SECRET', None)
+    first, second = webhook_secret(), webhook_secret()
+    assert first != second
+    assert len(first) >= 32
+    assert all(c.isalnum() or c in '_-' for c in first)
@@ -0,0 +1,319 @@
+"""
+Планировщик дедлайнов (таймеры вопросов интервью)
+
+Один фоновый цикл обслуживает все таймеры: дедлайны лежат в куче,
+отмена - O(1) пометкой записи, дедлайны сохраняются в SQLite и
+восстанавливаются после перезапуска. При шардировании у каждого воркера
+свой файл; дедлайны чужих пользователей передаются владельцу через
+release() / adopt().
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config import TIMERS_DB_PATH, TIMERS_FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+DeadlineCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+class _Entry:
+    """Запись таймера (в куче лежит кортеж (deadline, seq, entry))"""
+    __slots__ = ('deadline', 'key', 'payload', 'active')
+
+    def __init__(self, deadline: float, key: str, payload: Dict[str, Any]):
+        self.deadline = deadline
+        self.key = key
+        self.payload = payload
+        self.active = True
+
+
+class DeadlineScheduler:
+    """
+    Планировщик дедлайнов на одной куче.
+
+    На каждый ключ - не больше одного активного таймера: повторный schedule
+    заменяет предыдущий. Отмененные записи удаляются из кучи лениво.
+    """
+
+    def __init__(self, path: Optional[str] = TIMERS_DB_PATH, flush_interval: float = TIMERS_FLUSH_INTERVAL):
+        """
+        Args:
+            path: Файл SQLite для сохранения дедлайнов (None - без сохранения)
+            flush_interval: Период записи изменений на диск, сек
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self._heap: List[Tuple[float, int, _Entry]] = []
+        self._entries: Dict[str, _Entry] = {}
+        # Число таймеров по виду - части ключа до ':' (например, 'question')
+        self._kinds: Dict[str, int] = {}
+        self._seq = itertools.count()
+        self._callback: Optional[DeadlineCallback] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._running_callbacks: set = set()
+        # Изменения для записи на диск: key -> запись (None - удалить)
+        self._dirty: Dict[str, Optional[_Entry]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='timers-sqlite')
+        self._conn: Optional[sqlite3.Connection] = None
+        self.fired = 0
+
+    # ==================== ЖИЗНЕННЫЙ ЦИКЛ ====================
+
+    async def start(self, callback: DeadlineCallback, restore_filter: Optional[Callable[[str, Dict], bool]] = None,
+                    path: Optional[str] = None):
+        """
+        Запуск планировщика и восстановление сохраненных дедлайнов
+
+        Args:
+            callback: Корутина, вызываемая с (key, payload) по наступлении дедлайна
+            restore_filter: Отбор восстанавливаемых записей (например, по шарду)
+            path: Отдельный файл SQLite (для воркеров с шардированием)
+        """
+        if path:
+            self.path = path
+        self._callback = callback
+        self._wakeup = asyncio.Event()
+
+        if self.path:
+            rows = await self._run_db(self._load)
+            restored = 0
+            for key, deadline, payload in rows:
+                payload = json.loads(payload)
+                if restore_filter is not None and not restore_filter(key, payload):
+                    continue
+                self._push(key, deadline, payload)
+                restored += 1
+            if restored:
+                logger.info(f"Restored {restored} pending deadlines")
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Остановка планировщика (дедлайны остаются на диске)"""
+        for task in (self._runner, self._flusher):
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*(t for t in (self._runner, self._flusher) if t is not None), return_exceptions=True)
+        self._runner = self._flusher = None
+        # Сработавшие обработчики завершаются до закрытия хранилища FSM и отправки сообщений
+        await asyncio.gather(*self._running_callbacks, return_exceptions=True)
+        if self.path:
+            await self._flush()
+            if self._conn is not None:
+                await self._run_db(self._conn.close)
+                self._conn = None
+        self._executor.shutdown(wait=True)
+
+    # ==================== API ====================
+
+    def schedule(self, key: str, delay: float, payload: Dict[str, Any]):
+        """Поставить (или переставить) таймер для ключа через delay секунд"""
+        previous = self._entries.get(key)
+        if previous is not None:
+            previous.active = False
+
+        entry = self._push(key, time.time() + delay, payload)
+        self._dirty[key] = entry
+
+        if self._heap[0][2] is entry and self._wakeup is not None:
+            self._wakeup.set()
+
+    def cancel(self, key: str) -> bool:
+        """Отменить таймер ключа. Возвращает True, если таймер был"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._count_kind(key, -1)
+        entry.active = False
+        self._dirty[key] = None
+        return True
+
+    def release(self, keep: Callable[[str, Dict[str, Any]], bool]) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Снять таймеры, не прошедшие отбор keep (например, после смены кольца шардирования)
+
+        Returns:
+            Снятые таймеры (key, deadline, payload) для передачи в adopt() другого планировщика
+        """
+        released = []
+        for key, entry in list(self._entries.items()):
+            if keep(key, entry.payload):
+                continue
+            del self._entries[key]
+            self._count_kind(key, -1)
+            entry.active = False
+            self._dirty[key] = None
+            released.append((key, entry.deadline, entry.payload))
+        return released
+
+    def adopt(self, entries: List[Tuple[str, float, Dict[str, Any]]]):
+        """Принять таймеры с абсолютными дедлайнами (из release() или файла другого процесса)"""
+        for key, deadline, payload in entries:
+            previous = self._entries.get(key)
+            if previous is not None:
+                previous.active = False
+            self._dirty[key] = self._push(key, deadline, payload)
+        if entries and self._wakeup is not None:
+            self._wakeup.set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def count(self, kind: str = '') -> int:
+        """Число отложенных дедлайнов вида kind (ключ '<kind>:...'), без обхода таймеров"""
+        if not kind:
+            return len(self._entries)
+        return self._kinds.get(kind, 0)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Число активных таймеров, размер кучи и сработавшие таймеры"""
+        return {'pending': len(self._entries), 'heap': len(self._heap), 'fired': self.fired}
+
+    # ==================== ВНУТРЕННЕЕ ====================
+
+    def _push(self, key: str, deadline: float, payload: Dict[str, Any]) -> _Entry:
+        entry = _Entry(deadline, key, payload)
+        if key not in self._entries:
+            self._count_kind(key, 1)
+        self._entries[key] = entry
+        heapq.heappush(self._heap, (deadline, next(self._seq), entry))
+        # Ленивое удаление: перестраиваем кучу, когда отмененных записей слишком много
+        if len(self._heap) > 1024 and len(self._heap) > 2 * len(self._entries):
+            self._heap = [item for item in self._heap if item[2].active]
+            heapq.heapify(self._heap)
+        return entry
+
+    def _count_kind(self, key: str, delta: int):
+        kind = key.split(':', 1)[0]
+        count = self._kinds.get(kind, 0) + delta
+        if count:
+            self._kinds[kind] = count
+        else:
+            self._kinds.pop(kind, None)
+
+    async def _run(self):
+        while True:
+            while self._heap and not self._heap[0][2].active:
+                heapq.heappop(self._heap)
+
+            timeout = None
+            if self._heap:
+                timeout = self._heap[0][0] - time.time()
+
+            if timeout is None or timeout > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            entry = heapq.heappop(self._heap)[2]
+            if not entry.active:
+                continue
+            entry.active = False
+            if self._entries.pop(entry.key, None) is not None:
+                self._count_kind(entry.key, -1)
+            # Запись на диске удаляется после обработчика (_fire): дедлайн, оборванный
+            # перезапуском посреди обработки, сработает повторно после восстановления
+            self.fired += 1
+
+            task = asyncio.create_task(self._fire(entry))
+            self._running_callbacks.add(task)
+            task.add_done_callback(self._running_callbacks.discard)
+
+            # При массовом срабатывании отдаем управление другим задачам
+            if self.fired % 1000 == 0:
+                await asyncio.sleep(0)
+
+    async def _fire(self, entry: _Entry):
+        try:
+            await self._callback(entry.key, entry.payload)
+        except Exception as e:
+            logger.error(f"Deadline callback for {entry.key} failed: {e}")
+        finally:
+            # Обработчик мог переставить таймер - новая запись остается
+            if entry.key not in self._entries:
+                self._dirty[entry.key] = None
+
+    # ==================== СОХРАНЕНИЕ ====================
+
+    async def _run_db(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS deadlines (key TEXT PRIMARY KEY, deadline REAL NOT NULL, payload TEXT)'
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _load(self) -> list:
+        return self._connect().execute('SELECT key, deadline, payload FROM deadlines').fetchall()
+
+    def _write(self, changes: Dict[str, Optional[_Entry]]):
+        conn = self._connect()
+        deleted = [(key,) for key, entry in changes.items() if entry is None]
+        upserted = [
+            (key, entry.deadline, json.dumps(entry.payload))
+            for key, entry in changes.items() if entry is not None
+        ]
+        with conn:
+            conn.executemany('DELETE FROM deadlines WHERE key = ?', deleted)
+            conn.executemany('INSERT OR REPLACE INTO deadlines (key, deadline, payload) VALUES (?, ?, ?)', upserted)
+
+    async def _flush(self):
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, {}
+        try:
+            await self._run_db(self._write, dirty)
+        except Exception as e:
+            logger.error(f"Failed to persist {len(dirty)} deadlines: {e}")
+            for key, entry in dirty.items():
+                self._dirty.setdefault(key, entry)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self._flush()
+
+
+def take_deadlines(path: str) -> List[Tuple[str, float, Dict[str, Any]]]:
+    """Прочитать дедлайны из файла другого процесса и удалить файл"""
+    if not os.path.exists(path):
+        return []
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        rows = conn.execute('SELECT key, deadline, payload FROM deadlines').fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    finally:
+        conn.close()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return [(key, deadline, json.loads(payload)) for key, deadline, payload in rows]
+
+
+# Глобальный экземпляр планировщика
+deadline_scheduler = DeadlineScheduler()
@@ -1,4 +1,7 @@
+import os
+import random
 import re
+from typing import Dict
 
 
 def is_valid_phone(phone: str) -> bool:
@@ -14,3 +17,32 @@ def is_valid_phone(phone: str) -> bool:
     ]
 
     return any(re.match(pattern, cleaned_phone) for pattern in patterns)
+
+
+def backoff_delay(attempt: int, initial: float, maximum: float) -> float:
+    """
+    Экспоненциальная задержка с джиттером ("equal jitter"):
+    половина задержки фиксирована, вторая половина случайна.
+    """
+    delay = min(maximum, initial * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def indexed_paths(base: str) -> Dict[int, str]:
+    """
+    Пути вида <base>.<номер> (журналы и очереди воркеров при шардировании)
+
+    Returns:
+        Словарь номер -> путь для существующих файлов и каталогов
+    """
+    directory, prefix = os.path.split(os.path.abspath(base))
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return {}
+    paths = {}
+    for name in names:
+        suffix = name[len(prefix) + 1:]
+        if name.startswith(prefix + '.') and suffix.isdigit():
+            paths[int(suffix)] = os.path.join(directory, name)
+    return paths
@@ -0,0 +1,168 @@
+"""
+Прием обновлений через webhook: встроенный aiohttp-сервер и ограниченная очередь обработки
+"""
+import asyncio
+import hmac
+import logging
+import secrets
+from typing import Any, Callable, Dict, List, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiohttp import web
+
+from config import WEBHOOK_BASE_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_HOST, WEBHOOK_PORT, \
+    UPDATE_QUEUE_SIZE, UPDATE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+class UpdateProcessor:
+    """
+    Ограниченная очередь обновлений и пул воркеров, передающих их в Dispatcher.
+
+    Если очередь заполнена, обновление не принимается - Telegram повторит его позже.
+    """
+
+    def __init__(self, dp: Dispatcher, bot: Bot, queue_size: int = UPDATE_QUEUE_SIZE, workers: int = UPDATE_WORKERS):
+        self.dp = dp
+        self.bot = bot
+        self.queue_size = queue_size
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.accepted = 0
+        self.dropped = 0
+
+    def start(self):
+        """Запуск воркеров"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, drain: bool = True):
+        """Остановка воркеров (по умолчанию после обработки уже принятых обновлений)"""
+        if drain and self._queue is not None:
+            await self._queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, raw_update: Dict[str, Any]) -> bool:
+        """Поставить обновление в очередь. Возвращает False, если очередь заполнена"""
+        try:
+            self._queue.put_nowait(raw_update)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.accepted += 1
+        return True
+
+    async def put(self, raw_update: Dict[str, Any]):
+        """Поставить обновление в очередь, дождавшись свободного места"""
+        await self._queue.put(raw_update)
+        self.accepted += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        """Размер очереди и счетчики"""
+        return {
+            'queued': self._queue.qsize() if self._queue else 0,
+            'limit': self.queue_size,
+            'accepted': self.accepted,
+            'dropped': self.dropped,
+        }
+
+    async def _worker(self):
+        while True:
+            raw_update = await self._queue.get()
+            try:
+                update = Update.model_validate(raw_update, context={'bot': self.bot})
+                await self.dp.feed_update(self.bot, update)
+            except Exception as e:
+                logger.error(f"Failed to process update {raw_update.get('update_id')}: {e}")
+            finally:
+                self._queue.task_done()
+
+
+def webhook_secret() -> str:
+    """
+    Секрет webhook: WEBHOOK_SECRET или случайный на время работы процесса
+
+    Без секрета любой, кто знает адрес, мог бы отправлять боту поддельные обновления.
+    Случайный секрет передается Telegram в setWebhook при каждом запуске.
+    """
+    if WEBHOOK_SECRET:
+        return WEBHOOK_SECRET
+    logger.warning("WEBHOOK_SECRET is not set, using a generated secret")
+    return secrets.token_urlsafe(32)
+
+
+def create_webhook_app(submit: Callable[[Dict[str, Any]], bool], secret: str,
+                       path: str = WEBHOOK_PATH) -> web.Application:
+    """
+    aiohttp-приложение, принимающее обновления от Telegram
+
+    Обработчик только проверяет секрет и ставит обновление в очередь,
+    поэтому Telegram получает 200 сразу, не дожидаясь обработки.
+
+    Args:
+        submit: Функция постановки обновления в очередь (False - очередь заполнена)
+        secret: Ожидаемое значение заголовка X-Telegram-Bot-Api-Secret-Token (обязательно)
+        path: Путь webhook
+    """
+    if not secret:
+        raise ValueError("Webhook secret is required")
+    expected = secret.encode()
+
+    async def handle(request: web.Request) -> web.Response:
+        received = request.headers.get(SECRET_HEADER, '').encode()
+        if not hmac.compare_digest(received, expected):
+            return web.Response(status=401)
+        try:
+            raw_update = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+        if not submit(raw_update):
+            # Очередь заполнена: Telegram повторит доставку позже
+            return web.Response(status=503)
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post(path, handle)
+    return app
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, **workflow_data):
+    """Запуск бота в режиме webhook (до отмены задачи)"""
+    if not WEBHOOK_BASE_URL:
+        raise RuntimeError("WEBHOOK_BASE_URL is required in webhook mode")
+
+    secret = webhook_secret()
+    processor = UpdateProcessor(dp, bot)
+    app = create_webhook_app(processor.submit, secret)
+    runner = web.AppRunner(app)
+
+    await dp.emit_startup(bot=bot, **workflow_data)
+    processor.start()
+    await runner.setup()
+    site = web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT)
+    await site.start()
+
+    try:
+        await bot.set_webhook(
+            f"{WEBHOOK_BASE_URL.rstrip('/')}{WEBHOOK_PATH}",
+            secret_token=secret,
+            allowed_updates=dp.resolve_used_update_types(),
+            drop_pending_updates=True,
+        )
+        logger.info(f"Webhook server listening on {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+        await processor.stop()
+        logger.info(f"Update processor stats: {processor.get_stats()}")
+        await dp.emit_shutdown(bot=bot, **workflow_data)